@@ -1,6 +1,9 @@
 import xmlrpc.client as xc
 import pandas as pd
 
+from .batch import ExecuteKwBatch
+from .transport import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, make_transport
+
 class OdooAPI:
     def __init__(
             self,
@@ -8,6 +11,9 @@ class OdooAPI:
             url=None,
             username=None,
             password=None,
+            transport=None,
+            timeout=DEFAULT_TIMEOUT,
+            pool_size=DEFAULT_POOL_SIZE,
     ):
         # Validate parameters
         if not url:
@@ -26,6 +32,10 @@ class OdooAPI:
         self.common = None
         self.uid = None
         self.models = None
+        # Un único transporte compartido por /common y /object: todas las
+        # llamadas de la instancia (y de los hilos que la usen) reutilizan el
+        # mismo pool de conexiones keep-alive.
+        self.transport = transport or make_transport(url, pool_size=pool_size, timeout=timeout)
 
         self._authenticate()
         self._create_model()
@@ -35,39 +45,81 @@ class OdooAPI:
 
 
     def _authenticate(self):
-        self.common = xc.ServerProxy(f'{self.url}/xmlrpc/2/common')
+        self.common = xc.ServerProxy(f'{self.url}/xmlrpc/2/common', transport=self.transport)
         self.uid = self.common.authenticate(self.db, self.username, self.password, {})
         if not self.uid:
             raise ValueError("Error de autenticación en Odoo API")
 
     def _create_model(self):
-        self.models = xc.ServerProxy(f'{self.url}/xmlrpc/2/object')
+        self.models = xc.ServerProxy(f'{self.url}/xmlrpc/2/object', transport=self.transport)
+
+    def execute_kw(self, model, method, args=None, kwargs=None, timeout=None):
+        """Ejecuta `execute_kw` sobre el pool; `timeout` aplica sólo a esta llamada."""
+        args = args if args is not None else []
+        kwargs = kwargs or {}
+        if timeout is None or not hasattr(self.transport, "call_timeout"):
+            return self.models.execute_kw(self.db, self.uid, self.password, model, method, args, kwargs)
+        with self.transport.call_timeout(timeout):
+            return self.models.execute_kw(self.db, self.uid, self.password, model, method, args, kwargs)
+
+    def iter_search_read(self, model, domain=None, fields=None, page_size=1000, kwargs=None):
+        """
+        Recorre `search_read` por páginas usando el id como cursor (keyset).
+
+        Cada página pide `id > último id ORDER BY id` en vez de usar `offset`,
+        así las páginas profundas cuestan lo mismo que la primera y las
+        escrituras concurrentes no hacen saltar ni duplicar registros.
+
+        Args:
+            model: Modelo de Odoo.
+            domain: Dominio adicional (se combina con AND).
+            fields: Campos a leer (`id` siempre viene).
+            page_size: Registros por página.
+            kwargs: Argumentos extra para `search_read` (p. ej. `context`).
+
+        Yields:
+            Listas de registros en orden creciente de id.
+        """
+        domain = list(domain or [])
+        last_id = 0
+        while True:
+            page = self.execute_kw(
+                model,
+                'search_read',
+                [[('id', '>', last_id)] + domain],
+                {**(kwargs or {}), 'fields': fields or [], 'order': 'id', 'limit': page_size},
+            )
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            last_id = page[-1]['id']
+
+    def batch(self, max_workers=None):
+        """Crea un `ExecuteKwBatch` para encolar llamadas y ejecutarlas por niveles."""
+        return ExecuteKwBatch(self, max_workers=max_workers)
+
+    def close(self):
+        """Cierra las conexiones persistentes del transporte."""
+        close = getattr(self.transport, "close", None)
+        if close is not None:
+            close()
 
     def __enter__(self):
         # Si necesitas lógica extra al entrar al contexto, agrégala aquí
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-    # This method ensures network resources are cleaned up safely.
-    # The try...except blocks prevent any errors during cleanup
-    # from crashing the application or masking the tool's real output.
+        # Cerrar el transporte libera las conexiones keep-alive del pool. Nunca
+        # debe enmascarar la excepción (o el resultado) del bloque `with`.
+        # Ojo: `self.models.close()` no sirve, ServerProxy lo enviaría como
+        # una llamada RPC llamada "close".
         try:
-            # Note: The exact way to close the connection depends on the library.
-            # We assume the ServerProxy object is stored in self.models and self.common.
-            # Often, the underlying transport needs to be closed. Since we cannot be
-            # certain of the internal structure, we check for a 'close' method.
-            if hasattr(self, 'models') and hasattr(self.models, 'close'):
-                self.models.close()
-        except Exception as e:
+            self.close()
+        except Exception:
             pass
-    
-        try:
-            # The typo from before is also fixed here.
-            if hasattr(self, 'common') and hasattr(self.common, 'close'):
-                self.common.close()
-        except Exception as e:
-            pass
-    
+
     def get_fields(self, table):
         fields = self.models.execute_kw(self.db, self.uid, self.password, table, 'fields_get', [])
         df_fields = pd.DataFrame.from_dict(fields, orient='index')
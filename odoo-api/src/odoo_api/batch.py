@@ -0,0 +1,217 @@
+"""Pipeline de llamadas `execute_kw` en lote.
+
+Permite encolar varias llamadas, expresar dependencias entre ellas (p. ej.
+"leer los productos cuyos ids devolvió la búsqueda anterior") y ejecutarlas
+todas de una vez. Las llamadas se agrupan en niveles según sus dependencias;
+las de un mismo nivel son independientes y se envían en paralelo sobre el pool
+de conexiones del transporte, así que el costo en latencia es un round trip
+por nivel y no uno por llamada.
+
+Ejemplo:
+    batch = api.batch()
+    products = batch.add('product.product', 'search_read',
+                         [[('default_code', 'in', skus)]], {'fields': ['uom_id']})
+    uoms = batch.add('uom.uom', 'read',
+                     [products.map(lambda ps: sorted({p['uom_id'][0] for p in ps}))],
+                     {'fields': ['name']})
+    batch.execute()
+    products.result(), uoms.result()
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+_PENDING = object()
+
+
+class Ref:
+    """Resultado (futuro) de una llamada encolada o de una transformación suya.
+
+    Un `Ref` puede usarse en cualquier posición de `args`/`kwargs` de otra
+    llamada del mismo lote: se reemplaza por su valor antes de enviarla.
+    """
+
+    def __init__(self, batch, call=None, source=None, fn=None):
+        self._batch = batch
+        self._call = call
+        self._source = source
+        self._fn = fn
+        self._value = _PENDING
+
+    def map(self, fn):
+        """Devuelve un `Ref` derivado cuyo valor es `fn(valor de este Ref)`."""
+        return Ref(self._batch, source=self, fn=fn)
+
+    def calls(self):
+        """Llamadas de las que depende este Ref."""
+        return [self._call] if self._call is not None else self._source.calls()
+
+    def result(self):
+        if self._value is _PENDING:
+            if self._call is not None:
+                if not self._call.done:
+                    raise RuntimeError("El lote aún no se ha ejecutado")
+                self._value = self._call.value
+            else:
+                self._value = self._fn(self._source.result())
+        return self._value
+
+
+class _Call:
+    def __init__(self, index, model, method, args, kwargs, skip_if_empty, default):
+        self.index = index
+        self.model = model
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.skip_if_empty = skip_if_empty
+        self.default = default
+        self.deps = {call.index: call for ref in _refs_in((args, kwargs)) for call in ref.calls()}
+        self.done = False
+        self.value = None
+
+
+def _refs_in(value):
+    if isinstance(value, Ref):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _refs_in(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _refs_in(item)
+
+
+def _resolve(value):
+    if isinstance(value, Ref):
+        return value.result()
+    if isinstance(value, list):
+        return [_resolve(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_resolve(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _resolve(item) for key, item in value.items()}
+    return value
+
+
+def _is_empty(value):
+    return isinstance(value, (list, tuple, set, dict)) and not value
+
+
+class ExecuteKwBatch:
+    """Cola de llamadas `execute_kw` con dependencias, ejecutada por niveles.
+
+    Args:
+        api: Instancia de `OdooAPI` (o subclase) sobre la que ejecutar.
+        max_workers: Llamadas simultáneas por nivel. Por defecto el tamaño del
+            pool del transporte; si el transporte no tiene pool (p. ej. el
+            `Transport` estándar, que no es seguro entre hilos) se ejecuta en
+            serie.
+    """
+
+    def __init__(self, api, max_workers=None):
+        self.api = api
+        if max_workers is None:
+            max_workers = getattr(api.transport, "pool_size", 1)
+        self.max_workers = max(1, max_workers)
+        self._calls = []
+        self.round_trips = 0
+
+    def add(self, model, method, args=None, kwargs=None, skip_if_empty=True, default=None):
+        """Encola una llamada y devuelve su `Ref`.
+
+        Args:
+            model: Modelo de Odoo, p. ej. 'product.product'.
+            method: Método, p. ej. 'search_read'.
+            args: Argumentos posicionales; pueden contener `Ref`.
+            kwargs: Argumentos nombrados; pueden contener `Ref`.
+            skip_if_empty: Si algún `Ref` del que depende resuelve a una
+                colección vacía (p. ej. no se encontraron ids), la llamada no
+                se envía y su resultado es `default`.
+            default: Resultado cuando la llamada se omite. Por defecto `[]`.
+        """
+        call = _Call(
+            len(self._calls), model, method,
+            args if args is not None else [], kwargs or {},
+            skip_if_empty, [] if default is None else default,
+        )
+        self._calls.append(call)
+        return Ref(self, call=call)
+
+    def __len__(self):
+        return len(self._calls)
+
+    def _levels(self):
+        depth = {}
+        for call in self._calls:
+            # Las dependencias siempre tienen un índice menor: add() sólo
+            # acepta Refs de llamadas ya encoladas.
+            depth[call.index] = 1 + max((depth[i] for i in call.deps), default=-1)
+        levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for call in self._calls:
+            levels[depth[call.index]].append(call)
+        return levels
+
+    def _run(self, call):
+        if call.skip_if_empty and any(_is_empty(ref.result()) for ref in _refs_in((call.args, call.kwargs))):
+            return call.default, False
+        args = _resolve(call.args)
+        kwargs = _resolve(call.kwargs)
+        return self.api.execute_kw(call.model, call.method, args, kwargs), True
+
+    def execute(self):
+        """Ejecuta todas las llamadas pendientes y devuelve sus resultados en orden.
+
+        Si alguna llamada falla se propaga la primera excepción al terminar su
+        nivel y los niveles siguientes no se ejecutan. Las llamadas del nivel
+        que sí terminaron quedan registradas (su `Ref.result()` funciona), y
+        volver a llamar a `execute()` sólo reenvía las que faltan.
+        """
+        pending = [call for call in self._calls if not call.done]
+        if not pending:
+            return [call.value for call in self._calls]
+        with ThreadPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else _Serial() as executor:
+            for level in self._levels():
+                level = [call for call in level if not call.done]
+                if not level:
+                    continue
+                outcomes = list(executor.map(self._capture, level))
+                sent = False
+                first_error = None
+                for call, (value, was_sent, error) in zip(level, outcomes):
+                    sent = sent or was_sent
+                    if error is not None:
+                        first_error = first_error or error
+                        continue
+                    call.value, call.done = value, True
+                if sent:
+                    self.round_trips += 1
+                if first_error is not None:
+                    raise first_error
+        return [call.value for call in self._calls]
+
+    def _capture(self, call):
+        try:
+            value, sent = self._run(call)
+            return value, sent, None
+        except Exception as e:
+            return None, True, e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+
+class _Serial:
+    """Ejecutor mínimo en serie con la misma interfaz que ThreadPoolExecutor."""
+
+    def map(self, fn, items):
+        return [fn(item) for item in items]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
@@ -0,0 +1,328 @@
+"""Carga masiva de BOMs y stock de componentes.
+
+Resuelve un conjunto arbitrario de SKUs (productos, BOM elegida, líneas,
+SKUs de componentes y stock disponible de cada componente) con un número
+constante de llamadas RPC, usando `ExecuteKwBatch`:
+
+    nivel 1: productos por SKU
+    nivel 2: BOMs candidatas y sus líneas
+    nivel 3: SKUs de los componentes y quants internos de los componentes
+
+Los componentes compartidos entre BOMs se leen una sola vez.
+
+`explode_boms` baja recursivamente hasta los componentes hoja (los que no
+tienen BOM propia), multiplicando cantidades, con memoización de cada
+subensamble y detección de ciclos.
+"""
+
+import numpy as np
+
+
+class BomSnapshot:
+    """Foto de BOMs y stock para un conjunto de SKUs terminados."""
+
+    def __init__(self, products_by_sku, bom_by_sku, lines_by_id, component_skus, stock_by_product):
+        self.products_by_sku = products_by_sku
+        self.bom_by_sku = bom_by_sku
+        self.lines_by_id = lines_by_id
+        self.component_skus = component_skus
+        self.stock_by_product = stock_by_product
+
+    def lines(self, sku):
+        """Líneas (product_id, cantidad) de la BOM de `sku` cuyos componentes tienen SKU."""
+        bom = self.bom_by_sku.get(sku)
+        if not bom:
+            return []
+        lines = []
+        for line_id in bom["bom_line_ids"]:
+            line = self.lines_by_id.get(line_id)
+            if line and self.component_skus.get(line["product_id"][0]):
+                lines.append((line["product_id"][0], line["product_qty"]))
+        return lines
+
+    def components(self, sku):
+        """Componentes de `sku` en el formato de `OdooProduct.get_bom_components`."""
+        return [
+            {"sku": self.component_skus[product_id], "quantity": qty}
+            for product_id, qty in self.lines(sku)
+        ]
+
+    def max_production_quantities(self, skus):
+        """Cantidad máxima fabricable de cada SKU según su componente limitante.
+
+        Para cada línea se calcula `stock / cantidad` (0 si la cantidad es
+        <= 0) y se toma el mínimo por SKU en una sola pasada con NumPy. Un
+        SKU sin BOM o sin líneas válidas da 0.0.
+        """
+        skus = list(dict.fromkeys(skus))
+        owners, quantities, stocks = [], [], []
+        for row, sku in enumerate(skus):
+            for product_id, qty in self.lines(sku):
+                owners.append(row)
+                quantities.append(qty)
+                stocks.append(self.stock_by_product.get(product_id, 0.0))
+
+        result = np.full(len(skus), np.inf)
+        if owners:
+            quantities = np.asarray(quantities, dtype=float)
+            stocks = np.asarray(stocks, dtype=float)
+            ratios = np.zeros_like(quantities)
+            np.divide(stocks, quantities, out=ratios, where=quantities > 0)
+            np.minimum.at(result, np.asarray(owners), ratios)
+        result[np.isinf(result)] = 0.0
+        return {sku: float(value) for sku, value in zip(skus, result)}
+
+
+def _select_bom(product, boms):
+    # Igual que odoo-engine (BomExplosion): la BOM propia de la variante tiene
+    # prioridad sobre una de la plantilla; entre las del mismo tipo, la primera
+    # en el orden del modelo. Una BOM de otra variante de la plantilla no aplica.
+    template_id = product["product_tmpl_id"][0] if product["product_tmpl_id"] else None
+    template_bom = None
+    for bom in boms:
+        if bom["product_id"]:
+            if bom["product_id"][0] == product["id"]:
+                return bom
+        elif template_bom is None and bom["product_tmpl_id"] and bom["product_tmpl_id"][0] == template_id:
+            template_bom = bom
+    return template_bom
+
+
+def load_bom_snapshot(api, skus, with_stock=False):
+    """Carga productos, BOMs, líneas, componentes y (opcional) stock de `skus`.
+
+    Args:
+        api: Instancia de `OdooAPI` (o subclase).
+        skus: SKUs de los productos terminados.
+        with_stock: Si es True también lee el stock disponible de los
+            componentes: suma de `quantity - reserved_quantity` de los quants
+            con cantidad positiva en ubicaciones internas, igual que
+            `OdooWarehouse.get_stock_by_sku`.
+
+    Returns:
+        BomSnapshot
+    """
+    skus = list(dict.fromkeys(skus))
+    batch = api.batch()
+    products_ref = batch.add(
+        "product.product",
+        "search_read",
+        [[("default_code", "in", skus)]],
+        {"fields": ["id", "default_code", "product_tmpl_id"]},
+    )
+    product_ids_ref = products_ref.map(lambda products: [p["id"] for p in products])
+    template_ids_ref = products_ref.map(
+        lambda products: sorted({p["product_tmpl_id"][0] for p in products if p["product_tmpl_id"]})
+    )
+    boms_ref = batch.add(
+        "mrp.bom",
+        "search_read",
+        [["|", ["product_id", "in", product_ids_ref], ["product_tmpl_id", "in", template_ids_ref]]],
+        {"fields": ["id", "product_id", "product_tmpl_id", "bom_line_ids"]},
+    )
+    lines_ref = batch.add(
+        "mrp.bom.line",
+        "search_read",
+        [[
+            "|",
+            ["bom_id.product_id", "in", product_ids_ref],
+            ["bom_id.product_tmpl_id", "in", template_ids_ref],
+        ]],
+        {"fields": ["id", "product_id", "product_qty"]},
+    )
+    component_ids_ref = lines_ref.map(lambda lines: sorted({line["product_id"][0] for line in lines}))
+    components_ref = batch.add(
+        "product.product",
+        "read",
+        [component_ids_ref],
+        {"fields": ["id", "default_code"]},
+    )
+    quants_ref = None
+    if with_stock:
+        quants_ref = batch.add(
+            "stock.quant",
+            "search_read",
+            [[
+                ["product_id", "in", component_ids_ref],
+                ["location_id.usage", "=", "internal"],
+                ["quantity", ">", 0],
+            ]],
+            {"fields": ["product_id", "quantity", "reserved_quantity"]},
+        )
+    batch.execute()
+
+    products_by_sku = {}
+    for product in products_ref.result():
+        products_by_sku.setdefault(product["default_code"], product)
+    boms = boms_ref.result()
+    bom_by_sku = {}
+    for sku, product in products_by_sku.items():
+        bom = _select_bom(product, boms)
+        if bom:
+            bom_by_sku[sku] = bom
+
+    stock_by_product = {}
+    if quants_ref is not None:
+        for quant in quants_ref.result():
+            product_id = quant["product_id"][0]
+            stock_by_product[product_id] = (
+                stock_by_product.get(product_id, 0.0) + quant["quantity"] - quant["reserved_quantity"]
+            )
+
+    return BomSnapshot(
+        products_by_sku=products_by_sku,
+        bom_by_sku=bom_by_sku,
+        lines_by_id={line["id"]: line for line in lines_ref.result()},
+        component_skus={c["id"]: c["default_code"] for c in components_ref.result()},
+        stock_by_product=stock_by_product,
+    )
+
+
+class BomCycleError(ValueError):
+    """La estructura de BOMs contiene un ciclo (un producto se consume a sí mismo)."""
+
+    def __init__(self, cycle):
+        self.cycle = list(cycle)
+        super().__init__("Ciclo en BOMs: " + " -> ".join(str(node) for node in self.cycle))
+
+
+def explode_structure(structure, roots):
+    """Explota BOMs de varios niveles sobre una estructura ya cargada en memoria.
+
+    Args:
+        structure: {producto: [(componente, cantidad por unidad), ...]} sólo
+            para los productos que tienen BOM. Los productos que no aparecen
+            son hojas.
+        roots: Productos a explotar.
+
+    Returns:
+        {producto: {hoja: cantidad por unidad}}. Cada subensamble se explota
+        una sola vez aunque aparezca en muchas BOMs.
+
+    Raises:
+        BomCycleError: si algún producto alcanza a sí mismo.
+    """
+    memo = {}
+    visiting = []
+    on_path = set()
+
+    def explode(node):
+        if node in memo:
+            return memo[node]
+        if node in on_path:
+            raise BomCycleError(visiting[visiting.index(node):] + [node])
+        lines = structure.get(node)
+        if lines is None:
+            return {node: 1.0}
+        visiting.append(node)
+        on_path.add(node)
+        vector = {}
+        for component, qty in lines:
+            for leaf, leaf_qty in explode(component).items():
+                vector[leaf] = vector.get(leaf, 0.0) + qty * leaf_qty
+        visiting.pop()
+        on_path.discard(node)
+        memo[node] = vector
+        return vector
+
+    return {root: explode(root) for root in roots}
+
+
+def _load_bom_level(api, product_ids):
+    """Productos, BOM elegida y líneas para un nivel de la explosión (2 round trips)."""
+    batch = api.batch()
+    products_ref = batch.add(
+        "product.product",
+        "read",
+        [list(product_ids)],
+        {"fields": ["id", "default_code", "product_tmpl_id"]},
+    )
+    template_ids_ref = products_ref.map(
+        lambda products: sorted({p["product_tmpl_id"][0] for p in products if p["product_tmpl_id"]})
+    )
+    boms_ref = batch.add(
+        "mrp.bom",
+        "search_read",
+        [["|", ["product_id", "in", list(product_ids)], ["product_tmpl_id", "in", template_ids_ref]]],
+        {"fields": ["id", "product_id", "product_tmpl_id", "product_qty", "bom_line_ids"]},
+    )
+    lines_ref = batch.add(
+        "mrp.bom.line",
+        "search_read",
+        [[
+            "|",
+            ["bom_id.product_id", "in", list(product_ids)],
+            ["bom_id.product_tmpl_id", "in", template_ids_ref],
+        ]],
+        {"fields": ["id", "product_id", "product_qty"]},
+    )
+    batch.execute()
+    return products_ref.result(), boms_ref.result(), {line["id"]: line for line in lines_ref.result()}
+
+
+def explode_boms(api, skus):
+    """Explota hasta las hojas las BOMs de todos los `skus`.
+
+    Carga la estructura nivel por nivel (2 round trips por nivel de
+    profundidad, independiente del número de SKUs) y luego la explota en
+    memoria con `explode_structure`. Las cantidades se normalizan por la
+    cantidad producida por cada BOM (`product_qty`), así que el resultado es
+    por unidad del producto terminado. No se convierten unidades de medida.
+
+    Returns:
+        {sku: [{"sku": sku_hoja, "quantity": cantidad}, ...]}. Un SKU sin BOM
+        es su propia hoja; un SKU inexistente devuelve []. Las hojas sin
+        `default_code` se identifican por su id de producto.
+
+    Raises:
+        BomCycleError: si las BOMs forman un ciclo.
+    """
+    skus = list(dict.fromkeys(skus))
+    found = api.execute_kw(
+        "product.product",
+        "search_read",
+        [[("default_code", "in", skus)]],
+        {"fields": ["id", "default_code"]},
+    )
+    root_by_sku = {}
+    for product in found:
+        root_by_sku.setdefault(product["default_code"], product["id"])
+
+    structure = {}
+    code_by_id = {}
+    seen = set()
+    frontier = sorted(set(root_by_sku.values()))
+    while frontier:
+        seen.update(frontier)
+        products, boms, lines_by_id = _load_bom_level(api, frontier)
+        next_frontier = set()
+        for product in products:
+            code_by_id[product["id"]] = product["default_code"] or product["id"]
+            bom = _select_bom(product, boms)
+            if not bom:
+                continue
+            bom_qty = bom.get("product_qty") or 1.0
+            lines = []
+            for line_id in bom["bom_line_ids"]:
+                line = lines_by_id.get(line_id)
+                if not line or not line["product_id"]:
+                    continue
+                component_id = line["product_id"][0]
+                lines.append((component_id, line["product_qty"] / bom_qty))
+                if component_id not in seen:
+                    next_frontier.add(component_id)
+            structure[product["id"]] = lines
+        frontier = sorted(next_frontier)
+
+    exploded = explode_structure(structure, root_by_sku.values())
+    result = {}
+    for sku in skus:
+        root = root_by_sku.get(sku)
+        if root is None:
+            result[sku] = []
+            continue
+        result[sku] = [
+            {"sku": code_by_id.get(leaf, leaf), "quantity": qty}
+            for leaf, qty in exploded[root].items()
+        ]
+    return result
@@ -11,8 +11,8 @@ from datetime import datetime
 
 
 class OdooJournal(OdooAPI):
-    def __init__(self, db=None, url=None, username=None, password=None):
-        super().__init__(db=db, url=url, username=username, password=password)
+    def __init__(self, db=None, url=None, username=None, password=None, **kwargs):
+        super().__init__(db=db, url=url, username=username, password=password, **kwargs)
 
 #CRUD
 
@@ -5,8 +5,8 @@ from models.partner_models import Partner
 
 
 class OdooPartner(OdooAPI):
-    def __init__(self, db=None, url=None, username=None, password=None):
-        super().__init__(db=db, url=url, username=username, password=password)
+    def __init__(self, db=None, url=None, username=None, password=None, **kwargs):
+        super().__init__(db=db, url=url, username=username, password=password, **kwargs)
 
     def add_partner(
         self,
@@ -1,16 +1,20 @@
 from .api import OdooAPI
+from .bom import explode_boms, load_bom_snapshot
 import pandas as pd
 import time
 import xmlrpc.client
 from pprint import pprint
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import csv
 import logging
 from typing import Literal, List
 
+logger = logging.getLogger(__name__)
 
 class OdooProduct(OdooAPI):
-    def __init__(self, db=None, url=None, username=None, password=None):
-        super().__init__(db=db, url=url, username=username, password=password)
+    def __init__(self, db=None, url=None, username=None, password=None, **kwargs):
+        super().__init__(db=db, url=url, username=username, password=password, **kwargs)
 
     # CRUD
     def create_product(self, product_data):
@@ -138,71 +142,157 @@ class OdooProduct(OdooAPI):
         else:
             return f"No se encontró el producto con ID {product_id}."
 
-    def read_all_products_in_dataframe(self, batch_size=100):
-        offset = 0
-        all_products = []
-        columns_to_drop = [
-            "image_variant_1920",
-            "image_variant_1024",
-            "image_variant_512",
-            "image_variant_256",
-            "image_variant_128",
-            "can_image_variant_1024_be_zoomed",
-            "image_1920",
-            "image_1024",
-            "image_512",
-            "image_256",
-            "image_128",
-            "can_image_1024_be_zoomed",
-            "website_product_name",
-            "website_description",
-            "website_short_description	website_seo_metatitle",
-            "website_seo_description",
-        ]
+    # Columnas pesadas o irrelevantes que nunca se piden al leer el catálogo
+    CATALOG_EXCLUDED_FIELDS = [
+        "image_variant_1920",
+        "image_variant_1024",
+        "image_variant_512",
+        "image_variant_256",
+        "image_variant_128",
+        "can_image_variant_1024_be_zoomed",
+        "image_1920",
+        "image_1024",
+        "image_512",
+        "image_256",
+        "image_128",
+        "can_image_1024_be_zoomed",
+        "website_product_name",
+        "website_description",
+        "website_short_description",
+        "website_seo_metatitle",
+        "website_seo_description",
+    ]
 
-        while True:
-            try:
-                # Obtener IDs de productos en lotes con dominio vacío
-                product_ids = self.models.execute_kw(
-                    self.db,
-                    self.uid,
-                    self.password,
-                    "product.product",
-                    "search",
-                    [[]],
-                    {"offset": offset, "limit": batch_size},
-                )
+    def read_all_products_in_dataframe(self, batch_size=100):
+        """
+        Lee todo el catálogo de `product.product` en un DataFrame.
 
-                if not product_ids:
-                    break
+        Sólo se piden los campos de `catalog_fields()` (sin binarios ni imágenes).
+        Para catálogos grandes conviene `iter_products`, que entrega el
+        resultado por bloques.
 
-                # Obtener detalles de los productos
-                products = self.models.execute_kw(
-                    self.db,
-                    self.uid,
-                    self.password,
-                    "product.product",
-                    "read",
-                    [product_ids],
-                )
-                all_products.extend(products)
-
-                offset += batch_size
+        Errores: un `xmlrpc.client.ProtocolError` se reintenta hasta 3 veces
+        por página y luego se propaga; cualquier otro error (p. ej. un
+        `xmlrpc.client.Fault`) se propaga de inmediato. Antes los errores de
+        protocolo se reintentaban sin límite y los demás se imprimían y se
+        devolvían las filas leídas hasta ese momento: quien dependa de
+        recibir siempre un DataFrame debe capturar la excepción.
+        """
+        chunks = list(self.iter_products(page_size=batch_size))
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat(chunks, ignore_index=True)
 
-            except xmlrpc.client.ProtocolError as e:
-                print(f"Error: {e}. Reintentando en 5 segundos...")
-                time.sleep(5)
-            except Exception as e:
-                print(f"Error inesperado: {e}")
-                break
+    def catalog_fields(self):
+        """
+        Campos de `product.product` que se leen al exportar el catálogo: todos
+        menos los binarios (imágenes, adjuntos) y `CATALOG_EXCLUDED_FIELDS`.
+        """
+        return list(self._catalog_field_types())
 
-        # Convertir a DataFrame
-        df_products = pd.DataFrame(all_products)
+    def _catalog_field_types(self):
+        fields = self.models.execute_kw(
+            self.db,
+            self.uid,
+            self.password,
+            "product.product",
+            "fields_get",
+            [],
+            {"attributes": ["type"]},
+        )
+        excluded = set(self.CATALOG_EXCLUDED_FIELDS)
+        return {
+            name: attributes.get("type")
+            for name, attributes in fields.items()
+            if attributes.get("type") != "binary" and name not in excluded
+        }
 
-        # Eliminar las columnas innecesarias si existen
-        df_products = df_products.drop(columns=columns_to_drop, errors="ignore")
+    @staticmethod
+    def _arrow_record(record, field_types):
+        # Odoo devuelve False para cualquier campo vacío y [id, nombre] para los
+        # many2one; Arrow necesita columnas de un solo tipo.
+        row = {}
+        for name, value in record.items():
+            field_type = field_types.get(name)
+            if field_type == "many2one":
+                value = value[0] if value else None
+            elif value is False and field_type != "boolean":
+                value = None
+            row[name] = value
+        return row
+
+    def iter_products(self, page_size=500, fields=None, domain=None, max_workers=4, as_arrow=False, retries=3):
+        """
+        Recorre el catálogo de productos por páginas, sin cargarlo entero en memoria.
+
+        Los ids se buscan una sola vez; las páginas se leen en paralelo con a lo
+        sumo `max_workers` lecturas en curso y se entregan en orden. La memoria
+        máxima queda acotada por `page_size * max_workers` filas, no por el
+        tamaño del catálogo.
+
+        :param page_size: Productos por página
+        :param fields: Campos a leer; por defecto `catalog_fields()`
+        :param domain: Dominio de búsqueda; por defecto todo el catálogo
+        :param max_workers: Lecturas de página simultáneas
+        :param as_arrow: Si es True entrega `pyarrow.RecordBatch` en vez de DataFrames
+            (los many2one quedan como id y los vacíos como null)
+        :param retries: Reintentos por página ante errores de protocolo
+        :return: Generador de DataFrames (o RecordBatches) de hasta `page_size` filas
+        """
+        if as_arrow:
+            try:
+                import pyarrow as pa
+            except ImportError as e:
+                raise ImportError(
+                    "iter_products(as_arrow=True) requiere pyarrow: pip install 'odoo-api[arrow]'"
+                ) from e
+
+        field_types = self._catalog_field_types() if (as_arrow or not fields) else {}
+        fields = fields or list(field_types)
+        product_ids = self.models.execute_kw(
+            self.db,
+            self.uid,
+            self.password,
+            "product.product",
+            "search",
+            [domain or []],
+            {"order": "id"},
+        )
+        pages = [
+            product_ids[start : start + page_size]
+            for start in range(0, len(product_ids), page_size)
+        ]
 
-        return df_products if not df_products.empty else pd.DataFrame()
+        def read_page(ids):
+            for attempt in range(retries + 1):
+                try:
+                    return self.execute_kw(
+                        "product.product", "read", [ids], {"fields": fields}
+                    )
+                except xmlrpc.client.ProtocolError as e:
+                    if attempt == retries:
+                        raise
+                    logger.warning(
+                        "Error leyendo página de productos: %s. Reintento %d/%d en 5 segundos...",
+                        e, attempt + 1, retries,
+                    )
+                    time.sleep(5)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = deque()
+            next_page = 0
+            while next_page < len(pages) or in_flight:
+                # Mantener a lo sumo `max_workers` páginas pedidas y no consumidas
+                while next_page < len(pages) and len(in_flight) < max_workers:
+                    in_flight.append(executor.submit(read_page, pages[next_page]))
+                    next_page += 1
+                records = in_flight.popleft().result()
+                if as_arrow:
+                    yield pa.RecordBatch.from_pylist(
+                        [self._arrow_record(record, field_types) for record in records]
+                    )
+                else:
+                    yield pd.DataFrame.from_records(records)
 
     def read_all_bills_of_materials_in_dataframe(self):
         """
@@ -883,118 +973,35 @@ class OdooProduct(OdooAPI):
         """
         Obtiene los componentes de BOM para cada SKU de manera independiente.
 
+        Todos los SKUs se resuelven con un número constante de llamadas (ver
+        `odoo_api.bom.load_bom_snapshot`) en vez de 5 llamadas por SKU.
+
         :param skus: Lista de SKUs de productos
         :return: Diccionario donde cada clave es un SKU y el valor es una lista de componentes con sus cantidades
         """
-        components_result = {}
-
-        for sku in skus:
-            try:
-                # 1. Buscar el ID del producto por SKU
-                product_result = self.get_id_by_sku(sku)
-
-                if not product_result or product_result.get("status") != "success":
-                    components_result[sku] = []
-                    continue
-
-                product_id = product_result.get("product_id")
-                if not product_id:
-                    components_result[sku] = []
-                    continue
-
-                # 2. Buscar la BOM del producto
-                bom_ids = self.models.execute_kw(
-                    self.db,
-                    self.uid,
-                    self.password,
-                    "mrp.bom",
-                    "search",
-                    [
-                        [
-                            "|",
-                            ["product_id", "=", product_id],
-                            ["product_tmpl_id.product_variant_ids", "=", product_id],
-                        ]
-                    ],
-                    {"limit": 1},
-                )
-
-                if not bom_ids:
-                    components_result[sku] = []
-                    continue
-
-                bom_id = bom_ids[0]
-
-                # 3. Leer las líneas de la BOM
-                bom_data = self.models.execute_kw(
-                    self.db,
-                    self.uid,
-                    self.password,
-                    "mrp.bom",
-                    "read",
-                    [bom_id],
-                    {"fields": ["bom_line_ids"]},
-                )
-
-                if not bom_data or not bom_data[0]["bom_line_ids"]:
-                    components_result[sku] = []
-                    continue
-
-                component_line_ids = bom_data[0]["bom_line_ids"]
-
-                # 4. Obtener información de las líneas de componentes
-                lines_data = self.models.execute_kw(
-                    self.db,
-                    self.uid,
-                    self.password,
-                    "mrp.bom.line",
-                    "read",
-                    [component_line_ids],
-                    {"fields": ["product_id", "product_qty"]},
-                )
-
-                if not lines_data:
-                    components_result[sku] = []
-                    continue
-
-                component_product_ids = [line["product_id"][0] for line in lines_data]
-
-                # 5. Obtener los SKUs de los componentes
-                components_data = self.models.execute_kw(
-                    self.db,
-                    self.uid,
-                    self.password,
-                    "product.product",
-                    "read",
-                    [component_product_ids],
-                    {"fields": ["id", "default_code", "display_name"]},
-                )
-
-                # Crear mapeo de product_id a SKU
-                product_id_to_sku = {
-                    component["id"]: component["default_code"]
-                    for component in components_data
-                }
-
-                # 6. Crear lista de componentes con SKU y cantidad
-                component_list = []
-                for line in lines_data:
-                    product_id_component = line["product_id"][0]
-                    sku_component = product_id_to_sku.get(product_id_component)
-                    qty_component = line["product_qty"]
-
-                    if sku_component:
-                        component_list.append(
-                            {"sku": sku_component, "quantity": qty_component}
-                        )
+        if not skus:
+            return {}
+        try:
+            snapshot = load_bom_snapshot(self, skus)
+        except Exception as e:
+            print(f"Error obteniendo componentes de BOM: {e}")
+            return {sku: [] for sku in skus}
+        return {sku: snapshot.components(sku) for sku in skus}
 
-                components_result[sku] = component_list
+    def explode_boms(self, skus: List[str]):
+        """
+        Explota las BOMs de cada SKU hasta sus componentes hoja (materias primas).
 
-            except Exception as e:
-                print(f"Error procesando SKU {sku}: {e}")
-                components_result[sku] = []
+        A diferencia de `get_bom_components`, los subensambles con BOM propia se
+        expanden recursivamente y las cantidades se multiplican por nivel.
 
-        return components_result
+        :param skus: Lista de SKUs de productos terminados
+        :return: Diccionario {sku: [{"sku": sku_hoja, "quantity": cantidad por unidad}]}
+        :raises BomCycleError: si las BOMs forman un ciclo
+        """
+        if not skus:
+            return {}
+        return explode_boms(self, skus)
 
     def get_bom_id_by_product_id(self, product_id):
         """
@@ -1968,10 +1975,13 @@ class OdooProduct(OdooAPI):
         )
         return production_order_confirmation_data
 
-    def get_active_skus(self) -> set[str]:
+    def get_active_skus(self, page_size: int = 5000) -> set[str]:
         """
         Get a set of all active product SKUs (default_code).
 
+        Args:
+            page_size: Records per keyset page
+
         Returns:
             Set of active product SKUs (default_code values)
         """
@@ -1982,35 +1992,29 @@ class OdooProduct(OdooAPI):
                 ("default_code", "!=", False),  # Exclude products without SKU
             ]
 
-            # Search and read only the default_code field
-            products = self.models.execute_kw(
-                self.db,
-                self.uid,
-                self.password,
-                "product.product",
-                "search_read",
-                [domain],
-                {"fields": ["default_code"]},
-            )
-
-            # Extract SKUs and filter out None values
-            skus = {
-                product["default_code"]
-                for product in products
-                if product.get("default_code")
-            }
+            # Read only the default_code field, paging by id
+            skus = set()
+            for page in self.iter_search_read(
+                "product.product", domain, fields=["default_code"], page_size=page_size
+            ):
+                skus.update(
+                    product["default_code"]
+                    for product in page
+                    if product.get("default_code")
+                )
 
             return skus
 
         except Exception as e:
             raise RuntimeError(f"Failed to retrieve active SKUs: {str(e)}") from e
 
-    def read_products_for_embeddings(self, domain: list = None) -> pd.DataFrame:
+    def read_products_for_embeddings(self, domain: list = None, batch_size: int = 1000) -> pd.DataFrame:
         """
         Read products from Odoo with text preparation for embeddings.
 
         Args:
             domain: Odoo domain filter for products search. If None, fetches all products.
+            batch_size: Records per keyset page
 
         Returns:
             DataFrame containing product data with text_for_embedding column
@@ -2045,30 +2049,12 @@ class OdooProduct(OdooAPI):
                 "write_date",  # Last write date
             ]
 
-            # Search products with the domain
-            product_ids = self.models.execute_kw(
-                self.db, self.uid, self.password, "product.product", "search", [domain]
-            )
-
-            if not product_ids:
-                return pd.DataFrame()
-
-            # Read product data in batches to handle large datasets
-            batch_size = 100
+            # Read products paging by id (keyset)
             all_products = []
-
-            for i in range(0, len(product_ids), batch_size):
-                batch_ids = product_ids[i : i + batch_size]
-                batch_products = self.models.execute_kw(
-                    self.db,
-                    self.uid,
-                    self.password,
-                    "product.product",
-                    "read",
-                    [batch_ids],
-                    {"fields": fields},
-                )
-                all_products.extend(batch_products)
+            for page in self.iter_search_read(
+                "product.product", domain, fields=fields, page_size=batch_size
+            ):
+                all_products.extend(page)
 
             # Convert to DataFrame
             df = pd.DataFrame(all_products)
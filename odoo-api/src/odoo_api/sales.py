@@ -8,8 +8,8 @@ class OdooSales(OdooAPI):
     Clase para manejar operaciones relacionadas con ventas en Odoo.
     Refactored to handle data fetching and preparation in one place.
     """
-    def __init__(self, db=None, url=None, username=None, password=None) -> None:
-        super().__init__(db=db, url=url, username=username, password=password)
+    def __init__(self, db=None, url=None, username=None, password=None, **kwargs) -> None:
+        super().__init__(db=db, url=url, username=username, password=password, **kwargs)
         self._user_timezone = None
 
     def get_user_timezone(self) -> str:
@@ -10,8 +10,8 @@ class OdooSupply(OdooAPI):
     conversión a Órdenes de Compra en Odoo.
     """
 
-    def __init__(self, db=None, url=None, username=None, password=None):
-        super().__init__(db=db, url=url, username=username, password=password)
+    def __init__(self, db=None, url=None, username=None, password=None, **kwargs):
+        super().__init__(db=db, url=url, username=username, password=password, **kwargs)
 
     # --------------------------- helpers --------------------------- #
     def _ensure_vendor(self, vendor_id: int) -> Dict[str, Any]:
@@ -0,0 +1,235 @@
+"""Transporte XML-RPC con keep-alive y pool de conexiones.
+
+`xmlrpc.client.Transport` cachea una sola conexión y no es seguro entre hilos,
+así que cada `ServerProxy` nuevo (o cada hilo que lo comparte) termina pagando
+un handshake TCP+TLS. `PooledTransport` mantiene un pool acotado de conexiones
+HTTP/1.1 persistentes por host, reutilizable desde varios hilos, con timeout
+configurable por transporte y sobreescribible por llamada.
+
+Reintentos: una conexión del pool que el servidor ya cerró se descarta antes
+de usarla, y una llamada se reintenta (una vez, con conexión nueva) sólo si
+falló antes de terminar de enviar la petición. Si la conexión se corta
+después del envío, el servidor pudo haberla procesado: reintentar un
+`create`/`write` podría duplicarlo, así que el error se propaga.
+"""
+
+import http.client
+import select
+import threading
+import xmlrpc.client as xc
+from contextlib import contextmanager
+
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_POOL_SIZE = 8
+
+# Errores que indican que el servidor cerró una conexión keep-alive inactiva.
+# Sólo se reintenta si ocurren mientras se envía la petición: entonces no llegó
+# completa al servidor y no pudo procesarse.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+class PoolTimeoutError(TimeoutError):
+    """No se liberó ninguna conexión del pool dentro del tiempo de espera."""
+
+
+class PooledTransport(xc.Transport):
+    """Transporte XML-RPC con un pool acotado de conexiones persistentes.
+
+    Args:
+        use_https: Si es True, abre conexiones `HTTPSConnection`.
+        pool_size: Máximo de conexiones abiertas simultáneamente por host.
+        timeout: Timeout de socket (segundos) por defecto para cada llamada.
+        pool_timeout: Segundos a esperar por una conexión libre antes de
+            lanzar `PoolTimeoutError`. None espera indefinidamente.
+        context: `ssl.SSLContext` opcional para HTTPS.
+    """
+
+    def __init__(
+        self,
+        use_https=False,
+        pool_size=DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        pool_timeout=None,
+        context=None,
+        use_datetime=False,
+        use_builtin_types=False,
+    ):
+        super().__init__(use_datetime=use_datetime, use_builtin_types=use_builtin_types)
+        if pool_size < 1:
+            raise ValueError("pool_size debe ser >= 1")
+        self.use_https = use_https
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pool_timeout = pool_timeout
+        self.context = context
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._idle = {}
+        self._local = threading.local()
+        # parse_response lo consulta; Transport sólo lo fija dentro de single_request.
+        self.verbose = False
+        # Contador de conexiones abiertas, útil para medir la reutilización.
+        self.connections_opened = 0
+
+    # ------------------------
+    # Timeout por llamada
+    # ------------------------
+    @contextmanager
+    def call_timeout(self, seconds):
+        """Sobreescribe el timeout para las llamadas hechas en este hilo.
+
+        Ejemplo:
+            with transport.call_timeout(5):
+                models.execute_kw(...)
+        """
+        previous = getattr(self._local, "timeout", None)
+        self._local.timeout = seconds
+        try:
+            yield
+        finally:
+            self._local.timeout = previous
+
+    def _effective_timeout(self):
+        override = getattr(self._local, "timeout", None)
+        return override if override is not None else self.timeout
+
+    # ------------------------
+    # Pool
+    # ------------------------
+    def _new_connection(self, host):
+        chost, _, x509 = self.get_host_info(host)
+        if self.use_https:
+            connection = http.client.HTTPSConnection(
+                chost, timeout=self.timeout, context=self.context, **(x509 or {})
+            )
+        else:
+            connection = http.client.HTTPConnection(chost, timeout=self.timeout)
+        with self._lock:
+            self.connections_opened += 1
+        return connection
+
+    def _checkout(self, host):
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise PoolTimeoutError(
+                f"No hay conexiones libres hacia {host} tras {self.pool_timeout}s"
+            )
+        with self._lock:
+            idle = self._idle.get(host)
+            connection = idle.pop() if idle else None
+        if connection is not None and _is_dropped(connection):
+            connection.close()
+            connection = None
+        if connection is None:
+            connection = self._new_connection(host)
+        timeout = self._effective_timeout()
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection
+
+    def _checkin(self, host, connection, reusable):
+        try:
+            if reusable:
+                with self._lock:
+                    self._idle.setdefault(host, []).append(connection)
+            else:
+                connection.close()
+        finally:
+            self._slots.release()
+
+    # ------------------------
+    # API de xmlrpc.client.Transport
+    # ------------------------
+    def request(self, host, handler, request_body, verbose=False):
+        for attempt in (0, 1):
+            connection = self._checkout(host)
+            reused = connection.sock is not None
+            sent = False
+            try:
+                self._send_request(connection, host, handler, request_body, verbose)
+                sent = True
+                result, reusable = self._read_response(connection, host, handler)
+            except _STALE_CONNECTION_ERRORS:
+                self._checkin(host, connection, reusable=False)
+                # Sólo se reintenta si la conexión venía del pool (un fallo en
+                # una conexión recién abierta es un error real) y la petición
+                # no terminó de enviarse (si no, pudo ejecutarse en Odoo).
+                if attempt == 0 and reused and not sent:
+                    continue
+                raise
+            except xc.Fault:
+                # Un Fault es una respuesta HTTP completa (error normal de Odoo):
+                # la conexión sigue sirviendo salvo que el servidor la cerrara.
+                self._checkin(host, connection, reusable=connection.sock is not None)
+                raise
+            except BaseException:
+                self._checkin(host, connection, reusable=False)
+                raise
+            self._checkin(host, connection, reusable=reusable)
+            return result
+
+    def _send_request(self, connection, host, handler, request_body, verbose):
+        if verbose:
+            connection.set_debuglevel(1)
+        # Los headers extra (auth básica embebida en la URL) se calculan por
+        # llamada: guardarlos en la instancia, como hace Transport, no es
+        # seguro cuando varios hilos comparten el transporte.
+        _, extra_headers, _ = self.get_host_info(host)
+        headers = self._headers + (extra_headers or []) + [
+            ("Content-Type", "text/xml"),
+            ("User-Agent", self.user_agent),
+        ]
+        connection.putrequest("POST", handler, skip_accept_encoding=True)
+        self.send_headers(connection, headers)
+        self.send_content(connection, request_body)
+
+    def _read_response(self, connection, host, handler):
+        response = connection.getresponse()
+        if response.status == 200:
+            result = self.parse_response(response)
+            return result, not response.will_close
+        # Vaciar el cuerpo para poder reutilizar o cerrar la conexión limpiamente.
+        response.read()
+        raise xc.ProtocolError(
+            host + handler, response.status, response.reason, dict(response.getheaders())
+        )
+
+    def close(self):
+        """Cierra todas las conexiones inactivas del pool."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+def _is_dropped(connection):
+    """True si el servidor cerró la conexión inactiva (el socket ya es legible).
+
+    Una conexión keep-alive sana no tiene nada que leer entre peticiones; si el
+    socket es legible, el servidor envió EOF (o basura) y no sirve reutilizarla.
+    """
+    sock = connection.sock
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def make_transport(url, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, pool_timeout=None):
+    """Crea un `PooledTransport` adecuado al esquema de `url`."""
+    return PooledTransport(
+        use_https=url.lower().startswith("https://"),
+        pool_size=pool_size,
+        timeout=timeout,
+        pool_timeout=pool_timeout,
+    )
@@ -1,12 +1,13 @@
 from .api import OdooAPI
+from .bom import load_bom_snapshot
 import pandas as pd
 from pprint import pprint
 from typing import List, Tuple
 from config_manager import secrets
 
 class OdooWarehouse(OdooAPI):
-    def __init__(self, db=None, url=None, username=None, password=None):
-        super().__init__(db=db, url=url, username=username, password=password)
+    def __init__(self, db=None, url=None, username=None, password=None, **kwargs):
+        super().__init__(db=db, url=url, username=username, password=password, **kwargs)
 
     def get_stock_by_sku(self, sku):
         """
@@ -229,66 +230,55 @@ class OdooWarehouse(OdooAPI):
         Procesa múltiples SKUs en modo batch.
         """
         try:
-            # 1. Buscar los IDs de los productos para todos los SKUs
-            product_ids = self.models.execute_kw(
-                self.db, self.uid, self.password,
-                'product.product', 'search',
-                [[['default_code', 'in', skus]]]
+            # Todas las lecturas van en un lote de 3 niveles (3 round trips):
+            #   1. productos + bodegas
+            #   2. UoMs, atributos de variante y quants de esos productos
+            #   3. ubicaciones de esos quants
+            batch = self.batch()
+            products_ref = batch.add(
+                'product.product', 'search_read',
+                [[['default_code', 'in', skus]]],
+                {'fields': ['id', 'name', 'default_code', 'product_template_attribute_value_ids', 'uom_id']}
             )
-            
-            if not product_ids:
-                return {sku: {"found": False, "uom": None} for sku in skus}
-            
-            # 2. Leer la información de todos los productos encontrados
-            products = self.models.execute_kw(
-                self.db, self.uid, self.password,
-                'product.product', 'read',
-                [product_ids], {'fields': ['id', 'name', 'default_code', 'product_template_attribute_value_ids', 'uom_id']}
+            warehouses_ref = batch.add(
+                'stock.warehouse', 'search_read',
+                [[]], {'fields': ['id', 'name', 'lot_stock_id']}
             )
-            product_dict = {p['default_code']: p for p in products}
-            
-            # 3. Obtener información de UOM para todos los productos en una sola llamada
-            uom_ids = list(set([p['uom_id'][0] for p in products if p['uom_id']]))
-            uom_dict = {}
-            if uom_ids:
-                uom_data = self.models.execute_kw(
-                    self.db, self.uid, self.password,
-                    'uom.uom', 'read',
-                    [uom_ids], {'fields': ['id', 'name']}
-                )
-                uom_dict = {uom['id']: uom['name'] for uom in uom_data}
-            
-            # 4. Buscar los stock quants para todos los productos encontrados
-            stock_quants = self.models.execute_kw(
-                self.db, self.uid, self.password,
+            product_ids_ref = products_ref.map(lambda products: [p['id'] for p in products])
+            uoms_ref = batch.add(
+                'uom.uom', 'read',
+                [products_ref.map(lambda products: sorted({p['uom_id'][0] for p in products if p['uom_id']}))],
+                {'fields': ['id', 'name']}
+            )
+            # Los atributos se leen una sola vez para todos los productos
+            attributes_ref = batch.add(
+                'product.template.attribute.value', 'read',
+                [products_ref.map(lambda products: sorted({
+                    attr_id for p in products for attr_id in p['product_template_attribute_value_ids']
+                }))],
+                {'fields': ['name']}
+            )
+            quants_ref = batch.add(
                 'stock.quant', 'search_read',
-                [[['product_id', 'in', product_ids]]],
+                [[['product_id', 'in', product_ids_ref]]],
                 {'fields': ['product_id', 'quantity', 'location_id', 'reserved_quantity']}
             )
-            
-            # 5. Obtener información de ubicaciones que tienen quants
-            location_ids = list(set([quant['location_id'][0] for quant in stock_quants]))
-            
-            if location_ids:
-                all_locations = self.models.execute_kw(
-                    self.db, self.uid, self.password,
-                    'stock.location', 'search_read',
-                    [[['id', 'in', location_ids]]],
-                    {'fields': ['id', 'name', 'usage', 'location_id']}
-                )
-            else:
-                all_locations = []
-            
-            # 6. Obtener información de bodegas
-            warehouse_ids = self.models.execute_kw(
-                self.db, self.uid, self.password, 
-                'stock.warehouse', 'search', [[]]
-            )
-            warehouses = self.models.execute_kw(
-                self.db, self.uid, self.password,
-                'stock.warehouse', 'read', 
-                [warehouse_ids, ['id', 'name', 'lot_stock_id']]
+            locations_ref = batch.add(
+                'stock.location', 'search_read',
+                [[['id', 'in', quants_ref.map(lambda quants: sorted({q['location_id'][0] for q in quants}))]]],
+                {'fields': ['id', 'name', 'usage', 'location_id']}
             )
+            batch.execute()
+
+            products = products_ref.result()
+            if not products:
+                return {sku: {"found": False, "uom": None} for sku in skus}
+            product_dict = {p['default_code']: p for p in products}
+            uom_dict = {uom['id']: uom['name'] for uom in uoms_ref.result()}
+            attribute_dict = {attr['id']: attr['name'] for attr in attributes_ref.result()}
+            stock_quants = quants_ref.result()
+            all_locations = locations_ref.result()
+            warehouses = warehouses_ref.result()
             
             # Crear diccionarios para mapear
             warehouse_dict = {warehouse['lot_stock_id'][0]: warehouse['name'] for warehouse in warehouses}
@@ -322,14 +312,11 @@ class OdooWarehouse(OdooAPI):
                     uom_name = uom_dict.get(product['uom_id'][0])
                 
                 # Obtener atributos de variante si existen
-                attribute_values = []
-                if product['product_template_attribute_value_ids']:
-                    attribute_value_data = self.models.execute_kw(
-                        self.db, self.uid, self.password,
-                        'product.template.attribute.value', 'read',
-                        [product['product_template_attribute_value_ids']], {'fields': ['name']}
-                    )
-                    attribute_values = [attr['name'] for attr in attribute_value_data]
+                attribute_values = [
+                    attribute_dict[attr_id]
+                    for attr_id in product['product_template_attribute_value_ids']
+                    if attr_id in attribute_dict
+                ]
                 
                 # Construir nombre completo del producto con atributos
                 if attribute_values:
@@ -412,149 +399,122 @@ class OdooWarehouse(OdooAPI):
         except Exception as e:
             return {"error": str(e)}
 
-    def read_stock_by_location(self):
-        # Obtener todas las ubicaciones que son del tipo 'Ubicación interna' en una sola llamada
-        locations = self.models.execute_kw(self.db, self.uid, self.password,
-            'stock.location', 'search_read', [[['usage', '=', 'internal']]], {'fields': ['id', 'name', 'location_id']})
-        # Obtener todas las bodegas
-        warehouse_ids = self.models.execute_kw(self.db, self.uid, self.password, 'stock.warehouse', 'search', [[]])
-        warehouses = self.models.execute_kw(self.db, self.uid, self.password,
-            'stock.warehouse', 'read', [warehouse_ids, ['id', 'name', 'lot_stock_id']])
-        # Crear un diccionario para mapear ubicaciones raíz (lot_stock_id) a bodegas
-        warehouse_dict = {warehouse['lot_stock_id'][0]: warehouse['name'] for warehouse in warehouses}
-        # Consultar los inventarios por SKU para cada ubicación en una sola llamada
-        inventory_data = []
-        location_ids = [location['id'] for location in locations]  # Extraer todos los IDs de las ubicaciones
-        # Obtener todos los stock quants en una sola llamada para todas las ubicaciones
-        stock_quants = self.models.execute_kw(self.db, self.uid, self.password,
-            'stock.quant', 'search_read', [[['location_id', 'in', location_ids]]], 
-            {'fields': ['product_id', 'quantity', 'location_id']})
-
-        # Extraer los product_ids para hacer una sola llamada a 'product.product'
-        product_ids = list(set([stock_quant['product_id'][0] for stock_quant in stock_quants]))
-
-        # Obtener todos los productos en una sola llamada
-        products = self.models.execute_kw(self.db, self.uid, self.password,
-            'product.product', 'read', [product_ids, ['default_code', 'name', 'product_template_attribute_value_ids', 'product_tag_ids']])
-
-        # Crear un diccionario para mapear product_id a sus datos
-        product_dict = {product['id']: product for product in products}
-
-        # Obtener los tags de los productos en una sola llamada
-        all_tag_ids = list(set([tag_id for product in products for tag_id in product['product_tag_ids']]))
-        tag_dict = {}
-        if all_tag_ids:
-            tags = self.models.execute_kw(self.db, self.uid, self.password,
-                'product.tag', 'read', [all_tag_ids, ['name']])
-            tag_dict = {tag['id']: tag['name'] for tag in tags}
+    STOCK_BY_LOCATION_COLUMNS = ['warehouse', 'location', 'product_id', 'internal_reference', 'quantity', 'tags']
 
-        # Procesar los stock quants y formar los datos finales
-        for stock_quant in stock_quants:
-            product_data = product_dict[stock_quant['product_id'][0]]
-            product_name_with_attributes = product_data['name']
+    def read_stock_by_location(self, chunk_size=5000):
+        """
+        Stock de todas las ubicaciones internas, una fila por quant.
 
-            # Obtener los atributos de la variante si existen
-            attribute_values = []
-            if product_data['product_template_attribute_value_ids']:
-                attribute_value_data = self.models.execute_kw(self.db, self.uid, self.password,
-                    'product.template.attribute.value', 'read', [product_data['product_template_attribute_value_ids'], ['name']])
-                attribute_values = [attr['name'] for attr in attribute_value_data]
+        Returns:
+            DataFrame con columnas warehouse, location, product_id (nombre con
+            variante), internal_reference, quantity y tags.
+        """
+        chunks = list(self.iter_stock_by_location(chunk_size=chunk_size))
+        if not chunks:
+            return pd.DataFrame(columns=self.STOCK_BY_LOCATION_COLUMNS)
+        return pd.concat(chunks, ignore_index=True)
 
-            if attribute_values:
-                product_name_with_attributes += ' - ' + ', '.join(attribute_values)
+    def iter_stock_by_location(self, chunk_size=5000):
+        """
+        Igual que `read_stock_by_location`, pero entrega el resultado en DataFrames
+        de hasta `chunk_size` filas para que la memoria no crezca con el tamaño de
+        la bodega.
 
-            # Obtener los tags del producto
-            product_tags = [tag_dict.get(tag_id, '') for tag_id in product_data['product_tag_ids']]
+        Los quants se leen con `search_read` paginado por id (`iter_search_read`):
+        un quant que Odoo elimina durante el recorrido (fusión, limpieza de
+        cantidades en cero) simplemente no aparece, en vez de hacer fallar la
+        lectura del bloque. Productos, atributos de variante y tags se piden una
+        sola vez (sólo los que aún no se han visto), así que el número de
+        llamadas depende del número de bloques y no del de quants.
+        """
+        # Ubicaciones internas y bodegas (un round trip)
+        batch = self.batch()
+        locations_ref = batch.add('stock.location', 'search_read',
+            [[['usage', '=', 'internal']]], {'fields': ['id', 'name', 'location_id']})
+        warehouses_ref = batch.add('stock.warehouse', 'search_read',
+            [[]], {'fields': ['id', 'name', 'lot_stock_id']})
+        batch.execute()
 
-            # Obtener el nombre de la ubicación
-            location_data = next((loc for loc in locations if loc['id'] == stock_quant['location_id'][0]), None)
-            location_name = location_data['name'] if location_data else ''
+        # Mapear ubicaciones raíz (lot_stock_id) a bodegas
+        warehouse_dict = {warehouse['lot_stock_id'][0]: warehouse['name'] for warehouse in warehouses_ref.result()}
 
-            # Obtener el nombre completo de la bodega solo si la ubicación no es la raíz de la bodega
-            parent_location_id = location_data['location_id'][0] if location_data and location_data['location_id'] else None
+        # Nombre de bodega y nombre completo de cada ubicación, calculados una vez
+        location_names = {}
+        for location in locations_ref.result():
+            location_name = location['name']
+            parent_location_id = location['location_id'][0] if location['location_id'] else None
             warehouse_name = warehouse_dict.get(parent_location_id, '')
-
             # Si la ubicación es "Stock" pero pertenece a una jerarquía mayor (como "FV/Stock"), construimos el nombre completo
             if location_name == 'Stock' and parent_location_id:
-                location_name = location_data['location_id'][1] + '/' + location_name
-
+                location_name = location['location_id'][1] + '/' + location_name
             # Evitar agregar el nombre de la bodega si ya está presente en la ubicación
             if warehouse_name and not location_name.startswith(warehouse_name):
                 full_location_name = f"{warehouse_name}/{location_name}"
             else:
                 full_location_name = location_name
+            location_names[location['id']] = (warehouse_name, full_location_name)
 
-            # Agregar los datos al inventario
-            inventory_data.append({
-                'warehouse': warehouse_name,  # Nombre de la bodega
-                'location': full_location_name,  # Nombre completo de la ubicación
-                'product_id': product_name_with_attributes,  # Nombre del producto con la variante
-                'internal_reference': product_data.get('default_code', ''),  # Referencia interna
-                'quantity': stock_quant['quantity'],
-                'tags': ', '.join(product_tags)  # Nombres de los tags
-            })
+        if not location_names:
+            return
 
-        # Convertir a DataFrame para un manejo más sencillo
-        df_inventory = pd.DataFrame(inventory_data)
+        # product_id -> (nombre con atributos, default_code, tags)
+        product_cache = {}
+        for quants in self.iter_search_read('stock.quant',
+                [['location_id', 'in', list(location_names)]],
+                fields=['product_id', 'quantity', 'location_id'], page_size=chunk_size):
+            batch = self.batch()
+            products_ref = batch.add('product.product', 'read',
+                [sorted({q['product_id'][0] for q in quants} - product_cache.keys())],
+                {'fields': ['default_code', 'name', 'product_template_attribute_value_ids', 'product_tag_ids']})
+            attributes_ref = batch.add('product.template.attribute.value', 'read',
+                [products_ref.map(lambda products: sorted(
+                    {attr_id for p in products for attr_id in p['product_template_attribute_value_ids']}))],
+                {'fields': ['name']})
+            tags_ref = batch.add('product.tag', 'read',
+                [products_ref.map(lambda products: sorted(
+                    {tag_id for p in products for tag_id in p['product_tag_ids']}))],
+                {'fields': ['name']})
+            batch.execute()
 
-        return df_inventory
-    
-    def get_max_production_quantity(self, skus: List[str]):
-        """Retorna la cantidad máxima de producción que se puede hacer de un producto, a partir del stock de los componentes"""
-        from odoo_api import OdooProduct
-        odoo_product = OdooProduct(
-            db=self.db,
-            url=self.url,
-            username=self.username,
-            password=self.password,
-        )
+            attribute_dict = {attr['id']: attr['name'] for attr in attributes_ref.result()}
+            tag_dict = {tag['id']: tag['name'] for tag in tags_ref.result()}
+            for product in products_ref.result():
+                name = product['name']
+                attribute_values = [attribute_dict[a] for a in product['product_template_attribute_value_ids'] if a in attribute_dict]
+                if attribute_values:
+                    name += ' - ' + ', '.join(attribute_values)
+                tags = ', '.join(tag_dict.get(tag_id, '') for tag_id in product['product_tag_ids'])
+                product_cache[product['id']] = (name, product.get('default_code', ''), tags)
 
-        class BomItem:
-            def __init__(self, sku: str, quantity: int, stock: int):
-                self.sku = sku
-                self.quantity = quantity
-                self.stock = stock
-                # Evitar división por cero y manejar cantidades inválidas
-                if quantity <= 0:
-                    self.max_quantity = 0.0
-                else:
-                    self.max_quantity = stock / quantity
-            
-            def __str__(self):
-                return f"BomItem(sku={self.sku}, quantity={self.quantity}, stock={self.stock}, max_quantity={self.max_quantity})"
+            # Construir el DataFrame por columnas
+            columns = {column: [] for column in self.STOCK_BY_LOCATION_COLUMNS}
+            for stock_quant in quants:
+                name, default_code, tags = product_cache[stock_quant['product_id'][0]]
+                warehouse_name, full_location_name = location_names.get(stock_quant['location_id'][0], ('', ''))
+                columns['warehouse'].append(warehouse_name)
+                columns['location'].append(full_location_name)
+                columns['product_id'].append(name)
+                columns['internal_reference'].append(default_code)
+                columns['quantity'].append(stock_quant['quantity'])
+                columns['tags'].append(tags)
+            yield pd.DataFrame(columns, columns=self.STOCK_BY_LOCATION_COLUMNS)
 
-        product_bom_components = odoo_product.get_bom_components(skus)
-        max_quantities = {}
-        for sku, components in product_bom_components.items():
-            bom_items = []
-            
-            # Verificar si hay componentes para este SKU
-            if not components or len(components) == 0:
-                # print(f"⚠️ Producto {sku} no tiene componentes de BOM o no se encontró BOM")
-                max_quantities[sku] = 0.0
-                continue
-            
-            for component in components:
-                component_sku = component['sku']
-                component_quantity = component['quantity']
-                
-                # Obtener stock del componente
-                stock_info = self.get_stock_by_sku(component_sku)
-                component_stock = stock_info.get('qty_available', 0) if stock_info else 0
-                
-                bom_items.append(BomItem(component_sku, component_quantity, component_stock))
-            
-            # Verificar si se crearon items de BOM válidos
-            if not bom_items:
-                # print(f"⚠️ No se pudieron crear items de BOM para el producto {sku}")
-                max_quantities[sku] = 0.0
-                continue
-            
-            # Calcular la cantidad máxima basada en el componente limitante
-            max_quantity = min(bom_items, key=lambda x: x.max_quantity).max_quantity
-            max_quantities[sku] = max_quantity
+    def get_max_production_quantity(self, skus: List[str]):
+        """Retorna la cantidad máxima de producción que se puede hacer de un producto, a partir del stock de los componentes.
 
-        return max_quantities
+        SKUs, BOMs, líneas y stock de componentes se cargan en bloque con un
+        número constante de llamadas, y el componente limitante de todos los
+        SKUs se calcula en una sola pasada con NumPy. Un SKU sin BOM o sin
+        componentes da 0.0.
+        """
+        if not skus:
+            return {}
+        try:
+            snapshot = load_bom_snapshot(self, skus, with_stock=True)
+        except Exception as e:
+            print(f"Error calculando la cantidad máxima de producción: {e}")
+            return {sku: 0.0 for sku in skus}
+        return snapshot.max_production_quantities(skus)
 
 if __name__ == "__main__":
     warehouse_api = OdooWarehouse(
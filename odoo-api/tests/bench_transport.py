@@ -0,0 +1,60 @@
+"""Compara el transporte estándar de xmlrpc contra PooledTransport.
+
+Uso:
+    python tests/bench_transport.py [n_llamadas] [hilos]
+
+Levanta un StubOdoo local y mide llamadas/segundo y conexiones TCP abiertas
+con ambos transportes, en serie y con varios hilos.
+"""
+
+import sys
+import time
+import xmlrpc.client as xc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from odoo_api.transport import PooledTransport  # noqa: E402
+from stub_odoo import StubOdoo  # noqa: E402
+
+
+def run(stub, make_proxy, calls, threads):
+    stub.reset_counters()
+
+    def call(proxy):
+        proxy.execute_kw(stub.DB, stub.UID, stub.PASSWORD, "product.product", "search", [[]], {})
+
+    start = time.perf_counter()
+    if threads == 1:
+        proxy = make_proxy()
+        for _ in range(calls):
+            call(proxy)
+    else:
+        # xmlrpc.client.Transport no es seguro entre hilos: un proxy por llamada.
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: call(make_proxy()), range(calls)))
+    elapsed = time.perf_counter() - start
+    return calls / elapsed, stub.connections
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    data = {"product.product": [{"id": i, "default_code": f"SKU{i}"} for i in range(1, 11)]}
+    with StubOdoo(data) as stub:
+        url = f"{stub.url}/xmlrpc/2/object"
+        pooled = PooledTransport(pool_size=threads)
+        cases = {
+            "xmlrpc.Transport": lambda: xc.ServerProxy(url),
+            "PooledTransport": lambda: xc.ServerProxy(url, transport=pooled),
+        }
+        for n_threads in (1, threads):
+            for name, make_proxy in cases.items():
+                rate, connections = run(stub, make_proxy, calls, n_threads)
+                print(f"{name:18s} hilos={n_threads:<3d} {rate:9.0f} llamadas/s  conexiones={connections}")
+
+
+if __name__ == "__main__":
+    main()
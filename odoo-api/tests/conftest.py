@@ -0,0 +1,10 @@
+import sys
+from pathlib import Path
+
+# Add the project's src directory to sys.path for imports
+ROOT = Path(__file__).resolve().parents[1]  # Points to odoo-api/
+SRC = ROOT / "src"
+TESTS = ROOT / "tests"
+for path in (SRC, TESTS):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
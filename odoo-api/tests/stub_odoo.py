@@ -0,0 +1,383 @@
+"""Servidor XML-RPC local que imita lo mínimo de Odoo para tests sin red.
+
+Expone `/xmlrpc/2/common` (authenticate) y `/xmlrpc/2/object` (execute_kw)
+sobre un almacén en memoria. Soporta `search`, `read`, `search_read`,
+`search_count` y `fields_get` con dominios simples (incluidos `|`, `&`, `!`
+y rutas con punto sobre many2one / x2many), y cuenta conexiones TCP y
+llamadas RPC para poder medir reutilización y número de round trips.
+"""
+
+import socketserver
+import threading
+import time
+from collections import Counter
+from xmlrpc.server import MultiPathXMLRPCServer, SimpleXMLRPCDispatcher, SimpleXMLRPCRequestHandler
+
+
+class _KeepAliveHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = "HTTP/1.1"
+    rpc_paths = ("/xmlrpc/2/common", "/xmlrpc/2/object")
+
+    def setup(self):
+        super().setup()
+        self.server.stub._on_connection()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadedServer(socketserver.ThreadingMixIn, MultiPathXMLRPCServer):
+    daemon_threads = True
+
+
+class StubOdoo:
+    """Odoo falso en memoria.
+
+    Args:
+        data: {modelo: [registros]}; cada registro es un dict con `id`.
+        relations: {modelo: {campo: modelo_relacionado}} para los many2one y
+            x2many. Los many2one se guardan como id y se devuelven como
+            `[id, display_name]`; los x2many se guardan como lista de ids.
+        latency: Segundos de espera artificial por llamada RPC.
+    """
+
+    DB = "stub"
+    USER = "admin"
+    PASSWORD = "admin"
+    UID = 2
+
+    def __init__(self, data=None, relations=None, latency=0.0):
+        self.data = {model: {rec["id"]: dict(rec) for rec in records} for model, records in (data or {}).items()}
+        self.relations = relations or {}
+        self.latency = latency
+        self.calls = Counter()
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    # ------------------------
+    # Ciclo de vida
+    # ------------------------
+    def start(self):
+        server = _ThreadedServer(("127.0.0.1", 0), requestHandler=_KeepAliveHandler, allow_none=True, logRequests=False)
+        server.stub = self
+        common = SimpleXMLRPCDispatcher(allow_none=True)
+        common.register_function(self._authenticate, "authenticate")
+        common.register_function(lambda: {"server_version": "stub"}, "version")
+        obj = SimpleXMLRPCDispatcher(allow_none=True)
+        obj.register_function(self._execute_kw, "execute_kw")
+        server.add_dispatcher("/xmlrpc/2/common", common)
+        server.add_dispatcher("/xmlrpc/2/object", obj)
+        self._server = server
+        self._thread = threading.Thread(target=server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def credentials(self):
+        return {"db": self.DB, "url": self.url, "username": self.USER, "password": self.PASSWORD}
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.connections = 0
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def _on_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    # ------------------------
+    # RPC
+    # ------------------------
+    def _authenticate(self, db, login, password, context):
+        if (db, login, password) == (self.DB, self.USER, self.PASSWORD):
+            return self.UID
+        return False
+
+    def _execute_kw(self, db, uid, password, model, method, args=None, kwargs=None):
+        args = list(args or [])
+        kwargs = dict(kwargs or {})
+        with self._lock:
+            self.calls[(model, method)] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if method == "sleep":
+            time.sleep(args[0])
+            return True
+        handler = getattr(self, f"_m_{method}", None)
+        if handler is None:
+            raise ValueError(f"Método no soportado por el stub: {method}")
+        return handler(model, *args, **kwargs)
+
+    def _m_search(self, model, domain, offset=0, limit=None, order=None, count=False, context=None):
+        records = [rec for rec in self._records(model) if self._match(model, rec, domain)]
+        records = self._order(records, order)
+        if count:
+            return len(records)
+        records = records[offset:]
+        if limit:
+            records = records[:limit]
+        return [rec["id"] for rec in records]
+
+    def _m_search_count(self, model, domain, context=None):
+        return self._m_search(model, domain, count=True)
+
+    def _m_read(self, model, ids, fields=None, context=None):
+        if isinstance(ids, int):
+            ids = [ids]
+        table = self.data.get(model, {})
+        missing = [i for i in ids if i not in table]
+        if missing:
+            # Como Odoo: leer un registro eliminado lanza MissingError
+            raise ValueError(f"MissingError: {model}{tuple(missing)} no existe")
+        return [self._render(model, table[i], fields) for i in ids]
+
+    def _m_search_read(self, model, domain=None, fields=None, offset=0, limit=None, order=None, context=None):
+        ids = self._m_search(model, domain or [], offset=offset, limit=limit, order=order)
+        return self._m_read(model, ids, fields)
+
+    def _m_fields_get(self, model, *args, attributes=None, context=None):
+        samples = {}
+        for rec in self._records(model):
+            for name, value in rec.items():
+                if value is not False or name not in samples:
+                    samples[name] = value
+        rel = self.relations.get(model, {})
+        result = {}
+        for name, sample in sorted(samples.items()):
+            if name in rel:
+                field_type = "many2many" if isinstance(sample, list) else "many2one"
+            elif name.startswith("image_"):
+                field_type = "binary"
+            elif isinstance(sample, bool):
+                field_type = "boolean"
+            elif isinstance(sample, int):
+                field_type = "integer"
+            elif isinstance(sample, float):
+                field_type = "float"
+            else:
+                field_type = "char"
+            result[name] = {"type": field_type, "string": name}
+        return result
+
+    # ------------------------
+    # Helpers
+    # ------------------------
+    def _records(self, model):
+        return list(self.data.get(model, {}).values())
+
+    @staticmethod
+    def _order(records, order):
+        if not order:
+            return sorted(records, key=lambda r: r["id"])
+        for part in reversed([p.strip() for p in order.split(",")]):
+            name, _, direction = part.partition(" ")
+            records = sorted(records, key=lambda r: r.get(name) or 0, reverse=direction.lower() == "desc")
+        return records
+
+    def _render(self, model, rec, fields):
+        rel = self.relations.get(model, {})
+        out = {"id": rec["id"]}
+        for name in fields or rec.keys():
+            if name == "id":
+                continue
+            value = rec.get(name, False)
+            target = rel.get(name)
+            if target and not isinstance(value, list):
+                if value:
+                    ref = self.data.get(target, {}).get(value, {})
+                    value = [value, ref.get("display_name") or ref.get("name") or str(value)]
+                else:
+                    value = False
+            out[name] = value
+        return out
+
+    def _values(self, model, rec, path):
+        """Devuelve la lista de valores alcanzados siguiendo `path` (con puntos)."""
+        head, _, rest = path.partition(".")
+        value = rec.get(head, False)
+        if not rest:
+            return value if isinstance(value, list) else [value]
+        target = self.relations.get(model, {}).get(head)
+        ids = value if isinstance(value, list) else ([value] if value else [])
+        out = []
+        for rid in ids:
+            sub = self.data.get(target, {}).get(rid)
+            if sub is not None:
+                out.extend(self._values(target, sub, rest))
+        return out
+
+    def _leaf(self, model, rec, leaf):
+        path, op, value = leaf
+        values = self._values(model, rec, path)
+        if op == "=":
+            return value in values if value is not False else (not values or values == [False])
+        if op == "!=":
+            return value not in values if value is not False else any(v not in (False, None) for v in values)
+        if op == "in":
+            return any(v in value for v in values)
+        if op == "not in":
+            return not any(v in value for v in values)
+        comparable = [v for v in values if v not in (False, None)]
+        if op == ">":
+            return any(v > value for v in comparable)
+        if op == ">=":
+            return any(v >= value for v in comparable)
+        if op == "<":
+            return any(v < value for v in comparable)
+        if op == "<=":
+            return any(v <= value for v in comparable)
+        if op in ("ilike", "like"):
+            needle = str(value).lower()
+            return any(needle in str(v).lower() for v in comparable)
+        raise ValueError(f"Operador no soportado por el stub: {op}")
+
+    def _match(self, model, rec, domain):
+        # Evaluación en notación polaca, igual que Odoo: se recorre al revés.
+        stack = []
+        for token in reversed(list(domain or [])):
+            if token == "|":
+                a, b = stack.pop(), stack.pop()
+                stack.append(a or b)
+            elif token == "&":
+                a, b = stack.pop(), stack.pop()
+                stack.append(a and b)
+            elif token == "!":
+                stack.append(not stack.pop())
+            else:
+                stack.append(self._leaf(model, rec, token))
+        return all(stack)
+
+
+CATALOG_RELATIONS = {
+    "product.product": {
+        "product_tmpl_id": "product.template",
+        "uom_id": "uom.uom",
+        "product_template_attribute_value_ids": "product.template.attribute.value",
+        "product_tag_ids": "product.tag",
+        "categ_id": "product.category",
+    },
+    "product.template": {"product_variant_ids": "product.product", "uom_id": "uom.uom"},
+    "mrp.bom": {
+        "product_id": "product.product",
+        "product_tmpl_id": "product.template",
+        "bom_line_ids": "mrp.bom.line",
+    },
+    "mrp.bom.line": {"bom_id": "mrp.bom", "product_id": "product.product"},
+    "stock.quant": {"product_id": "product.product", "location_id": "stock.location"},
+    "stock.location": {"location_id": "stock.location"},
+    "stock.warehouse": {"lot_stock_id": "stock.location"},
+}
+
+
+def make_catalog(n_finished=4, components_per_bom=3, n_components=None):
+    """Genera un catálogo de fabricación determinista para el stub.
+
+    - `n_finished` productos terminados `FG0001...`, cada uno con una BOM de
+      `components_per_bom` líneas. Las BOM de los pares están ligadas a la
+      plantilla y las de los impares a la variante.
+    - `n_components` componentes `C0001...` compartidos entre BOMs (por
+      defecto la mitad de los terminados, mínimo `components_per_bom`).
+    - Stock en una ubicación interna (`WH/Stock`) y ruido en una ubicación de
+      clientes que no debe contarse como disponible.
+    - El último terminado no tiene BOM y hay un componente sin stock.
+
+    Returns:
+        (data, relations) listos para `StubOdoo(data, relations)`.
+    """
+    if n_components is None:
+        n_components = max(components_per_bom, n_finished // 2)
+    data = {
+        "uom.uom": [{"id": 1, "name": "Unidades"}, {"id": 2, "name": "kg"}],
+        "product.template.attribute.value": [{"id": 1, "name": "Rojo"}, {"id": 2, "name": "500ml"}],
+        "product.tag": [{"id": 1, "name": "Destacado"}],
+        "product.category": [{"id": 1, "name": "All"}],
+        "stock.location": [
+            {"id": 1, "name": "WH", "usage": "view", "location_id": False},
+            {"id": 2, "name": "Stock", "usage": "internal", "location_id": 1},
+            {"id": 3, "name": "Customers", "usage": "customer", "location_id": False},
+        ],
+        "stock.warehouse": [{"id": 1, "name": "WH", "lot_stock_id": 2}],
+        "product.template": [],
+        "product.product": [],
+        "mrp.bom": [],
+        "mrp.bom.line": [],
+        "stock.quant": [],
+    }
+    products = data["product.product"]
+    templates = data["product.template"]
+
+    def add_product(sku, name, **extra):
+        pid = len(products) + 1
+        templates.append({"id": pid, "name": name, "product_variant_ids": [pid], "uom_id": 1})
+        products.append({
+            "id": pid,
+            "default_code": sku,
+            "name": name,
+            "display_name": f"[{sku}] {name}",
+            "product_tmpl_id": pid,
+            "uom_id": 1,
+            "product_template_attribute_value_ids": [],
+            "product_tag_ids": [],
+            "categ_id": 1,
+            "active": True,
+            "sale_ok": True,
+            "list_price": float(pid),
+            **extra,
+        })
+        return pid
+
+    component_ids = []
+    for i in range(1, n_components + 1):
+        attrs = [1, 2] if i % 2 else []
+        pid = add_product(f"C{i:04d}", f"Componente {i}", product_template_attribute_value_ids=attrs,
+                          uom_id=2 if i % 3 == 0 else 1)
+        component_ids.append(pid)
+        if i == n_components:
+            continue  # componente sin stock
+        data["stock.quant"].append({"id": len(data["stock.quant"]) + 1, "product_id": pid, "location_id": 2,
+                                    "quantity": float(10 * i), "reserved_quantity": float(i % 4)})
+        data["stock.quant"].append({"id": len(data["stock.quant"]) + 1, "product_id": pid, "location_id": 3,
+                                    "quantity": 5.0, "reserved_quantity": 0.0})
+
+    for i in range(1, n_finished + 1):
+        pid = add_product(f"FG{i:04d}", f"Terminado {i}")
+        if i == n_finished:
+            continue  # terminado sin BOM
+        bom_id = len(data["mrp.bom"]) + 1
+        line_ids = []
+        for j in range(components_per_bom):
+            line_id = len(data["mrp.bom.line"]) + 1
+            component = component_ids[(i + j) % n_components]
+            data["mrp.bom.line"].append({"id": line_id, "bom_id": bom_id, "product_id": component,
+                                         "product_qty": float(j + 1)})
+            line_ids.append(line_id)
+        data["mrp.bom"].append({
+            "id": bom_id,
+            "product_id": pid if i % 2 else False,
+            "product_tmpl_id": pid,
+            "bom_line_ids": line_ids,
+            "product_qty": 1.0,
+        })
+    return data, CATALOG_RELATIONS
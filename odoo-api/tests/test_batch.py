@@ -0,0 +1,112 @@
+import pytest
+
+from odoo_api import OdooProduct, OdooWarehouse
+from odoo_api.api import OdooAPI
+from stub_odoo import StubOdoo, make_catalog
+
+
+@pytest.fixture
+def stub():
+    data, relations = make_catalog(n_finished=6, components_per_bom=3)
+    with StubOdoo(data, relations) as server:
+        yield server
+
+
+def test_batch_resolves_dependencies_by_level(stub):
+    api = OdooAPI(**stub.credentials())
+    batch = api.batch()
+    products = batch.add("product.product", "search_read",
+                         [[("default_code", "in", ["C0001", "C0003"])]], {"fields": ["uom_id"]})
+    uoms = batch.add("uom.uom", "read",
+                     [products.map(lambda ps: sorted({p["uom_id"][0] for p in ps}))], {"fields": ["name"]})
+    tags = batch.add("product.tag", "search_read", [[]], {"fields": ["name"]})
+    results = batch.execute()
+
+    assert [p["id"] for p in products.result()] == [1, 3]
+    assert [u["name"] for u in uoms.result()] == ["Unidades", "kg"]
+    assert results[2] == tags.result() == [{"id": 1, "name": "Destacado"}]
+    assert batch.round_trips == 2
+
+
+def test_batch_skips_calls_with_empty_dependencies(stub):
+    api = OdooAPI(**stub.credentials())
+    batch = api.batch()
+    ids = batch.add("product.product", "search", [[("default_code", "=", "NOPE")]])
+    records = batch.add("product.product", "read", [ids])
+    batch.execute()
+    assert records.result() == []
+    assert stub.calls[("product.product", "read")] == 0
+
+
+def test_batch_propagates_errors(stub):
+    api = OdooAPI(**stub.credentials())
+    batch = api.batch()
+    batch.add("product.product", "no_such_method")
+    with pytest.raises(Exception):
+        batch.execute()
+
+
+def test_batch_keeps_completed_calls_when_one_fails(stub):
+    api = OdooAPI(**stub.credentials())
+    batch = api.batch()
+    ids = batch.add("product.product", "search", [[("default_code", "=", "C0001")]])
+    failing = batch.add("product.product", "no_such_method")
+    with pytest.raises(Exception):
+        batch.execute()
+
+    # La llamada que terminó en el mismo nivel queda registrada
+    assert ids.result() == [1]
+    with pytest.raises(RuntimeError):
+        failing.result()
+    # Reejecutar sólo reenvía la que falló
+    with pytest.raises(Exception):
+        batch.execute()
+    assert stub.calls[("product.product", "search")] == 1
+    assert stub.calls[("product.product", "no_such_method")] == 2
+
+
+def _legacy_bom_components(api, skus):
+    """Resultado esperado calculado con llamadas sueltas, como la versión anterior."""
+    result = {}
+    for sku in skus:
+        found = api.execute_kw("product.product", "search_read", [[("default_code", "=", sku)]], {"fields": ["id"]})
+        if not found:
+            result[sku] = []
+            continue
+        pid = found[0]["id"]
+        bom_ids = api.execute_kw("mrp.bom", "search", [["|", ["product_id", "=", pid],
+                                  ["product_tmpl_id.product_variant_ids", "=", pid]]], {"limit": 1})
+        if not bom_ids:
+            result[sku] = []
+            continue
+        line_ids = api.execute_kw("mrp.bom", "read", [bom_ids[0]], {"fields": ["bom_line_ids"]})[0]["bom_line_ids"]
+        lines = api.execute_kw("mrp.bom.line", "read", [line_ids], {"fields": ["product_id", "product_qty"]})
+        skus_by_id = {p["id"]: p["default_code"] for p in api.execute_kw(
+            "product.product", "read", [[l["product_id"][0] for l in lines]], {"fields": ["default_code"]})}
+        result[sku] = [{"sku": skus_by_id[l["product_id"][0]], "quantity": l["product_qty"]} for l in lines]
+    return result
+
+
+def test_get_bom_components_matches_per_sku_lookup(stub):
+    product = OdooProduct(**stub.credentials())
+    skus = [f"FG{i:04d}" for i in range(1, 7)] + ["MISSING"]
+    expected = _legacy_bom_components(product, skus)
+    stub.reset_counters()
+
+    assert product.get_bom_components(skus) == expected
+    # productos; BOMs + líneas; componentes
+    assert stub.total_calls == 4
+
+
+def test_get_stock_multiple_skus_matches_single_sku(stub):
+    warehouse = OdooWarehouse(**stub.credentials())
+    skus = ["C0001", "C0002", "C0003", "FG0001", "MISSING"]
+    expected = {sku: warehouse.get_stock_by_sku(sku) for sku in skus}
+    stub.reset_counters()
+
+    result = warehouse.get_stock_by_sku(skus)
+
+    assert result == expected
+    assert result["C0001"]["product_name"] == "Componente 1 - Rojo, 500ml"
+    assert result["C0001"]["qty_available"] == 9.0
+    assert stub.total_calls == 6
@@ -0,0 +1,147 @@
+import pytest
+
+from odoo_api import OdooProduct, OdooWarehouse
+from odoo_api.bom import BomCycleError, BomSnapshot, explode_structure
+from stub_odoo import StubOdoo, make_catalog
+
+
+def warehouse_credentials(api):
+    return {"db": api.db, "url": api.url, "username": api.username, "password": api.password}
+
+
+def _legacy_max_production(warehouse, skus):
+    """Cálculo de referencia: un get_stock_by_sku por componente, como la versión anterior."""
+    components = OdooProduct(**warehouse_credentials(warehouse)).get_bom_components(skus)
+    result = {}
+    for sku, lines in components.items():
+        ratios = []
+        for line in lines:
+            stock = warehouse.get_stock_by_sku(line["sku"]).get("qty_available", 0)
+            ratios.append(stock / line["quantity"] if line["quantity"] > 0 else 0.0)
+        result[sku] = min(ratios) if ratios else 0.0
+    return result
+
+
+@pytest.mark.parametrize("n_finished", [4, 40])
+def test_max_production_matches_per_component_lookup(n_finished):
+    data, relations = make_catalog(n_finished=n_finished, components_per_bom=3)
+    with StubOdoo(data, relations) as stub:
+        warehouse = OdooWarehouse(**stub.credentials())
+        skus = [f"FG{i:04d}" for i in range(1, n_finished + 1)] + ["MISSING"]
+        expected = _legacy_max_production(warehouse, skus)
+        stub.reset_counters()
+
+        result = warehouse.get_max_production_quantity(skus)
+
+        assert result == pytest.approx(expected)
+        assert result[f"FG{n_finished:04d}"] == 0.0  # sin BOM
+        assert result["MISSING"] == 0.0
+        assert stub.total_calls == 5
+
+
+def test_rpc_count_is_constant_in_number_of_skus():
+    data, relations = make_catalog(n_finished=400, components_per_bom=4)
+    with StubOdoo(data, relations) as stub:
+        warehouse = OdooWarehouse(**stub.credentials())
+        counts = []
+        for n in (4, 400):
+            stub.reset_counters()
+            warehouse.get_max_production_quantity([f"FG{i:04d}" for i in range(1, n + 1)])
+            counts.append(stub.total_calls)
+        assert counts == [5, 5]
+
+
+def test_limiting_component_edge_cases():
+    snapshot = BomSnapshot(
+        products_by_sku={},
+        bom_by_sku={
+            "A": {"bom_line_ids": [1, 2]},
+            "B": {"bom_line_ids": [3]},
+            "C": {"bom_line_ids": []},
+        },
+        lines_by_id={
+            1: {"id": 1, "product_id": [10, "x"], "product_qty": 2.0},
+            2: {"id": 2, "product_id": [11, "y"], "product_qty": 4.0},
+            3: {"id": 3, "product_id": [10, "x"], "product_qty": 0.0},
+        },
+        component_skus={10: "X", 11: "Y"},
+        stock_by_product={10: 9.0, 11: 10.0},
+    )
+    assert snapshot.max_production_quantities(["A", "B", "C", "D"]) == {
+        "A": 2.5, "B": 0.0, "C": 0.0, "D": 0.0,
+    }
+
+
+def _multilevel_catalog():
+    # FG1 = 2 x SUB + 1 x RAW1 ; SUB (BOM de 2 unidades) = 4 x RAW2 + 1 x RAW1 ;
+    # FG2 = 3 x SUB (plantilla)
+    names = ["FG1", "FG2", "SUB", "RAW1", "RAW2"]
+    data, relations = make_catalog(n_finished=0, components_per_bom=0, n_components=0)
+    for pid, sku in enumerate(names, start=1):
+        data["product.template"].append({"id": pid, "name": sku, "product_variant_ids": [pid]})
+        data["product.product"].append({"id": pid, "default_code": sku, "name": sku, "product_tmpl_id": pid})
+    boms = {1: (1, 1.0, [(3, 2.0), (4, 1.0)]), 2: (3, 2.0, [(5, 4.0), (4, 1.0)]), 3: (2, 1.0, [(3, 3.0)])}
+    for bom_id, (pid, bom_qty, lines) in boms.items():
+        line_ids = []
+        for component, qty in lines:
+            line_id = len(data["mrp.bom.line"]) + 1
+            data["mrp.bom.line"].append({"id": line_id, "bom_id": bom_id, "product_id": component, "product_qty": qty})
+            line_ids.append(line_id)
+        data["mrp.bom"].append({"id": bom_id, "product_id": pid if bom_id != 3 else False, "product_tmpl_id": pid,
+                                "product_qty": bom_qty, "bom_line_ids": line_ids})
+    return data, relations
+
+
+def test_explode_boms_multiplies_through_subassemblies():
+    data, relations = _multilevel_catalog()
+    with StubOdoo(data, relations) as stub:
+        product = OdooProduct(**stub.credentials())
+        result = product.explode_boms(["FG1", "FG2", "RAW1", "MISSING"])
+        as_dict = {sku: {c["sku"]: c["quantity"] for c in lines} for sku, lines in result.items()}
+        assert as_dict == {
+            "FG1": {"RAW2": 4.0, "RAW1": 2.0},
+            "FG2": {"RAW2": 6.0, "RAW1": 1.5},
+            "RAW1": {"RAW1": 1.0},
+            "MISSING": {},
+        }
+
+
+def test_variant_bom_takes_precedence_over_template_bom():
+    data, relations = _multilevel_catalog()
+    # La BOM 1 de FG1 pasa a ser de plantilla y una BOM posterior de la variante
+    # (sólo RAW1) debe ganar, como en odoo-engine.
+    data["mrp.bom"][0]["product_id"] = False
+    data["mrp.bom.line"].append({"id": 99, "bom_id": 4, "product_id": 4, "product_qty": 1.0})
+    data["mrp.bom"].append({"id": 4, "product_id": 1, "product_tmpl_id": 1, "product_qty": 1.0, "bom_line_ids": [99]})
+    with StubOdoo(data, relations) as stub:
+        product = OdooProduct(**stub.credentials())
+        result = product.explode_boms(["FG1"])
+        assert result["FG1"] == [{"sku": "RAW1", "quantity": 1.0}]
+        assert product.get_bom_components(["FG1"])["FG1"] == [{"sku": "RAW1", "quantity": 1.0}]
+
+
+def test_explode_boms_detects_cycles():
+    data, relations = _multilevel_catalog()
+    # RAW2 pasa a consumir FG1 -> ciclo FG1 -> SUB -> RAW2 -> FG1
+    data["mrp.bom.line"].append({"id": 99, "bom_id": 4, "product_id": 1, "product_qty": 1.0})
+    data["mrp.bom"].append({"id": 4, "product_id": 5, "product_tmpl_id": 5, "product_qty": 1.0, "bom_line_ids": [99]})
+    with StubOdoo(data, relations) as stub:
+        product = OdooProduct(**stub.credentials())
+        with pytest.raises(BomCycleError) as excinfo:
+            product.explode_boms(["FG1"])
+        assert excinfo.value.cycle == [1, 3, 5, 1]
+
+
+def test_explode_structure_memoizes_shared_subassemblies():
+    calls = []
+
+    class CountingStructure(dict):
+        def get(self, key, default=None):
+            calls.append(key)
+            return super().get(key, default)
+
+    structure = CountingStructure({f"FG{i}": [("SUB", 1.0)] for i in range(1000)})
+    structure["SUB"] = [("RAW", 2.0)]
+    exploded = explode_structure(structure, [f"FG{i}" for i in range(1000)])
+    assert exploded["FG999"] == {"RAW": 2.0}
+    assert calls.count("SUB") == 1
@@ -0,0 +1,26 @@
+from odoo_api import OdooProduct
+from stub_odoo import StubOdoo, make_catalog
+
+
+def test_iter_search_read_pages_by_id():
+    data, relations = make_catalog(n_finished=30, n_components=95)
+    data["product.product"][5]["active"] = False
+    with StubOdoo(data, relations) as stub:
+        product = OdooProduct(**stub.credentials())
+        pages = list(product.iter_search_read(
+            "product.product", [("active", "=", True)], fields=["default_code"], page_size=25))
+
+        ids = [r["id"] for page in pages for r in page]
+        assert ids == sorted(ids) and len(ids) == len(set(ids)) == 124
+        assert 6 not in ids
+        assert [len(p) for p in pages] == [25, 25, 25, 25, 24]
+
+
+def test_readers_use_keyset_pages():
+    data, relations = make_catalog(n_finished=10, n_components=40)
+    data["product.product"][0]["default_code"] = False
+    with StubOdoo(data, relations) as stub:
+        product = OdooProduct(**stub.credentials())
+        skus = product.get_active_skus(page_size=20)
+        assert len(skus) == 49 and "C0002" in skus
+        assert stub.calls[("product.product", "search_read")] == 3
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from odoo_api import OdooProduct
+from stub_odoo import StubOdoo, make_catalog
+
+
+@pytest.fixture
+def stub():
+    data, relations = make_catalog(n_finished=50, n_components=200)
+    for product in data["product.product"]:
+        product["image_1920"] = "iVBORw0KGgo" * 1000
+        product["website_description"] = "<p>html</p>"
+        product["barcode"] = False if product["id"] % 2 else f"780{product['id']:07d}"
+    with StubOdoo(data, relations) as server:
+        yield server
+
+
+def test_catalog_fields_exclude_binaries_and_blacklist(stub):
+    product = OdooProduct(**stub.credentials())
+    fields = product.catalog_fields()
+    assert "image_1920" not in fields
+    assert "website_description" not in fields
+    assert {"default_code", "name", "uom_id"} <= set(fields)
+
+
+def test_iter_products_yields_bounded_pages_in_order(stub):
+    product = OdooProduct(**stub.credentials())
+    chunks = list(product.iter_products(page_size=40, max_workers=3))
+
+    assert [len(chunk) for chunk in chunks] == [40] * 6 + [10]
+    df = pd.concat(chunks, ignore_index=True)
+    assert df["id"].tolist() == list(range(1, 251))
+    assert "image_1920" not in df.columns
+    assert stub.calls[("product.product", "search")] == 1
+    assert stub.calls[("product.product", "read")] == 7
+
+
+def test_read_all_products_in_dataframe(stub):
+    product = OdooProduct(**stub.credentials())
+    df = product.read_all_products_in_dataframe(batch_size=100)
+    assert len(df) == 250
+    assert df.loc[df["default_code"] == "C0001", "name"].item() == "Componente 1"
+    assert not {"image_1920", "website_description"} & set(df.columns)
+
+
+def test_iter_products_as_arrow(stub):
+    pytest.importorskip("pyarrow")
+    product = OdooProduct(**stub.credentials())
+    batches = list(product.iter_products(page_size=100, as_arrow=True))
+    assert sum(batch.num_rows for batch in batches) == 250
+    first = batches[0].to_pydict()
+    assert first["uom_id"][0] == 1
+    assert first["barcode"][0] is None
@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from odoo_api import OdooWarehouse
+from stub_odoo import StubOdoo, make_catalog
+
+
+def _legacy_stock_by_location(api):
+    """Versión anterior (una lectura de atributos por quant), como referencia."""
+    call = lambda *a: api.execute_kw(*a)  # noqa: E731
+    locations = call("stock.location", "search_read", [[["usage", "=", "internal"]]], {"fields": ["id", "name", "location_id"]})
+    warehouses = call("stock.warehouse", "search_read", [[]], {"fields": ["id", "name", "lot_stock_id"]})
+    warehouse_dict = {w["lot_stock_id"][0]: w["name"] for w in warehouses}
+    quants = call("stock.quant", "search_read", [[["location_id", "in", [l["id"] for l in locations]]]],
+                  {"fields": ["product_id", "quantity", "location_id"]})
+    products = {p["id"]: p for p in call("product.product", "read", [sorted({q["product_id"][0] for q in quants})],
+                {"fields": ["default_code", "name", "product_template_attribute_value_ids", "product_tag_ids"]})}
+    tags = {t["id"]: t["name"] for t in call("product.tag", "search_read", [[]], {"fields": ["name"]})}
+    rows = []
+    for q in quants:
+        p = products[q["product_id"][0]]
+        name = p["name"]
+        if p["product_template_attribute_value_ids"]:
+            attrs = call("product.template.attribute.value", "read", [p["product_template_attribute_value_ids"]], {"fields": ["name"]})
+            name += " - " + ", ".join(a["name"] for a in attrs)
+        loc = next(l for l in locations if l["id"] == q["location_id"][0])
+        parent = loc["location_id"][0] if loc["location_id"] else None
+        wh = warehouse_dict.get(parent, "")
+        loc_name = loc["name"]
+        if loc_name == "Stock" and parent:
+            loc_name = loc["location_id"][1] + "/" + loc_name
+        full = f"{wh}/{loc_name}" if wh and not loc_name.startswith(wh) else loc_name
+        rows.append({"warehouse": wh, "location": full, "product_id": name, "internal_reference": p["default_code"],
+                     "quantity": q["quantity"], "tags": ", ".join(tags.get(t, "") for t in p["product_tag_ids"])})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def stub():
+    data, relations = make_catalog(n_finished=4, n_components=300)
+    for product in data["product.product"][::7]:
+        product["product_tag_ids"] = [1]
+    with StubOdoo(data, relations) as server:
+        yield server
+
+
+def test_matches_previous_output(stub):
+    warehouse = OdooWarehouse(**stub.credentials())
+    expected = _legacy_stock_by_location(warehouse)
+    result = warehouse.read_stock_by_location(chunk_size=100)
+    pd.testing.assert_frame_equal(result, expected[OdooWarehouse.STOCK_BY_LOCATION_COLUMNS])
+
+
+def test_streams_chunks_without_per_quant_calls(stub):
+    warehouse = OdooWarehouse(**stub.credentials())
+    stub.reset_counters()
+    chunks = list(warehouse.iter_stock_by_location(chunk_size=100))
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 99]
+    # ubicaciones + bodegas, y por bloque un search_read de quants + 3 lecturas
+    assert stub.total_calls <= 2 + 4 * len(chunks)
+    assert stub.calls[("stock.quant", "read")] == 0
+    assert stub.calls[("product.template.attribute.value", "read")] <= len(chunks)
+
+
+def test_quants_removed_during_stream_are_skipped(stub):
+    warehouse = OdooWarehouse(**stub.credentials())
+    quants = stub.data["stock.quant"]
+    chunks = warehouse.iter_stock_by_location(chunk_size=100)
+    first = next(chunks)
+    # Odoo fusiona/elimina quants mientras se recorre el resto
+    removed = [qid for qid, q in quants.items() if q["location_id"] == 2][150:160]
+    for quant_id in removed:
+        del quants[quant_id]
+    rest = list(chunks)
+
+    assert len(first) + sum(len(chunk) for chunk in rest) == 299 - len(removed)
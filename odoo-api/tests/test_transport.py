@@ -0,0 +1,181 @@
+import http.client
+import socket
+import threading
+import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from odoo_api import OdooWarehouse
+from odoo_api.api import OdooAPI
+from odoo_api import transport as transport_module
+from odoo_api.transport import PooledTransport, PoolTimeoutError
+from stub_odoo import StubOdoo
+
+
+@pytest.fixture
+def stub():
+    data = {
+        "product.product": [
+            {"id": i, "default_code": f"SKU{i:03d}", "name": f"Producto {i}"}
+            for i in range(1, 21)
+        ],
+    }
+    with StubOdoo(data) as server:
+        yield server
+
+
+def test_sequential_calls_reuse_one_connection(stub):
+    api = OdooAPI(**stub.credentials())
+    for _ in range(50):
+        api.execute_kw("product.product", "search", [[]])
+    # authenticate + 50 llamadas sobre una sola conexión keep-alive
+    assert stub.connections == 1
+    assert api.transport.connections_opened == 1
+    api.close()
+
+
+def test_concurrent_calls_are_bounded_by_pool_size(stub):
+    api = OdooAPI(**stub.credentials(), pool_size=4)
+    expected = api.execute_kw("product.product", "search", [[]])
+
+    def call(_):
+        return api.execute_kw("product.product", "search", [[]])
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(call, range(200)))
+
+    assert all(r == expected for r in results)
+    assert api.transport.connections_opened <= 4
+    assert stub.connections <= 4
+
+
+def test_per_call_timeout(stub):
+    api = OdooAPI(**stub.credentials(), timeout=30)
+    with pytest.raises(socket.timeout):
+        api.execute_kw("product.product", "sleep", [0.5], timeout=0.05)
+    # El timeout sólo aplica a esa llamada y el pool sigue operativo.
+    assert api.execute_kw("product.product", "search", [[("id", "=", 1)]]) == [1]
+
+
+def test_pool_timeout_when_exhausted(stub):
+    transport = PooledTransport(pool_size=1, pool_timeout=0.05)
+    api = OdooAPI(**stub.credentials(), transport=transport)
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        api.execute_kw("product.product", "sleep", [0.5])
+
+    worker = threading.Thread(target=slow)
+    worker.start()
+    started.wait()
+    try:
+        with pytest.raises(PoolTimeoutError):
+            # Esperar a que el hilo lento tenga la única conexión.
+            for _ in range(50):
+                api.execute_kw("product.product", "search", [[]])
+    finally:
+        worker.join()
+
+
+def test_stale_connection_is_retried(stub):
+    api = OdooAPI(**stub.credentials())
+    api.execute_kw("product.product", "search", [[]])
+    # Simular que el servidor cerró la conexión inactiva.
+    for connections in api.transport._idle.values():
+        for connection in connections:
+            connection.sock.shutdown(socket.SHUT_RDWR)
+    assert api.execute_kw("product.product", "search", [[("id", "=", 2)]]) == [2]
+
+
+def test_failure_while_sending_is_retried(stub, monkeypatch):
+    api = OdooAPI(**stub.credentials())
+    api.execute_kw("product.product", "search", [[]])
+    # Conexión cortada que el chequeo previo no detecta: falla al enviar.
+    monkeypatch.setattr(transport_module, "_is_dropped", lambda connection: False)
+    for connections in api.transport._idle.values():
+        for connection in connections:
+            connection.sock.shutdown(socket.SHUT_RDWR)
+    assert api.execute_kw("product.product", "search", [[("id", "=", 2)]]) == [2]
+    assert stub.calls[("product.product", "search")] == 2
+
+
+class _DropAfterFirstServer:
+    """Responde la primera petición (keep-alive) y corta la conexión tras leer la segunda."""
+
+    RESPONSE = xmlrpc.client.dumps((True,), methodresponse=True).encode()
+
+    def __init__(self):
+        self.requests = 0
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        host, port = self._listener.getsockname()
+        return f"http://{host}:{port}/xmlrpc/2/object"
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            with conn, conn.makefile("rb") as stream:
+                while True:
+                    length = 0
+                    line = stream.readline()
+                    if not line:
+                        break
+                    while line not in (b"\r\n", b""):
+                        name, _, value = line.decode().partition(":")
+                        if name.lower() == "content-length":
+                            length = int(value)
+                        line = stream.readline()
+                    stream.read(length)
+                    self.requests += 1
+                    if self.requests > 1:
+                        break
+                    conn.sendall(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: text/xml\r\n"
+                        b"Content-Length: %d\r\n\r\n%s" % (len(self.RESPONSE), self.RESPONSE)
+                    )
+
+    def close(self):
+        self._listener.close()
+
+
+def test_failure_after_sending_is_not_retried():
+    server = _DropAfterFirstServer()
+    proxy = xmlrpc.client.ServerProxy(server.url, transport=PooledTransport())
+    try:
+        assert proxy.execute_kw() is True
+        # El servidor recibió la petición y cortó: pudo haberla ejecutado,
+        # así que no se reenvía (un create se duplicaría).
+        with pytest.raises(http.client.RemoteDisconnected):
+            proxy.execute_kw()
+        assert server.requests == 2
+    finally:
+        server.close()
+
+
+def test_fault_keeps_connection_in_pool(stub):
+    api = OdooAPI(**stub.credentials())
+    with pytest.raises(xmlrpc.client.Fault):
+        api.execute_kw("product.product", "no_existe", [])
+    assert api.execute_kw("product.product", "search", [[("id", "=", 3)]]) == [3]
+    # El Fault no descartó la conexión keep-alive.
+    assert api.transport.connections_opened == 1
+    assert stub.connections == 1
+
+
+def test_subclasses_share_the_pool(stub):
+    with OdooWarehouse(**stub.credentials()) as warehouse:
+        ids = warehouse.models.execute_kw(
+            warehouse.db, warehouse.uid, warehouse.password,
+            "product.product", "search", [[("default_code", "=", "SKU005")]],
+        )
+        assert ids == [5]
+        assert warehouse.transport.connections_opened == 1
@@ -0,0 +1,5 @@
+from odoo_engine.db_client.embedding_search import ProductEmbeddingSearch
+
+__all__ = [
+    "ProductEmbeddingSearch",
+]
@@ -0,0 +1,96 @@
+"""Búsqueda de vecinos cercanos sobre `product_embedding` (pgvector + HNSW).
+
+La consulta ordena por distancia coseno (`<=>`) con `LIMIT`, que es la forma
+que el índice `idx_product_embedding_vector_hnsw` puede resolver sin recorrer
+la tabla: la distancia se calcula en Postgres y a Python sólo llegan los k
+resultados.
+
+Uso:
+    with Session() as session:
+        search = ProductEmbeddingSearch(session)
+        search.nearest(query_vector, limit=5)
+        search.similar_to_sku("5958", limit=5)
+"""
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from odoo_engine.sync_manager.models import Product, ProductEmbedding
+
+# Candidatos que explora HNSW por consulta; pgvector usa 40 por defecto.
+# Más alto = mejor recall y más latencia.
+DEFAULT_EF_SEARCH = 40
+
+
+class ProductEmbeddingSearch:
+    """Consultas k-NN sobre los embeddings de productos del espejo de Odoo.
+
+    Args:
+        session: Sesión SQLAlchemy sobre la base de odoo-engine (Postgres).
+        ef_search: Valor de `hnsw.ef_search` para cada consulta. Se fija con
+            `SET LOCAL`, así sólo afecta a la transacción de la consulta.
+    """
+
+    def __init__(self, session: Session, ef_search: int = DEFAULT_EF_SEARCH):
+        self.session = session
+        self.ef_search = int(ef_search)
+
+    def _query(self, vector, limit, active_only, exclude_product_id=None):
+        distance = ProductEmbedding.vector.cosine_distance(vector).label("distance")
+        stmt = (
+            select(Product.id, Product.odoo_id, Product.default_code, Product.name, distance)
+            .join(Product, Product.embedding_id == ProductEmbedding.id)
+            .order_by(distance)
+            .limit(limit)
+        )
+        if active_only:
+            stmt = stmt.where(Product.active.is_not(False))
+        if exclude_product_id is not None:
+            stmt = stmt.where(Product.id != exclude_product_id)
+        return stmt
+
+    def nearest(self, vector, limit: int = 10, active_only: bool = True) -> list[dict]:
+        """Productos cuyo embedding está más cerca de `vector`.
+
+        Returns:
+            Lista ordenada de dicts con `product_id`, `odoo_id`, `default_code`,
+            `name`, `distance` (coseno, 0 = idéntico) y `similarity` (1 - distance).
+        """
+        rows = self._execute(self._query(vector, limit, active_only))
+        return [self._as_dict(row) for row in rows]
+
+    def similar_to_sku(self, sku: str, limit: int = 10, active_only: bool = True) -> list[dict]:
+        """Productos más parecidos al producto `sku` (excluido del resultado).
+
+        Devuelve [] si el SKU no existe o aún no tiene embedding.
+        """
+        row = self.session.execute(
+            select(Product.id, ProductEmbedding.vector)
+            .join(ProductEmbedding, Product.embedding_id == ProductEmbedding.id)
+            .where(Product.default_code == sku)
+            .order_by(Product.id)
+            .limit(1)
+        ).first()
+        if row is None:
+            return []
+        product_id, vector = row
+        rows = self._execute(self._query(vector, limit, active_only, exclude_product_id=product_id))
+        return [self._as_dict(r) for r in rows]
+
+    def _execute(self, stmt):
+        # SET LOCAL dura hasta el fin de la transacción (la sesión la abre sola)
+        # y no acepta parámetros; ef_search ya es un int validado.
+        self.session.execute(text(f"SET LOCAL hnsw.ef_search = {self.ef_search}"))
+        return self.session.execute(stmt).all()
+
+    @staticmethod
+    def _as_dict(row) -> dict:
+        distance = float(row.distance)
+        return {
+            "product_id": row.id,
+            "odoo_id": row.odoo_id,
+            "default_code": row.default_code,
+            "name": row.name,
+            "distance": distance,
+            "similarity": 1.0 - distance,
+        }
@@ -1,18 +1,36 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import hashlib
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from odoo_engine.config import secrets
 
 
+def normalize_embedding_text(text: Optional[str]) -> str:
+    """Canonical form of a text before embedding: NFC, collapsed whitespace, stripped."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def embedding_content_hash(text: Optional[str]) -> str:
+    """sha256 of the normalized text; with the model name it keys the embedding cache."""
+    return hashlib.sha256(normalize_embedding_text(text).encode("utf-8")).hexdigest()
+
+
 class EmbeddingGenerator:
     """
     Minimal embedding generator using OpenAI API.
 
     Generates embeddings for batches of texts. Designed for post-sync usage to
     embed product names and store them in the database.
+
+    Results are positional: `generate(texts)[i]` is the vector of `texts[i]`,
+    or None when the text was empty and therefore not sent.
+    `generate_stream` yields the same `(index, vector)` pairs as batches
+    arrive, for callers that want to write incrementally.
     """
 
     def __init__(self, api_key: Optional[str] = None, model: str = "text-embedding-3-small"):
@@ -21,60 +39,114 @@ class EmbeddingGenerator:
             raise RuntimeError("OPENAI_API_KEY is not configured.")
         self.model = model
         self.client = OpenAI(api_key=self.api_key)
+        self._async_client = None
         self.max_retries = 3
         self.base_delay = 1.0
         # Tunable performance parameters
         self.max_batch_size = 300  # increase from 100 to 300
         self.max_workers = 3  # parallelize up to 3 concurrent batches
 
-    def generate(self, texts: List[str]) -> List[List[float]]:
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.api_key)
+        return self._async_client
+
+    def _indexed_batches(self, texts: List[Optional[str]]) -> List[List[Tuple[int, str]]]:
+        """Batches of `(input index, text)`; empty texts are left out."""
+        valid = [(i, t) for i, t in enumerate(texts) if t and t.strip()]
+        return [valid[i : i + self.max_batch_size] for i in range(0, len(valid), self.max_batch_size)]
+
+    @staticmethod
+    def _vectors(resp) -> List[List[float]]:
+        # La API devuelve `index` por item; ordenar por él no cuesta nada
+        return [item.embedding for item in sorted(resp.data, key=lambda item: item.index)]
+
+    def _embed_batch(self, batch_texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries):
+            try:
+                resp = self.client.embeddings.create(model=self.model, input=batch_texts)
+                return self._vectors(resp)
+            except Exception:
+                if attempt < self.max_retries - 1:
+                    time.sleep(self.base_delay * (2 ** attempt))
+                else:
+                    raise
+
+    async def _aembed_batch(self, batch_texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries):
+            try:
+                resp = await self.async_client.embeddings.create(model=self.model, input=batch_texts)
+                return self._vectors(resp)
+            except Exception:
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(self.base_delay * (2 ** attempt))
+                else:
+                    raise
+
+    def generate(self, texts: List[Optional[str]]) -> List[Optional[List[float]]]:
         """Generate embeddings for a list of texts using parallelized batch requests.
 
         This method creates batches up to `self.max_batch_size` and submits multiple
         batches concurrently using a ThreadPoolExecutor with `self.max_workers`.
+
+        Returns:
+            A list as long as `texts`: the vector of each text at its position,
+            None for empty/None texts (not sent to the API).
         """
-        if not texts:
-            return []
-
-        # Filter invalid texts
-        valid_texts = [t for t in texts if t and t.strip()]
-        if not valid_texts:
-            return []
-
-        # Create batches
-        batches = []
-        current = []
-        for t in valid_texts:
-            current.append(t)
-            if len(current) >= self.max_batch_size:
-                batches.append(current)
-                current = []
-        if current:
-            batches.append(current)
-
-        # Helper to generate a single batch with retries
-        def _gen_batch(batch_texts: List[str]):
-            for attempt in range(self.max_retries):
-                try:
-                    resp = self.client.embeddings.create(model=self.model, input=batch_texts)
-                    return [item.embedding for item in resp.data]
-                except Exception as e:
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.base_delay * (2 ** attempt))
-                    else:
-                        raise
-
-        results: List[List[float]] = []
-
-        # Parallelize batch requests
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        batches = self._indexed_batches(texts)
+        if not batches:
+            return results
+
         with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
-            futures = {ex.submit(_gen_batch, b): i for i, b in enumerate(batches)}
-            for fut in as_completed(futures):
-                batch_res = fut.result()
-                results.extend(batch_res)
+            futures = [(batch, ex.submit(self._embed_batch, [t for _, t in batch])) for batch in batches]
+            for batch, fut in futures:
+                vectors = fut.result()
+                if len(vectors) != len(batch):
+                    raise RuntimeError("Embedding API returned a different number of vectors than inputs")
+                for (i, _), vec in zip(batch, vectors):
+                    results[i] = vec
 
         return results
 
+    async def generate_stream(
+        self, texts: List[Optional[str]]
+    ) -> AsyncIterator[Tuple[int, Optional[List[float]]]]:
+        """Async variant of `generate`: yields `(index, vector)` as each batch completes.
+
+        Up to `self.max_workers` batches are in flight at once and pairs come in
+        completion order, so use the index to place them. Skipped (empty)
+        texts are yielded first as `(index, None)`. If the consumer stops early
+        the pending requests are cancelled.
+        """
+        batches = self._indexed_batches(texts)
+        sent = {i for batch in batches for i, _ in batch}
+        for i in range(len(texts)):
+            if i not in sent:
+                yield i, None
+        if not batches:
+            return
+
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run(batch):
+            async with semaphore:
+                return batch, await self._aembed_batch([t for _, t in batch])
+
+        tasks = [asyncio.ensure_future(run(batch)) for batch in batches]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                batch, vectors = await next_done
+                if len(vectors) != len(batch):
+                    raise RuntimeError("Embedding API returned a different number of vectors than inputs")
+                for (i, _), vec in zip(batch, vectors):
+                    yield i, vec
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     def get_embedding_dimension(self) -> int:
         model_dimensions = {
             "text-embedding-3-small": 1536,
@@ -0,0 +1,146 @@
+"""Caché de resolución odoo_id -> id local para las tablas del espejo.
+
+Cada `sync_*` necesita traducir los IDs de Odoo de sus relaciones (producto,
+partner, orden, UoM) a las PK locales. Recargar el mapa completo desde
+Postgres en cada paso es caro: un sync completo leía el mapa de productos
+cinco veces. `IdCache` carga cada tabla una sola vez por run y después se
+mantiene al día con el `RETURNING id, odoo_id` de cada UPSERT.
+
+Los mapas se guardan como dos arreglos NumPy int64 ordenados por odoo_id
+(16 bytes por fila, contra ~100 de un dict de Python) y se consultan en lote
+con `searchsorted`.
+"""
+
+import threading
+
+import numpy as np
+from sqlalchemy import select
+
+
+class IdMap:
+    """Mapa odoo_id -> id local sobre arreglos ordenados.
+
+    Las actualizaciones se acumulan en un dict y se funden con los arreglos
+    en la siguiente consulta, así un UPSERT por chunks no reordena el mapa
+    completo en cada chunk.
+    """
+
+    def __init__(self, odoo_ids=(), ids=()):
+        keys = np.asarray(odoo_ids, dtype=np.int64)
+        values = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._values = values[order]
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, session, model):
+        rows = session.execute(select(model.odoo_id, model.id)).all()
+        return cls([row[0] for row in rows], [row[1] for row in rows])
+
+    def __len__(self):
+        with self._lock:
+            self._merge()
+            return len(self._keys)
+
+    def __contains__(self, odoo_id):
+        return self.get(odoo_id) is not None
+
+    def update(self, pairs):
+        """Registra pares `(odoo_id, id)` (p. ej. filas de un RETURNING)."""
+        with self._lock:
+            for odoo_id, id_ in pairs:
+                if odoo_id is not None and id_ is not None:
+                    self._pending[int(odoo_id)] = int(id_)
+
+    def discard(self, odoo_ids):
+        """Quita odoo_ids borrados localmente."""
+        with self._lock:
+            self._merge()
+            drop = np.asarray(list(odoo_ids), dtype=np.int64)
+            if len(drop) and len(self._keys):
+                keep = ~np.isin(self._keys, drop)
+                self._keys = self._keys[keep]
+                self._values = self._values[keep]
+
+    def get(self, odoo_id, default=None):
+        if odoo_id is None:
+            return default
+        value = self.resolve([odoo_id])[0]
+        return default if value is None else value
+
+    def resolve(self, odoo_ids):
+        """Traduce una lista de odoo_ids; los ausentes (o None) quedan como None."""
+        with self._lock:
+            self._merge()
+            keys, values = self._keys, self._values
+        present = [i for i, odoo_id in enumerate(odoo_ids) if odoo_id is not None]
+        result = [None] * len(odoo_ids)
+        if not present or not len(keys):
+            return result
+        wanted = np.fromiter((odoo_ids[i] for i in present), dtype=np.int64, count=len(present))
+        pos = np.searchsorted(keys, wanted)
+        pos_clipped = np.minimum(pos, len(keys) - 1)
+        found = keys[pos_clipped] == wanted
+        for i, ok, value in zip(present, found.tolist(), values[pos_clipped].tolist()):
+            if ok:
+                result[i] = value
+        return result
+
+    def _merge(self):
+        if not self._pending:
+            return
+        new_keys = np.fromiter(self._pending.keys(), dtype=np.int64, count=len(self._pending))
+        new_values = np.fromiter(self._pending.values(), dtype=np.int64, count=len(self._pending))
+        self._pending = {}
+        order = np.argsort(new_keys)
+        new_keys, new_values = new_keys[order], new_values[order]
+
+        keys, values = self._keys, self._values
+        pos = np.searchsorted(keys, new_keys)
+        existing = np.zeros(len(new_keys), dtype=bool)
+        in_range = pos < len(keys)
+        existing[in_range] = keys[pos[in_range]] == new_keys[in_range]
+        # Claves conocidas: actualizar en sitio (copia: resolve() pudo quedarse con la referencia)
+        if existing.any():
+            values = values.copy()
+            values[pos[existing]] = new_values[existing]
+        # Claves nuevas: insertar manteniendo el orden
+        inserted = ~existing
+        if inserted.any():
+            keys = np.insert(keys, pos[inserted], new_keys[inserted])
+            values = np.insert(values, pos[inserted], new_values[inserted])
+        self._keys, self._values = keys, values
+
+
+class IdCache:
+    """Un `IdMap` por tabla, cargado la primera vez que se pide.
+
+    Se puede compartir entre varios `SyncManager` (el scheduler pasa la
+    misma instancia a todos los pasos de un run).
+    """
+
+    def __init__(self):
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def get(self, session, model):
+        with self._lock:
+            id_map = self._maps.get(model)
+            if id_map is None:
+                id_map = self._maps[model] = IdMap.load(session, model)
+            return id_map
+
+    def loaded(self, model):
+        """El mapa de `model` si ya se cargó; None si no (no hace falta mantenerlo)."""
+        with self._lock:
+            return self._maps.get(model)
+
+    def invalidate(self, model=None):
+        """Descarta el mapa de `model` (o todos): se recarga en el próximo uso."""
+        with self._lock:
+            if model is None:
+                self._maps.clear()
+            else:
+                self._maps.pop(model, None)
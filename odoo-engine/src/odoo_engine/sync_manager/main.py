@@ -1,9 +1,13 @@
+import os
+import threading
+
 from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 
-from odoo_engine.sync_manager.models import Base
+from odoo_engine.sync_manager.models import Base, EMBEDDING_DIMENSION
 from odoo_engine.utils import OdooClient, get_pg_dsn
-from odoo_engine.sync_manager.sync_manager import SyncManager
+from odoo_engine.sync_manager.sync_manager import SyncManager, backfill_embedding_content_hashes
+from odoo_engine.sync_manager.scheduler import DEFAULT_STEPS, SyncScheduler
 
 from odoo_engine.config import secrets
 from dev_utils.pretty_logger import PrettyLogger
@@ -15,6 +19,11 @@ def main():
     dsn = get_pg_dsn()
     engine = create_engine(dsn, echo=False, future=True)
 
+    # pgvector debe existir antes de crear product_embedding (columna VECTOR)
+    with engine.connect() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        conn.commit()
+
     # Create tables if they don't exist
     Base.metadata.create_all(engine)
 
@@ -23,10 +32,41 @@ def main():
         conn.execute(text("""
             ALTER TABLE product ADD COLUMN IF NOT EXISTS standard_price NUMERIC
         """))
+        conn.execute(text("""
+            ALTER TABLE product ADD COLUMN IF NOT EXISTS product_tmpl_id BIGINT
+        """))
+        # product_embedding.vector pasó de JSON a vector(1536): convertir tablas
+        # existentes (el texto JSON '[0.1, 0.2, ...]' es un literal válido de
+        # pgvector) y crear el índice HNSW, que create_all no agrega a tablas viejas.
+        vector_type = conn.execute(text("""
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'product_embedding' AND column_name = 'vector'
+        """)).scalar()
+        if vector_type in ("json", "jsonb"):
+            conn.execute(text(f"""
+                ALTER TABLE product_embedding
+                ALTER COLUMN vector TYPE vector({EMBEDDING_DIMENSION}) USING (vector::text)::vector
+            """))
+        conn.execute(text("""
+            ALTER TABLE product_embedding ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)
+        """))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_product_embedding_model_hash
+            ON product_embedding (model, content_hash)
+        """))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_product_embedding_vector_hnsw
+            ON product_embedding USING hnsw (vector vector_cosine_ops)
+        """))
         conn.commit()
 
     Session = sessionmaker(bind=engine, expire_on_commit=False, future=True)
 
+    # Embeddings anteriores a content_hash: hash del nombre actual, para que un
+    # renombre posterior se re-embeba sin volver a pedir todo el catálogo
+    with Session() as session:
+        backfill_embedding_content_hashes(session)
+
     # -----------------------
     # Odoo API client
     # -----------------------
@@ -44,35 +84,46 @@ def main():
     # Run sync with progress
     # -----------------------
     logger = PrettyLogger("odoo-sync")
-    steps = [
-        ("UoMs", "sync_uoms"),
-        ("Partners", "sync_partners"),
-        ("Products", "sync_products"),
-        ("BOMs", "sync_boms"),
-        ("BOM Lines", "sync_bom_lines"),
-        ("Production Orders", "sync_production_orders"),
-        ("Inventory Quants", "sync_inventory_quants"),
-        ("Daily Stock History", "record_daily_stock_history"),
-        ("Sale Orders", "sync_sale_orders"),
-        ("Sale Order Lines", "sync_sale_order_lines"),
-        ("Purchase Orders", "sync_purchase_orders"),
-        ("Purchase Order Lines", "sync_purchase_order_lines"),
-    ]
-
-    total_steps = len(steps)
+    total_steps = len(DEFAULT_STEPS)
+    progress_lock = threading.Lock()
+    completed = []
+
+    def on_step_start(step):
+        logger.info(f"Odoo sync - {step.name} started")
+
+    def on_step_end(step, seconds, error):
+        # Los pasos terminan desde varios hilos: serializar el progreso
+        with progress_lock:
+            completed.append(step.name)
+            status = "failed" if error else f"{seconds:.1f}s"
+            logger.progress(f"Odoo sync - {step.name} ({status})", len(completed), total_steps, progress_id="odoo_sync")
+
+    # Initialize progress bar at 0% for the whole sync
+    logger.progress("Starting odoo sync", 0, total_steps, progress_id="odoo_sync")
+
+    # El cliente ya autenticado lo reutiliza el primer hilo; los demás abren el suyo.
+    clients = [odoo_client]
+    clients_lock = threading.Lock()
+
+    def client_factory():
+        with clients_lock:
+            return clients.pop() if clients else OdooClient()
+
+    scheduler = SyncScheduler(
+        Session,
+        client_factory,
+        max_workers=int(os.getenv("ODOO_SYNC_WORKERS", "4")),
+        on_step_start=on_step_start,
+        on_step_end=on_step_end,
+        # ODOO_SYNC_FORCE_FULL=1 ignora los watermarks y reconcilia borrados en todos los modelos
+        manager_kwargs={"force_full": os.getenv("ODOO_SYNC_FORCE_FULL") == "1"},
+    )
+    timings = scheduler.run()
+    logger.table({name: f"{seconds:.2f}s" for name, seconds in timings.items()}, title="Sync step timings")
+
     with Session() as session:
         sync = SyncManager(session, odoo_client)
 
-        # Initialize progress bar at 0% for the whole sync
-        logger.progress("Starting odoo sync", 0, total_steps, progress_id="odoo_sync")
-
-        for idx, (name, method_name) in enumerate(steps, start=1):
-            # Show the specific step currently executing in the progress bar
-            # Update progress BEFORE running the step so the bar reflects the
-            # current task (previous behavior logged the task after it ran).
-            logger.progress(f"Odoo sync - {name}", idx, total_steps, progress_id="odoo_sync")
-            getattr(sync, method_name)()
-
         # Post-sync: populate product embeddings
         sync.populate_product_embeddings(batch_size=64)
 
@@ -116,7 +167,7 @@ def main():
             with engine.connect() as conn:
                 row = conn.execute(
                     text(
-                        "SELECT COUNT(*) AS cnt, SUM(json_array_length(vector)) AS total_dims FROM public.product_embedding"
+                        "SELECT COUNT(*) AS cnt, SUM(vector_dims(vector)) AS total_dims FROM public.product_embedding"
                     )
                 ).one()
                 emb_count = int(row[0] or 0)
@@ -12,12 +12,57 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     UniqueConstraint,
+    Float,
 )
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
+from sqlalchemy.types import UserDefinedType
 
 Base = declarative_base()
 
+# Dimensión de text-embedding-3-small (la que usa populate_product_embeddings)
+EMBEDDING_DIMENSION = 1536
+
+
+class Vector(UserDefinedType):
+    """Columna `vector(n)` de pgvector.
+
+    Se envía y se lee en el formato de texto de pgvector ('[0.1,0.2,...]'),
+    así no hace falta registrar adaptadores en el driver. En sqlite (tests)
+    el valor queda guardado como ese mismo texto.
+    """
+
+    cache_ok = True
+
+    def __init__(self, dim=None):
+        self.dim = dim
+
+    def get_col_spec(self, **kw):
+        return f"VECTOR({self.dim})" if self.dim else "VECTOR"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None or isinstance(value, str):
+                return value
+            return "[" + ",".join(repr(float(v)) for v in value) + "]"
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or not isinstance(value, str):
+                return value
+            return [float(v) for v in value.strip("[]").split(",") if v]
+
+        return process
+
+    class comparator_factory(UserDefinedType.Comparator):
+        def cosine_distance(self, other):
+            return self.op("<=>", return_type=Float)(other)
+
+        def l2_distance(self, other):
+            return self.op("<->", return_type=Float)(other)
+
 
 # -------------------- Master Data --------------------
 class UnitOfMeasure(Base):
@@ -54,6 +99,9 @@ class Product(Base):
     purchase_ok = Column(Boolean)
     active = Column(Boolean)
     uom_id = Column(BigInteger, ForeignKey("uom.id"))
+    # ID de la plantilla en Odoo (product.template); las BOMs por plantilla se
+    # resuelven contra esta columna.
+    product_tmpl_id = Column(BigInteger)
     type = Column(Text)
     barcode = Column(Text)
     standard_price = Column(Numeric, nullable=True)
@@ -86,15 +134,26 @@ class Product(Base):
 class ProductEmbedding(Base):
     __tablename__ = "product_embedding"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    # Vector de embedding almacenado como JSON (lista de floats)
-    vector = Column(JSON, nullable=False)
+    # Vector de embedding (pgvector); antes era una lista de floats en JSON
+    vector = Column(Vector(EMBEDDING_DIMENSION), nullable=False)
     # Metadatos opcionales
     model = Column(Text)
     dimension = Column(Integer)
+    # sha256 del texto normalizado: con `model` identifica el contenido embebido
+    # y permite reutilizar el vector en vez de pedirlo de nuevo a OpenAI
+    content_hash = Column(String(64))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     __table_args__ = (
         Index("idx_product_embedding_created_at", "created_at"),
+        Index("idx_product_embedding_model_hash", "model", "content_hash"),
+        # Índice ANN por distancia coseno para búsquedas de vecinos cercanos
+        Index(
+            "idx_product_embedding_vector_hnsw",
+            "vector",
+            postgresql_using="hnsw",
+            postgresql_ops={"vector": "vector_cosine_ops"},
+        ),
     )
 
 
@@ -0,0 +1,208 @@
+"""Scheduler de pasos de sync según sus dependencias.
+
+`SyncManager.full_sync` corre los pasos uno tras otro aunque muchos no dependan
+entre sí (UoMs y Partners, órdenes de venta y de compra, etc.). El scheduler
+arma el grafo de dependencias y lanza en paralelo todo paso cuyas dependencias
+ya terminaron, así el tiempo total tiende al camino crítico del grafo.
+
+Cada paso corre con su propia sesión de base de datos (sesiones SQLAlchemy y
+clientes odoorpc no son seguros entre hilos). Los clientes de Odoo se crean
+uno por hilo de trabajo y se reutilizan entre los pasos de ese hilo, para no
+pagar un login por paso. El mapa de partners canónicos que arma
+`sync_partners` y la caché de IDs (`IdCache`) se comparten entre todos los
+`SyncManager` del run.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from odoo_engine.sync_manager.id_map import IdCache
+from odoo_engine.sync_manager.sync_manager import SyncManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SyncStep:
+    name: str
+    method: str
+    depends_on: tuple[str, ...] = ()
+
+
+DEFAULT_STEPS = (
+    SyncStep("UoMs", "sync_uoms"),
+    SyncStep("Partners", "sync_partners"),
+    SyncStep("Products", "sync_products", ("UoMs",)),
+    SyncStep("BOMs", "sync_boms", ("Products", "UoMs")),
+    SyncStep("BOM Lines", "sync_bom_lines", ("BOMs", "Products")),
+    SyncStep("Production Orders", "sync_production_orders", ("Products",)),
+    SyncStep("Inventory Quants", "sync_inventory_quants", ("Products",)),
+    SyncStep("Daily Stock History", "record_daily_stock_history", ("Inventory Quants",)),
+    SyncStep("Sale Orders", "sync_sale_orders", ("Partners",)),
+    SyncStep("Sale Order Lines", "sync_sale_order_lines", ("Sale Orders", "Products")),
+    SyncStep("Purchase Orders", "sync_purchase_orders", ("Partners",)),
+    SyncStep("Purchase Order Lines", "sync_purchase_order_lines", ("Purchase Orders", "Products")),
+)
+
+
+class SyncStepError(RuntimeError):
+    """Uno o más pasos fallaron; los que dependían de ellos no se ejecutaron."""
+
+    def __init__(self, failed: dict[str, BaseException], skipped: list[str]):
+        self.failed = failed
+        self.skipped = skipped
+        names = ", ".join(f"{name} ({exc!r})" for name, exc in failed.items())
+        super().__init__(f"Sync steps failed: {names}; skipped: {', '.join(skipped) or '-'}")
+
+
+class SyncScheduler:
+    """Ejecuta los `SyncStep` en paralelo respetando sus dependencias.
+
+    Args:
+        session_factory: Callable que devuelve una sesión nueva (p. ej. un
+            `sessionmaker`); se usa como context manager, una por paso.
+        client_factory: Callable que devuelve un cliente de Odoo nuevo.
+        steps: Pasos a ejecutar; por defecto `DEFAULT_STEPS`.
+        max_workers: Máximo de pasos simultáneos.
+        on_step_start / on_step_end: Callbacks opcionales `(step)` y
+            `(step, seconds, error)` para reportar progreso.
+        manager_kwargs: Argumentos extra para cada `SyncManager`
+            (p. ej. `force_full=True`).
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        client_factory,
+        steps=DEFAULT_STEPS,
+        max_workers: int = 4,
+        on_step_start=None,
+        on_step_end=None,
+        manager_cls=SyncManager,
+        manager_kwargs=None,
+    ):
+        self.session_factory = session_factory
+        self.client_factory = client_factory
+        self.steps = {step.name: step for step in steps}
+        self.max_workers = max(1, max_workers)
+        self.on_step_start = on_step_start
+        self.on_step_end = on_step_end
+        self.manager_cls = manager_cls
+        self.manager_kwargs = dict(manager_kwargs or {})
+        self.partner_remote_to_canonical = {}
+        self.id_cache = IdCache()
+        self.timings: dict[str, float] = {}
+        self._local = threading.local()
+        self._validate()
+
+    def _validate(self):
+        for step in self.steps.values():
+            unknown = [dep for dep in step.depends_on if dep not in self.steps]
+            if unknown:
+                raise ValueError(f"Step {step.name!r} depends on unknown steps: {unknown}")
+        # Detectar ciclos con un orden topológico
+        remaining = {name: set(step.depends_on) for name, step in self.steps.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle between steps: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    def _client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        return client
+
+    def _run_step(self, step: SyncStep) -> float:
+        if self.on_step_start:
+            self.on_step_start(step)
+        start = time.perf_counter()
+        error = None
+        try:
+            with self.session_factory() as session:
+                manager = self.manager_cls(
+                    session,
+                    self._client(),
+                    partner_remote_to_canonical=self.partner_remote_to_canonical,
+                    id_cache=self.id_cache,
+                    **self.manager_kwargs,
+                )
+                getattr(manager, step.method)()
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[step.name] = elapsed
+            logger.info("⏱️  %s finished in %.2fs%s", step.name, elapsed, " (failed)" if error else "")
+            if self.on_step_end:
+                self.on_step_end(step, elapsed, error)
+        return elapsed
+
+    def run(self) -> dict[str, float]:
+        """Ejecuta todos los pasos y devuelve `{paso: segundos}`.
+
+        Si un paso falla, los que dependen de él (directa o indirectamente) no
+        se lanzan, los independientes terminan, y al final se lanza
+        `SyncStepError`.
+        """
+        started = time.perf_counter()
+        done: set[str] = set()
+        failed: dict[str, BaseException] = {}
+        pending = dict(self.steps)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sync") as executor:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    if any(dep in failed for dep in step.depends_on):
+                        continue
+                    if all(dep in done for dep in step.depends_on):
+                        running[executor.submit(self._run_step, step)] = name
+                        del pending[name]
+                if not running:
+                    break  # sólo quedan pasos bloqueados por fallos
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    exc = future.exception()
+                    if exc is None:
+                        done.add(name)
+                    else:
+                        logger.error("❌ Sync step %s failed: %s", name, exc)
+                        failed[name] = exc
+                        # Propagar el fallo: lo que dependa de este paso queda bloqueado
+                        self._block_dependents(name, pending, failed)
+
+        wall = time.perf_counter() - started
+        logger.info(
+            "🏁 Sync scheduler finished in %.2fs (sum of steps %.2fs, %d workers)",
+            wall,
+            sum(self.timings.values()),
+            self.max_workers,
+        )
+        if failed:
+            raise SyncStepError(
+                {name: exc for name, exc in failed.items() if name in self.timings},
+                sorted(name for name in failed if name not in self.timings),
+            )
+        return dict(self.timings)
+
+    def _block_dependents(self, failed_name, pending, failed):
+        # Los pasos bloqueados se registran en `failed` (sin timing) para
+        # que sus propios dependientes también queden bloqueados.
+        changed = True
+        while changed:
+            changed = False
+            for name, step in list(pending.items()):
+                if any(dep in failed for dep in step.depends_on):
+                    failed[name] = RuntimeError(f"skipped: depends on {failed_name}")
+                    del pending[name]
+                    changed = True
@@ -1,9 +1,14 @@
+import io
+import json
 import logging
+import uuid
 from math import ceil
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from sqlalchemy import select, update, func
+from sqlalchemy import JSON, Boolean, Integer, bindparam, column, select, table, text, update, func
+from sqlalchemy import values as sa_values
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 import datetime
 
@@ -23,39 +28,227 @@ from odoo_engine.sync_manager.models import (
     PurchaseOrderLine,
 )
 from odoo_engine.sync_manager.models import ProductEmbedding
-from odoo_engine.sync_manager.embedding_generator import EmbeddingGenerator
+from odoo_engine.sync_manager.embedding_generator import (
+    EmbeddingGenerator,
+    embedding_content_hash,
+    normalize_embedding_text,
+)
+from odoo_engine.sync_manager.id_map import IdCache
 from odoo_engine.utils import OdooClient
+from odoo_engine.utils.odoo_client import iter_keyset_pages
 import tiktoken
 
 logger = logging.getLogger(__name__)
 BATCH_SIZE = 5000  # Records per Odoo fetch batch
 UPSERT_CHUNK = 1000  # Records per UPSERT chunk
+# Desde este tamaño el UPSERT en Postgres va por COPY a una tabla staging
+COPY_UPSERT_THRESHOLD = 5000
+# El watermark se guarda un poco antes del inicio del fetch: cubre desfases de
+# reloj con Odoo y transacciones que commitean durante el fetch. Re-traer unas
+# filas de más es inofensivo (el UPSERT es idempotente).
+WATERMARK_OVERLAP = datetime.timedelta(minutes=5)
+# Cada cuánto se reconcilian borrados en modo incremental (un fetch sólo de IDs)
+RECONCILE_INTERVAL = datetime.timedelta(hours=24)
+RECONCILE_INTERVALS = {
+    # Odoo borra los quants que quedan en cero; un quant fantasma ensucia el
+    # historial de stock, así que se reconcilia en cada corrida.
+    "stock.quant": datetime.timedelta(0),
+}
+
+
+def _copy_field(value):
+    """Campo CSV para COPY: None sin comillas (NULL), texto siempre entre comillas."""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+def _false_to_none(model, data_list):
+    """Convierte a None los `False` con que Odoo marca campos vacíos.
+
+    Sólo se conservan en columnas booleanas y JSON. Así el camino por COPY y
+    el INSERT por chunks guardan lo mismo (NULL) en vez de 'False'/'false'.
+    """
+    keep = {c.name for c in model.__table__.columns if isinstance(c.type, (Boolean, JSON))}
+    rows = []
+    for row in data_list:
+        if any(value is False and name not in keep for name, value in row.items()):
+            row = {
+                name: None if value is False and name not in keep else value
+                for name, value in row.items()
+            }
+        rows.append(row)
+    return rows
+
+
+def _as_naive_utc(value):
+    """Normaliza un datetime a UTC sin zona horaria (así guarda Odoo write_date)."""
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def backfill_embedding_content_hashes(session):
+    """Completa `content_hash` de los embeddings creados antes de que existiera.
+
+    El hash sale del nombre actual del producto que apunta a cada embedding,
+    así el catálogo ya embebido no se vuelve a pedir a OpenAI y, desde ahí, un
+    renombre se detecta como cualquier otro cambio de texto. Idempotente.
+
+    Returns:
+        Cantidad de embeddings actualizados.
+    """
+    rows = session.execute(
+        select(ProductEmbedding.id, Product.name)
+        .join(Product, Product.embedding_id == ProductEmbedding.id)
+        .where(ProductEmbedding.content_hash.is_(None), Product.name.isnot(None))
+        .order_by(ProductEmbedding.id, Product.id)
+    ).all()
+    hashes = {}
+    for embedding_id, name in rows:
+        if embedding_id not in hashes and normalize_embedding_text(name):
+            hashes[embedding_id] = embedding_content_hash(name)
+    if hashes:
+        table_ = ProductEmbedding.__table__
+        session.execute(
+            update(table_).where(table_.c.id == bindparam("b_id")).values(content_hash=bindparam("b_hash")),
+            [{"b_id": embedding_id, "b_hash": content_hash} for embedding_id, content_hash in hashes.items()],
+        )
+    session.commit()
+    logger.info("✅ Backfilled content_hash for %d embeddings", len(hashes))
+    return len(hashes)
 
 
 class SyncManager:
-    def __init__(self, session: Session, client: OdooClient):
+    def __init__(
+        self,
+        session: Session,
+        client: OdooClient,
+        partner_remote_to_canonical: dict | None = None,
+        force_full: bool = False,
+        reconcile_interval: datetime.timedelta = RECONCILE_INTERVAL,
+        id_cache: IdCache | None = None,
+    ):
         self.client = client
         self.session = session
+        # odoo_id -> id local por tabla; se carga una vez y se mantiene con los UPSERT
+        self.id_cache = id_cache if id_cache is not None else IdCache()
+        # force_full ignora los watermarks: re-descarga todo y reconcilia borrados
+        self.force_full = force_full
+        self.reconcile_interval = reconcile_interval
         # Mapa de ID remoto de partner -> ID remoto canónico (por VAT)
-        # Se construye en sync_partners() y se usa para remapear relaciones
-        self.partner_remote_to_canonical = {}
+        # Se construye en sync_partners() y se usa para remapear relaciones.
+        # El scheduler pasa el mismo dict a todos los SyncManager de un run.
+        self.partner_remote_to_canonical = (
+            partner_remote_to_canonical if partner_remote_to_canonical is not None else {}
+        )
 
     # ------------------------
     # Generic helpers
     # ------------------------
-    def _upsert(self, model, data_list, unique_field="odoo_id"):
+    def _upsert(self, model, data_list, unique_field="odoo_id", copy=None):
         """Chunked UPSERT into Postgres.
 
         `unique_field` can be a single column name or an iterable of column names.
+        `copy` forces (True) or disables (False) the COPY staging path; by default
+        it is used on Postgres for lists of `COPY_UPSERT_THRESHOLD` rows or more.
         """
         if not data_list:
             return
+        data_list = _false_to_none(model, data_list)
         if isinstance(unique_field, (list, tuple, set)):
             unique_fields = [field for field in unique_field if field]
         else:
             unique_fields = [unique_field] if unique_field else []
         if not unique_fields:
             raise ValueError("unique_field must reference at least one column")
+        # Si el mapa de IDs de la tabla ya está cargado, se mantiene con las
+        # filas escritas en vez de recargarlo.
+        id_map = self.id_cache.loaded(model) if unique_fields == ["odoo_id"] else None
+        dialect_name = getattr(self.session.bind.dialect, "name", None)
+        if copy is None:
+            copy = len(data_list) >= COPY_UPSERT_THRESHOLD
+        try:
+            if copy and dialect_name == "postgresql":
+                self._copy_upsert(model, data_list, unique_fields, id_map)
+            else:
+                self._upsert_chunks(model, data_list, unique_fields, id_map)
+        except Exception:
+            self.id_cache.invalidate(model)
+            raise
+
+    def _copy_upsert(self, model, data_list, unique_fields, id_map):
+        """UPSERT masivo: COPY a una tabla temporal y un único INSERT ... ON CONFLICT.
+
+        Mismo enfoque que `load_legacy_sales.process_csv`: los datos viajan por
+        `COPY ... FROM STDIN` (sin binding de parámetros por fila), el merge es
+        una sola sentencia set-based y hay un solo commit por modelo. Si una
+        clave se repite gana la última fila, como en el camino por chunks.
+        """
+        target = model.__table__
+        present = set().union(*(row.keys() for row in data_list))
+        columns = [c.name for c in target.columns if c.name in present]
+        staging_name = f"tmp_upsert_{target.name}_{uuid.uuid4().hex[:8]}"
+        quoted = ", ".join(f'"{name}"' for name in columns)
+
+        buffer = io.StringIO()
+        skipped = 0
+        for ordinal, row in enumerate(data_list):
+            if any(row.get(field) is None for field in unique_fields):
+                skipped += 1
+                continue
+            buffer.write(",".join([str(ordinal)] + [_copy_field(row.get(name)) for name in columns]))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        # Tabla temporal con los mismos tipos pero sin constraints (CTAS no copia
+        # NOT NULL, así `id` puede quedar fuera); se descarta al hacer commit.
+        self.session.execute(
+            text(
+                f'CREATE TEMP TABLE "{staging_name}" ON COMMIT DROP AS '
+                f'SELECT 0::bigint AS _row, {quoted} FROM "{target.name}" WITH NO DATA'
+            )
+        )
+        cursor = self.session.connection().connection.cursor()
+        try:
+            # CSV: un campo vacío sin comillas es NULL; los strings van siempre entre comillas.
+            cursor.copy_expert(f'COPY "{staging_name}" (_row, {quoted}) FROM STDIN WITH (FORMAT csv)', buffer)
+        finally:
+            cursor.close()
+
+        staging = table(staging_name, column("_row"), *[column(name) for name in columns])
+        keys = [staging.c[field] for field in unique_fields]
+        source = (
+            select(*[staging.c[name] for name in columns])
+            .distinct(*keys)
+            .order_by(*keys, staging.c._row.desc())
+        )
+        stmt = insert(model).from_select(columns, source)
+        update_cols = {
+            c.name: c
+            for c in stmt.excluded
+            if c.name not in set(unique_fields + ["id"])
+        }
+        stmt = stmt.on_conflict_do_update(index_elements=unique_fields, set_=update_cols)
+        if id_map is not None:
+            stmt = stmt.returning(model.odoo_id, model.id)
+        result = self.session.execute(stmt)
+        written = result.all() if id_map is not None else None
+        self.session.commit()
+        if id_map is not None:
+            id_map.update(written)
+        logger.info(
+            "    ✅ COPY-upserted %d rows into %s%s",
+            len(data_list) - skipped,
+            target.name,
+            f" ({skipped} without key skipped)" if skipped else "",
+        )
+
+    def _upsert_chunks(self, model, data_list, unique_fields, id_map):
         # If running against Postgres use efficient INSERT ... ON CONFLICT
         dialect_name = getattr(self.session.bind.dialect, "name", None)
         if dialect_name == "postgresql":
@@ -71,8 +264,13 @@ class SyncManager:
                 stmt = stmt.on_conflict_do_update(
                     index_elements=unique_fields, set_=update_cols
                 )
-                self.session.execute(stmt)
+                if id_map is not None:
+                    stmt = stmt.returning(model.odoo_id, model.id)
+                result = self.session.execute(stmt)
+                written = result.all() if id_map is not None else None
                 self.session.commit()
+                if id_map is not None:
+                    id_map.update(written)
                 logger.info(
                     "    ✅ Upserted chunk %d/%d for %s",
                     i + 1,
@@ -80,37 +278,57 @@ class SyncManager:
                     model.__tablename__,
                 )
         else:
-            # Fallback for sqlite/tests: perform per-row upsert using ORM queries.
-            total_chunks = ceil(len(data_list) / UPSERT_CHUNK)
+            # Fallback for sqlite/tests: INSERT ... ON CONFLICT DO UPDATE en bloque
+            # (sqlite >= 3.24). Sólo se actualizan las columnas presentes.
+            self._upsert_sqlite(model, data_list, unique_fields, id_map)
+
+    def _upsert_sqlite(self, model, data_list, unique_fields, id_map):
+        # Una sentencia compilada una vez y ejecutada con executemany por chunk:
+        # el bucle por fila queda en el driver sqlite3 (C), no en el ORM.
+        rows_by_columns = {}
+        skipped = 0
+        for row in data_list:
+            if any(row.get(field) is None for field in unique_fields):
+                skipped += 1
+                continue
+            rows_by_columns.setdefault(tuple(row), []).append(row)
+
+        # Core sobre la conexión de la sesión: sin la capa bulk del ORM
+        connection = self.session.connection()
+        for columns, rows in rows_by_columns.items():
+            stmt = sqlite_insert(model.__table__)
+            update_cols = {
+                name: stmt.excluded[name]
+                for name in columns
+                if name not in set(unique_fields + ["id"])
+            }
+            if update_cols:
+                stmt = stmt.on_conflict_do_update(index_elements=unique_fields, set_=update_cols)
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=unique_fields)
+            total_chunks = ceil(len(rows) / (UPSERT_CHUNK * 10))
             for i in range(total_chunks):
-                chunk = data_list[i * UPSERT_CHUNK : (i + 1) * UPSERT_CHUNK]
-                for row in chunk:
-                    filter_kwargs = {}
-                    missing_key = False
-                    for field in unique_fields:
-                        value = row.get(field)
-                        if value is None:
-                            missing_key = True
-                            break
-                        filter_kwargs[field] = value
-                    if missing_key:
-                        continue
-                    existing = self.session.query(model).filter_by(**filter_kwargs).one_or_none()
-                    if existing:
-                        # update fields
-                        for k, v in row.items():
-                            setattr(existing, k, v)
-                        self.session.add(existing)
-                    else:
-                        obj = model(**row)
-                        self.session.add(obj)
-                self.session.commit()
+                chunk = rows[i * UPSERT_CHUNK * 10 : (i + 1) * UPSERT_CHUNK * 10]
+                connection.execute(stmt, chunk)
                 logger.info(
                     "    ✅ Fallback upsert processed chunk %d/%d for %s",
                     i + 1,
                     total_chunks,
                     model.__tablename__,
                 )
+        if id_map is not None:
+            written_ids = [row["odoo_id"] for rows in rows_by_columns.values() for row in rows]
+            for i in range(0, len(written_ids), 900):
+                id_map.update(
+                    self.session.execute(
+                        select(model.odoo_id, model.id).where(model.odoo_id.in_(written_ids[i : i + 900]))
+                    ).all()
+                )
+        self.session.commit()
+        # Los objetos ORM ya cargados no ven los cambios del UPSERT Core
+        self.session.expire_all()
+        if skipped:
+            logger.info("    ⚠️ %d rows without key skipped for %s", skipped, model.__tablename__)
 
     def _get_last_synced(self, model_name: str):
         row = self.session.execute(select(SyncState).where(SyncState.model_name == model_name)).scalar_one_or_none()
@@ -125,12 +343,25 @@ class SyncManager:
             self.session.add(SyncState(model_name=model_name, last_synced=timestamp))
         self.session.commit()
 
-    def _fetch_in_batches(self, model_name, fields, domain=None, limit=BATCH_SIZE, since=None):
-        """Fetch records from Odoo in batches using offset until no more results.
+    def _fetch_in_batches(self, model_name, fields, domain=None, limit=BATCH_SIZE, since=None, keyset=True):
+        """Fetch all matching records from Odoo in batches.
 
         Uses the client's `search_read` wrapper. If `since` is provided, augments
         the domain to request only records with write_date > since.
         """
+        results = []
+        for batch in self._iter_batches(model_name, fields, domain=domain, limit=limit, since=since, keyset=keyset):
+            results.extend(batch)
+        return results
+
+    def _iter_batches(self, model_name, fields, domain=None, limit=BATCH_SIZE, since=None, keyset=True):
+        """Yield batches of records from Odoo.
+
+        By default pages with an id cursor (`id > last ORDER BY id`), so every
+        batch costs the same as the first and concurrent writes can't make
+        rows skip or repeat between batches. `keyset=False` keeps the old
+        offset paging.
+        """
         domain = domain or []
         if since:
             # Odoo guarda write_date como UTC sin zona horaria, y Odoo 19 rechaza
@@ -138,16 +369,27 @@ class SyncManager:
             # no timezone"). El watermark viene de una columna timestamptz, así
             # que llega tz-aware: hay que normalizarlo a UTC y soltar la zona.
             if isinstance(since, datetime.datetime):
-                if since.tzinfo is not None:
-                    since = since.astimezone(datetime.timezone.utc).replace(tzinfo=None)
-                since_val = since.strftime("%Y-%m-%d %H:%M:%S")
+                since_val = _as_naive_utc(since).strftime("%Y-%m-%d %H:%M:%S")
             else:
                 since_val = since
 
             # append a simple tuple condition (avoid nested lists which some Odoo servers reject)
             domain = list(domain) + [('write_date', '>', since_val)]
 
-        results = []
+        if keyset:
+            fetched = 0
+            for batch in iter_keyset_pages(self.client.search_read, model_name, domain, fields, limit):
+                fetched += len(batch)
+                logger.info(
+                    "    🟢 Fetched batch up to id %s from %s (%d records, %d total)",
+                    batch[-1].get("id"),
+                    model_name,
+                    len(batch),
+                    fetched,
+                )
+                yield batch
+            return
+
         offset = 0
         while True:
             batch = self.client.search_read(model_name, domain=domain, fields=fields, limit=limit, offset=offset)
@@ -159,13 +401,11 @@ class SyncManager:
                 model_name,
                 len(batch),
             )
-            results.extend(batch)
+            yield batch
             if len(batch) < limit:
                 break
             offset += limit
 
-        return results
-
     def _parse_write_date(self, val):
         """Parse common Odoo write_date string formats to datetime, or return None."""
         if not val:
@@ -185,9 +425,118 @@ class SyncManager:
         return None
 
     def _id_map(self, model):
-        """Return dict mapping odoo_id -> local PK id for a given model."""
-        rows = self.session.execute(select(model.id, model.odoo_id)).all()
-        return {odoo_id: id_ for (id_, odoo_id) in rows}
+        """Return the cached odoo_id -> local PK id map (`IdMap`) for a given model."""
+        return self.id_cache.get(self.session, model)
+
+    def _resolve_m2o(self, model, records, field, remap=None):
+        """Local PK ids for the many2one `field` of each record (None when empty/unknown).
+
+        `remap` optionally translates the remote id first (e.g. canonical partners).
+        """
+        remote_ids = []
+        for rec in records:
+            value = rec.get(field)
+            remote_id = value[0] if value else None
+            if remote_id is not None and remap is not None:
+                remote_id = remap.get(remote_id, remote_id)
+            remote_ids.append(remote_id)
+        return self._id_map(model).resolve(remote_ids)
+
+    # ------------------------
+    # Incremental sync helpers
+    # ------------------------
+    def _begin_incremental(self, odoo_model):
+        """Devuelve `(since, started)` para un sync incremental de `odoo_model`.
+
+        `since` es el watermark guardado (None en el primer sync o con
+        `force_full`) y `started` la hora de inicio, que pasa a ser el próximo
+        watermark: lo que cambie en Odoo durante el fetch se vuelve a traer en
+        la siguiente corrida.
+        """
+        started = datetime.datetime.utcnow()
+        since = None if self.force_full else self._get_last_synced(odoo_model)
+        return since, started
+
+    def _finish_incremental(
+        self,
+        odoo_model,
+        model,
+        since,
+        started,
+        records,
+        domain=None,
+        delete_policy="delete",
+        children=(),
+    ):
+        """Guarda el watermark y, si corresponde, reconcilia borrados.
+
+        Un sync incremental no ve los registros borrados (o que dejaron de
+        cumplir `domain`) en Odoo. En un sync completo los IDs remotos son los
+        de `records`; en incremental, cada `reconcile_interval` se pide sólo la
+        lista de IDs que cumplen `domain` y se comparan con los locales.
+
+        Args:
+            delete_policy: "mark_inactive", "delete" o None (no reconciliar).
+            children: Pares `(modelo hijo, columna FK)` cuyas filas se borran
+                antes que las del padre, para no violar las FKs.
+        """
+        self._set_last_synced(odoo_model, started - WATERMARK_OVERLAP)
+        if delete_policy is None:
+            return
+
+        marker = f"{odoo_model}:reconcile"
+        if since is None:
+            remote_ids = {rec["id"] for rec in records}
+        else:
+            last_reconcile = self._get_last_synced(marker)
+            if last_reconcile is None:
+                # Watermark anterior a la reconciliación: el plazo corre desde ahora
+                self._set_last_synced(marker, started)
+                return
+            interval = RECONCILE_INTERVALS.get(odoo_model, self.reconcile_interval)
+            if started - _as_naive_utc(last_reconcile) < interval:
+                return
+            logger.info("🔎 Reconciling deletes for %s", odoo_model)
+            remote_ids = {rec["id"] for rec in self._fetch_in_batches(odoo_model, ["id"], domain=domain)}
+
+        self._apply_deletes(model, remote_ids, delete_policy, children)
+        self._set_last_synced(marker, started)
+
+    def _apply_deletes(self, model, remote_ids, delete_policy, children=()):
+        """Marca inactivas o borra las filas locales cuyo odoo_id ya no está en Odoo.
+
+        Sólo se consideran filas venidas de Odoo (`odoo_id > 0`): las cargas
+        históricas (p. ej. `load_legacy_sales.py`) usan odoo_id negativos y no
+        deben reconciliarse.
+        """
+        local_ids = {row[0] for row in self.session.execute(select(model.odoo_id).where(model.odoo_id > 0)).all()}
+        to_delete = sorted(local_ids - set(remote_ids))
+        if not to_delete:
+            return
+        for i in range(0, len(to_delete), UPSERT_CHUNK):
+            chunk = to_delete[i : i + UPSERT_CHUNK]
+            if delete_policy == "mark_inactive":
+                self.session.query(model).filter(model.odoo_id.in_(chunk)).update(
+                    {"active": False}, synchronize_session="fetch"
+                )
+            elif delete_policy == "delete":
+                local_pks = select(model.id).where(model.odoo_id.in_(chunk))
+                for child, fk_column in children:
+                    self.session.query(child).filter(getattr(child, fk_column).in_(local_pks)).delete(
+                        synchronize_session=False
+                    )
+                    self.id_cache.invalidate(child)
+                self.session.query(model).filter(model.odoo_id.in_(chunk)).delete(synchronize_session="fetch")
+                id_map = self.id_cache.loaded(model)
+                if id_map is not None:
+                    id_map.discard(chunk)
+            else:
+                return
+        self.session.commit()
+        self.session.expire_all()
+        logger.info(
+            "🧹 %s: %d rows no longer in Odoo (%s)", model.__tablename__, len(to_delete), delete_policy
+        )
 
     # ------------------------
     # Individual sync methods
@@ -235,95 +584,102 @@ class SyncManager:
         self._upsert(UnitOfMeasure, data)
         logger.info("✅ Synced %d UoMs", len(data))
 
-    def sync_partners(self):
-        # Reiniciar el mapa de canónicos en cada corrida
-        self.partner_remote_to_canonical = {}
-
-        records = self._fetch_in_batches(
-            "res.partner",
-            [
-                "id",
-                "name",
-                "is_company",
-                "supplier_rank",
-                "customer_rank",
-                "email",
-                "phone",
-                "vat",
-                "write_date",
-            ],
-        )
-
-        # Separar por presencia de VAT (RUT)
-        with_vat = []
-        without_vat = []
+    PARTNER_FIELDS = [
+        "id",
+        "name",
+        "is_company",
+        "supplier_rank",
+        "customer_rank",
+        "email",
+        "phone",
+        "vat",
+        "write_date",
+    ]
+
+    def _build_partner_map(self, records):
+        """Llena `partner_remote_to_canonical` y devuelve los IDs remotos a guardar.
+
+        Se guardan (a) el partner canónico de cada VAT: el de write_date más
+        reciente, y (b) los partners sin VAT, que se mapean a sí mismos. Basta
+        con `id`, `vat` y `write_date` de cada registro.
+        """
+        by_vat = {}
+        kept = []
         for rec in records:
             vat_val = rec.get("vat")
             if vat_val:
-                # Parsear write_date para selección del más reciente
-                rec["_wd"] = self._parse_write_date(rec.get("write_date"))
-                with_vat.append(rec)
+                by_vat.setdefault(vat_val, []).append(rec)
             else:
-                without_vat.append(rec)
+                self.partner_remote_to_canonical[rec["id"]] = rec["id"]
+                kept.append(rec["id"])
 
-        # Agrupar partners por VAT y seleccionar el más reciente por write_date
-        by_vat = {}
-        for rec in with_vat:
-            by_vat.setdefault(rec["vat"], []).append(rec)
-
-        canonical_by_vat = {}
-        for vat_val, recs in by_vat.items():
+        for recs in by_vat.values():
             # Ordenar descendente por write_date (None al final)
-            recs.sort(key=lambda r: (r.get("_wd") or datetime.datetime.min), reverse=True)
+            recs.sort(
+                key=lambda r: (self._parse_write_date(r.get("write_date")) or datetime.datetime.min),
+                reverse=True,
+            )
             chosen = recs[0]
-            canonical_by_vat[vat_val] = chosen
             # Mapear todos los IDs remotos del grupo al ID canónico
             for r in recs:
                 self.partner_remote_to_canonical[r["id"]] = chosen["id"]
+            kept.append(chosen["id"])
+        return kept
+
+    def _partner_row(self, rec):
+        return {
+            "odoo_id": rec["id"],
+            "name": rec.get("name"),
+            "is_company": rec.get("is_company"),
+            "supplier_rank": rec.get("supplier_rank", 0),
+            "customer_rank": rec.get("customer_rank", 0),
+            "email": rec.get("email"),
+            "phone": rec.get("phone"),
+            # Guardar RUT (VAT). Si False/no presente, quedará NULL
+            "rut": rec.get("vat") or None,
+            "write_date": self._parse_write_date(rec.get("write_date")),
+        }
 
-        # Los partners sin VAT se mapean a sí mismos
-        for r in without_vat:
-            self.partner_remote_to_canonical[r["id"]] = r["id"]
-
-        # Preparar UPSERT sólo con: (a) canónicos por VAT, (b) sin VAT
-        data = []
-
-        # a) canónicos por VAT
-        for vat_val, chosen in canonical_by_vat.items():
-            wd = chosen.get("_wd")
-            data.append(
-                {
-                    "odoo_id": chosen["id"],
-                    "name": chosen.get("name"),
-                    "is_company": chosen.get("is_company"),
-                    "supplier_rank": chosen.get("supplier_rank", 0),
-                    "customer_rank": chosen.get("customer_rank", 0),
-                    "email": chosen.get("email"),
-                    "phone": chosen.get("phone"),
-                    # Guardar RUT (VAT). Si False/no presente, quedará NULL
-                    "rut": vat_val,
-                    "write_date": wd,
-                }
-            )
-
-        # b) sin VAT
-        for rec in without_vat:
-            wd = self._parse_write_date(rec.get("write_date"))
-            data.append(
-                {
-                    "odoo_id": rec["id"],
-                    "name": rec.get("name"),
-                    "is_company": rec.get("is_company"),
-                    "supplier_rank": rec.get("supplier_rank", 0),
-                    "customer_rank": rec.get("customer_rank", 0),
-                    "email": rec.get("email"),
-                    "phone": rec.get("phone"),
-                    "rut": None,
-                    "write_date": wd,
-                }
-            )
+    def sync_partners(self):
+        # Reiniciar el mapa de canónicos en cada corrida (en sitio: puede estar
+        # compartido con otros SyncManager)
+        self.partner_remote_to_canonical.clear()
+        since, started = self._begin_incremental("res.partner")
+
+        if since is None:
+            records = self._fetch_in_batches("res.partner", self.PARTNER_FIELDS)
+            kept = self._build_partner_map(records)
+            by_id = {rec["id"]: rec for rec in records}
+            records = [by_id[remote_id] for remote_id in kept]
+        else:
+            # El mapa de canónicos necesita todos los partners, pero sólo
+            # id/vat/write_date. Los datos completos se piden sólo para los
+            # partners a guardar que cambiaron o que aún no están en local
+            # (p. ej. el canónico de un VAT pasó a ser otro partner).
+            light = self._fetch_in_batches("res.partner", ["id", "vat", "write_date"])
+            kept = self._build_partner_map(light)
+            since_naive = _as_naive_utc(since)
+            changed = {
+                rec["id"]
+                for rec in light
+                if (self._parse_write_date(rec.get("write_date")) or datetime.datetime.min) > since_naive
+            }
+            local = {row[0] for row in self.session.execute(select(Partner.odoo_id)).all()}
+            needed = sorted(remote_id for remote_id in kept if remote_id in changed or remote_id not in local)
+            records = []
+            for i in range(0, len(needed), BATCH_SIZE):
+                records.extend(
+                    self._fetch_in_batches(
+                        "res.partner",
+                        self.PARTNER_FIELDS,
+                        domain=[("id", "in", needed[i : i + BATCH_SIZE])],
+                    )
+                )
 
+        data = [self._partner_row(rec) for rec in records]
         self._upsert(Partner, data)
+        # Los partners no se reconcilian: las órdenes locales los referencian.
+        self._finish_incremental("res.partner", Partner, since, started, records, delete_policy=None)
         logger.info(
             "✅ Synced %d Partners (canónicos por VAT + sin VAT)",
             len(data),
@@ -334,7 +690,7 @@ class SyncManager:
         # Odoo 18 eliminó detailed_type: el tipo vive en `type` (consu/service/combo)
         # y lo almacenable se distingue con el booleano `is_storable`. Filtrar por
         # `type != service` cubre el mismo universo que el filtro anterior.
-        last = self._get_last_synced("product.product")
+        last, started = self._begin_incremental("product.product")
         records = self._fetch_in_batches(
             "product.product",
             [
@@ -345,6 +701,7 @@ class SyncManager:
                 "sale_ok",
                 "purchase_ok",
                 "uom_id",
+                "product_tmpl_id",
                 "write_date",
                 "standard_price",
             ],
@@ -366,11 +723,9 @@ class SyncManager:
                 )
                 attributes_by_product_id = {}
 
-        uom_map = self._id_map(UnitOfMeasure)
+        uom_ids = self._resolve_m2o(UnitOfMeasure, records, "uom_id")
         data = []
-        remote_ids = set()
-        for rec in records:
-            remote_ids.add(rec["id"])
+        for rec, uom_id in zip(records, uom_ids):
             wd = self._parse_write_date(rec.get("write_date"))
 
             base_name = rec.get("name") or ""
@@ -388,7 +743,8 @@ class SyncManager:
                 "sale_ok": rec.get("sale_ok", False),
                 "purchase_ok": rec.get("purchase_ok", False),
                 "active": rec.get("active", True),
-                "uom_id": uom_map.get(rec["uom_id"][0]) if rec.get("uom_id") else None,
+                "uom_id": uom_id,
+                "product_tmpl_id": rec["product_tmpl_id"][0] if rec.get("product_tmpl_id") else None,
                 "standard_price": rec.get("standard_price") or None,
                 "write_date": wd,
             })
@@ -397,65 +753,68 @@ class SyncManager:
             self._upsert(Product, data)
             logger.info("✅ Synced %d Products", len(data))
 
-        # Persist SyncState marker
-        if records:
-            self._set_last_synced("product.product", datetime.datetime.utcnow())
-
-        # Delete detection: only valid on full sync (not incremental)
-        if last is None:
-            local_rows = self.session.execute(select(Product.odoo_id)).all()
-            local_ids = {r[0] for r in local_rows}
-            to_delete = local_ids - remote_ids
-            if to_delete:
-                if delete_policy == "mark_inactive":
-                    self.session.query(Product).filter(Product.odoo_id.in_(to_delete)).update({"active": False}, synchronize_session='fetch')
-                    self.session.commit()
-                    self.session.expire_all()
-                elif delete_policy == "delete":
-                    self.session.query(Product).filter(Product.odoo_id.in_(to_delete)).delete(synchronize_session='fetch')
-                    self.session.commit()
-                    self.session.expire_all()
-                # else: ignore
+        # Delete detection: en un sync completo contra los registros traídos;
+        # en incremental, reconciliación periódica sólo de IDs.
+        self._finish_incremental(
+            "product.product",
+            Product,
+            last,
+            started,
+            records,
+            domain=[["type", "!=", "service"]],
+            delete_policy=delete_policy if delete_policy in ("mark_inactive", "delete") else None,
+        )
 
     def sync_boms(self):
+        since, started = self._begin_incremental("mrp.bom")
         records = self._fetch_in_batches(
-            "mrp.bom", ["id", "product_id", "product_qty", "product_uom_id"]
+            "mrp.bom",
+            ["id", "product_id", "product_tmpl_id", "product_qty", "product_uom_id", "write_date"],
+            since=since,
         )
-        product_map = self._id_map(Product)
-        uom_map = self._id_map(UnitOfMeasure)
+        product_ids = self._resolve_m2o(Product, records, "product_id")
+        uom_ids = self._resolve_m2o(UnitOfMeasure, records, "product_uom_id")
         data = [
             {
                 "odoo_id": rec["id"],
-                "product_id": product_map.get(rec["product_id"][0]) if rec.get("product_id") else None,
+                "product_id": product_id,
+                # ID de plantilla en Odoo: las BOMs por plantilla no tienen product_id
+                "product_tmpl_id": rec["product_tmpl_id"][0] if rec.get("product_tmpl_id") else None,
                 "product_qty": rec.get("product_qty", 0),
-                "uom_id": uom_map.get(rec["product_uom_id"][0])
-                if rec.get("product_uom_id")
-                else None,
+                "uom_id": uom_id,
+                # search_read sólo devuelve BOMs activas; las archivadas se
+                # marcan inactivas al reconciliar.
+                "active": True,
+                "write_date": self._parse_write_date(rec.get("write_date")),
             }
-            for rec in records
+            for rec, product_id, uom_id in zip(records, product_ids, uom_ids)
         ]
         self._upsert(Bom, data)
+        self._finish_incremental("mrp.bom", Bom, since, started, records, delete_policy="mark_inactive")
         logger.info("✅ Synced %d BOMs", len(data))
 
     def sync_bom_lines(self):
+        since, started = self._begin_incremental("mrp.bom.line")
         records = self._fetch_in_batches(
             "mrp.bom.line",
-            ["id", "bom_id", "product_id", "product_qty", "product_uom_id"],
+            ["id", "bom_id", "product_id", "product_qty", "product_uom_id", "write_date"],
+            since=since,
         )
-        bom_map = self._id_map(Bom)
-        product_map = self._id_map(Product)
-        uom_map = self._id_map(UnitOfMeasure)
+        bom_ids = self._resolve_m2o(Bom, records, "bom_id")
+        product_ids = self._resolve_m2o(Product, records, "product_id")
         data = [
             {
                 "odoo_id": rec["id"],
-                "bom_id": bom_map.get(rec["bom_id"][0]) if rec.get("bom_id") else None,
-                "component_product_id": product_map.get(rec["product_id"][0]) if rec.get("product_id") else None,
+                "bom_id": bom_id,
+                "component_product_id": product_id,
                 "product_qty": rec.get("product_qty", 0),
                 # Nota: el modelo BomLine no tiene columna product_uom_id, por eso no la persistimos
+                "write_date": self._parse_write_date(rec.get("write_date")),
             }
-            for rec in records
+            for rec, bom_id, product_id in zip(records, bom_ids, product_ids)
         ]
         self._upsert(BomLine, data)
+        self._finish_incremental("mrp.bom.line", BomLine, since, started, records)
         logger.info("✅ Synced %d BOM Lines", len(data))
 
     @staticmethod
@@ -469,6 +828,7 @@ class SyncManager:
         return None
 
     def sync_production_orders(self):
+        since, started = self._begin_incremental("mrp.production")
         records = self._fetch_in_batches(
             "mrp.production",
             [
@@ -479,41 +839,48 @@ class SyncManager:
                 "date_start",
                 "date_finished",
                 "state",
+                "write_date",
             ],
+            since=since,
         )
-        product_map = self._id_map(Product)
+        product_ids = self._resolve_m2o(Product, records, "product_id")
         data = [
             {
                 "odoo_id": rec["id"],
-                "product_id": product_map.get(rec["product_id"][0]) if rec.get("product_id") else None,
+                "product_id": product_id,
                 "product_qty": rec.get("product_qty", 0),
                 "state": rec.get("state"),
                 "date_planned_start": rec.get("date_start"),
                 "date_planned_finished": rec.get("date_finished"),
                 "origin": self._parse_mo_origin(rec.get("name") or None),
+                "write_date": self._parse_write_date(rec.get("write_date")),
             }
-            for rec in records
+            for rec, product_id in zip(records, product_ids)
         ]
         self._upsert(ProductionOrder, data)
+        self._finish_incremental("mrp.production", ProductionOrder, since, started, records)
         logger.info("✅ Synced %d Production Orders", len(data))
 
     def sync_inventory_quants(self):
+        since, started = self._begin_incremental("stock.quant")
         records = self._fetch_in_batches(
-            "stock.quant", ["id", "product_id", "location_id", "quantity"]
+            "stock.quant", ["id", "product_id", "location_id", "quantity", "write_date"], since=since
         )
-        product_map = self._id_map(Product)
+        product_ids = self._resolve_m2o(Product, records, "product_id")
         data = [
             {
                 "odoo_id": rec["id"],
-                "product_id": product_map.get(rec["product_id"][0]) if rec.get("product_id") else None,
+                "product_id": product_id,
                 "location_id": rec["location_id"][0]
                 if rec.get("location_id")
                 else None,
                 "quantity": rec.get("quantity", 0),
+                "write_date": self._parse_write_date(rec.get("write_date")),
             }
-            for rec in records
+            for rec, product_id in zip(records, product_ids)
         ]
         self._upsert(InventoryQuant, data)
+        self._finish_incremental("stock.quant", InventoryQuant, since, started, records)
         logger.info("✅ Synced %d Inventory Quants", len(data))
 
     def record_daily_stock_history(self, snapshot_date=None):
@@ -562,98 +929,119 @@ class SyncManager:
 
     def sync_sale_orders(self):
         # Excluir cotizaciones (draft/sent) y cancelados
+        domain = [["state", "not in", ["draft", "sent", "cancel"]]]
+        since, started = self._begin_incremental("sale.order")
         records = self._fetch_in_batches(
             "sale.order",
             ["id", "partner_id", "date_order", "amount_total", "state", "write_date"],
-            domain=[["state", "not in", ["draft", "sent", "cancel"]]],
+            domain=domain,
+            since=since,
         )
-        partner_map = self._id_map(Partner)
+        partner_ids = self._resolve_m2o(Partner, records, "partner_id", remap=self.partner_remote_to_canonical)
         data = [
             {
                 "odoo_id": rec["id"],
-                "partner_id": (
-                    partner_map.get(
-                        self.partner_remote_to_canonical.get(rec["partner_id"][0], rec["partner_id"][0])
-                    )
-                    if rec.get("partner_id")
-                    else None
-                ),
+                "partner_id": partner_id,
                 "date_order": rec.get("date_order"),
                 "amount_total": rec.get("amount_total", 0),
                 "state": rec.get("state"),
                 "write_date": self._parse_write_date(rec.get("write_date")),
             }
-            for rec in records
+            for rec, partner_id in zip(records, partner_ids)
         ]
         self._upsert(SaleOrder, data)
+        # Una orden cancelada deja de cumplir el dominio: al reconciliar se
+        # borra junto con sus líneas locales.
+        self._finish_incremental(
+            "sale.order",
+            SaleOrder,
+            since,
+            started,
+            records,
+            domain=domain,
+            children=[(SaleOrderLine, "order_id")],
+        )
         logger.info("✅ Synced %d Sale Orders", len(data))
 
     def sync_sale_order_lines(self):
         # Excluir líneas pertenecientes a cotizaciones o canceladas
+        domain = [["state", "not in", ["draft", "sent", "cancel"]]]
+        since, started = self._begin_incremental("sale.order.line")
         records = self._fetch_in_batches(
             "sale.order.line",
             ["id", "order_id", "product_id", "product_uom_qty", "price_unit", "state", "write_date"],
-            domain=[["state", "not in", ["draft", "sent", "cancel"]]],
+            domain=domain,
+            since=since,
         )
-        order_map = self._id_map(SaleOrder)
-        product_map = self._id_map(Product)
+        order_ids = self._resolve_m2o(SaleOrder, records, "order_id")
+        product_ids = self._resolve_m2o(Product, records, "product_id")
         data = [
             {
                 "odoo_id": rec["id"],
-                "order_id": order_map.get(rec["order_id"][0]) if rec.get("order_id") else None,
-                "product_id": product_map.get(rec["product_id"][0]) if rec.get("product_id") else None,
+                "order_id": order_id,
+                "product_id": product_id,
                 "quantity": rec.get("product_uom_qty", 0),
                 "unit_price": rec.get("price_unit", 0),
                 "write_date": self._parse_write_date(rec.get("write_date")),
             }
-            for rec in records
+            for rec, order_id, product_id in zip(records, order_ids, product_ids)
         ]
         self._upsert(SaleOrderLine, data)
+        self._finish_incremental("sale.order.line", SaleOrderLine, since, started, records, domain=domain)
         logger.info("✅ Synced %d Sale Order Lines", len(data))
 
     def sync_purchase_orders(self):
+        since, started = self._begin_incremental("purchase.order")
         records = self._fetch_in_batches(
             "purchase.order",
-            ["id", "partner_id", "date_order", "amount_total", "state"],
+            ["id", "partner_id", "date_order", "amount_total", "state", "write_date"],
+            since=since,
         )
-        partner_map = self._id_map(Partner)
+        partner_ids = self._resolve_m2o(Partner, records, "partner_id", remap=self.partner_remote_to_canonical)
         data = [
             {
                 "odoo_id": rec["id"],
-                "partner_id": (
-                    partner_map.get(
-                        self.partner_remote_to_canonical.get(rec["partner_id"][0], rec["partner_id"][0])
-                    )
-                    if rec.get("partner_id")
-                    else None
-                ),
+                "partner_id": partner_id,
                 "date_order": rec.get("date_order"),
                 "amount_total": rec.get("amount_total", 0),
                 "state": rec.get("state"),
+                "write_date": self._parse_write_date(rec.get("write_date")),
             }
-            for rec in records
+            for rec, partner_id in zip(records, partner_ids)
         ]
         self._upsert(PurchaseOrder, data)
+        self._finish_incremental(
+            "purchase.order",
+            PurchaseOrder,
+            since,
+            started,
+            records,
+            children=[(PurchaseOrderLine, "order_id")],
+        )
         logger.info("✅ Synced %d Purchase Orders", len(data))
 
     def sync_purchase_order_lines(self):
+        since, started = self._begin_incremental("purchase.order.line")
         records = self._fetch_in_batches(
             "purchase.order.line",
-            ["id", "order_id", "product_id", "product_qty", "price_unit"],
+            ["id", "order_id", "product_id", "product_qty", "price_unit", "write_date"],
+            since=since,
         )
-        order_map = self._id_map(PurchaseOrder)
-        product_map = self._id_map(Product)
+        order_ids = self._resolve_m2o(PurchaseOrder, records, "order_id")
+        product_ids = self._resolve_m2o(Product, records, "product_id")
         data = [
             {
                 "odoo_id": rec["id"],
-                "order_id": order_map.get(rec["order_id"][0]) if rec.get("order_id") else None,
-                "product_id": product_map.get(rec["product_id"][0]) if rec.get("product_id") else None,
+                "order_id": order_id,
+                "product_id": product_id,
                 "quantity": rec.get("product_qty", 0),
                 "unit_price": rec.get("price_unit", 0),
+                "write_date": self._parse_write_date(rec.get("write_date")),
             }
-            for rec in records
+            for rec, order_id, product_id in zip(records, order_ids, product_ids)
         ]
         self._upsert(PurchaseOrderLine, data)
+        self._finish_incremental("purchase.order.line", PurchaseOrderLine, since, started, records)
         logger.info("✅ Synced %d Purchase Order Lines", len(data))
 
     # ------------------------
@@ -677,30 +1065,127 @@ class SyncManager:
     # ------------------------
     # Embeddings population (post-sync)
     # ------------------------
+    def _insert_embeddings(self, vectors, hashes, model, dimension):
+        """Inserta los vectores (un INSERT ... RETURNING) y devuelve sus ids en orden."""
+        if not vectors:
+            return []
+        embedding_table = ProductEmbedding.__table__
+        inserted = self.session.execute(
+            embedding_table.insert().returning(embedding_table.c.id, sort_by_parameter_order=True),
+            [
+                {"vector": vec, "model": model, "dimension": dimension, "content_hash": content_hash}
+                for vec, content_hash in zip(vectors, hashes)
+            ],
+        ).all()
+        return [row[0] for row in inserted]
+
+    def _link_embeddings(self, pairs):
+        """Enlaza `(product_id, embedding_id)` con una sentencia y un commit."""
+        if not pairs:
+            return
+        product_table = Product.__table__
+        if getattr(self.session.bind.dialect, "name", None) == "postgresql":
+            links = sa_values(
+                column("product_id", Integer), column("embedding_id", Integer), name="links"
+            ).data(pairs)
+            self.session.execute(
+                update(product_table)
+                .where(product_table.c.id == links.c.product_id)
+                .values(embedding_id=links.c.embedding_id)
+            )
+        else:
+            # sqlite no acepta VALUES con alias de columnas: executemany del UPDATE
+            self.session.execute(
+                update(product_table)
+                .where(product_table.c.id == bindparam("pid"))
+                .values(embedding_id=bindparam("eid")),
+                [{"pid": pid, "eid": eid} for pid, eid in pairs],
+            )
+        self.session.commit()
+        # Los Product ya cargados en la sesión deben ver el nuevo embedding_id
+        self.session.expire_all()
+
+    def _cached_embedding_ids(self, model, hashes):
+        """`{content_hash: embedding_id}` de los textos que ya tienen vector para `model`."""
+        cached = {}
+        hashes = list(hashes)
+        for i in range(0, len(hashes), 500):
+            rows = self.session.execute(
+                select(ProductEmbedding.content_hash, func.min(ProductEmbedding.id))
+                .where(
+                    ProductEmbedding.model == model,
+                    ProductEmbedding.content_hash.in_(hashes[i : i + 500]),
+                )
+                .group_by(ProductEmbedding.content_hash)
+            ).all()
+            cached.update({content_hash: embedding_id for content_hash, embedding_id in rows})
+        return cached
+
+    def _pending_embedding_texts(self, model):
+        """Agrupa por hash de contenido los productos cuyo embedding falta o quedó viejo.
+
+        Un producto está al día si su embedding es del mismo modelo y su
+        `content_hash` coincide con el del nombre actual. Un embedding sin
+        `content_hash` se considera viejo: la migración lo completa con
+        `backfill_embedding_content_hashes` para no re-embeber el catálogo.
+        """
+        rows = self.session.execute(
+            select(Product.id, Product.name, Product.embedding_id, ProductEmbedding.model, ProductEmbedding.content_hash)
+            .outerjoin(ProductEmbedding, Product.embedding_id == ProductEmbedding.id)
+            .where(Product.name.isnot(None))
+            .order_by(Product.id)
+        ).all()
+        pending = {}
+        for product_id, name, embedding_id, embedding_model, embedding_hash in rows:
+            text_ = normalize_embedding_text(name)
+            if not text_:
+                continue
+            content_hash = embedding_content_hash(text_)
+            if embedding_id is not None and embedding_hash == content_hash and embedding_model == model:
+                continue
+            pending.setdefault(content_hash, (text_, []))[1].append(product_id)
+        return pending
+
     def populate_product_embeddings(self, model: str = "text-embedding-3-small", batch_size: int = 100):
         """
-        Generate embeddings for all products with NULL embedding_id using product name.
+        Generate embeddings for products whose name has no up-to-date embedding.
 
+        - Embeddings are content-addressed by (model, sha256 of the normalized
+          name): a product whose name didn't change keeps its embedding, and a
+          name already embedded (another product, or a previous name) reuses
+          the stored row. Only texts never seen before go to OpenAI, so an
+          incremental sync that only touched prices makes zero requests.
         - Creates rows in product_embedding with the generated vector and metadata
-        - Updates product.embedding_id to reference the newly created embedding row
+          (one multi-row INSERT ... RETURNING id per batch)
+        - Updates product.embedding_id to reference the embedding row
+          (one UPDATE ... FROM (VALUES ...) per batch)
+        - The OpenAI request for the next batch runs while the current one is
+          written, so a full re-embed is bound by the API, not by the DB
         """
         logger.info("🧠 Populating product embeddings (post-sync)...")
 
-        # Fetch target products
-        rows = self.session.execute(
-            select(Product.id, Product.name).where(
-                Product.name.isnot(None), Product.embedding_id.is_(None)
-            )
-        ).all()
-
-        if not rows:
+        pending = self._pending_embedding_texts(model)
+        if not pending:
             logger.info("No products pending embedding population.")
             return
 
+        # Textos ya embebidos: sólo enlazar
+        cached = self._cached_embedding_ids(model, pending)
+        reused = [(pid, cached[h]) for h, (_, product_ids) in pending.items() if h in cached for pid in product_ids]
+        self._link_embeddings(reused)
+        misses = [(h, text_, product_ids) for h, (text_, product_ids) in pending.items() if h not in cached]
+        logger.info(
+            f"Embedding cache: {len(reused)} products reused a stored vector, "
+            f"{len(misses)} distinct texts to embed"
+        )
+        self._embedding_tokens_total = 0
+        if not misses:
+            return
+
         gen = EmbeddingGenerator(model=model)
         dimension = gen.get_embedding_dimension()
 
-        total = len(rows)
+        total = sum(len(product_ids) for _, _, product_ids in misses)
         processed = 0
         total_tokens = 0
         # prepare tokenizer for token counting (tiktoken)
@@ -717,51 +1202,53 @@ class SyncManager:
         # initialize embedding progress at 0%
         pretty.progress("Embedding batches", 0, total, progress_id="embeddings")
 
-        for i in range(0, total, batch_size):
-            batch = rows[i : i + batch_size]
-            product_ids = [r[0] for r in batch]
-            texts = [r[1] or "" for r in batch]
-
-            # Count tokens for this batch using tiktoken when available
-            if enc is not None:
-                try:
-                    batch_tokens = sum(len(enc.encode(t)) for t in texts)
-                except Exception:
+        # Un texto repetido en varios productos se pide una sola vez
+        batches = [misses[i : i + batch_size] for i in range(0, len(misses), batch_size)]
+        total_batches = len(batches)
+
+        def texts_of(batch):
+            return [text_ for _, text_, _ in batch]
+
+        # Un solo hilo extra: pide a OpenAI el lote siguiente mientras se escribe
+        # el actual. La sesión sólo se usa desde este hilo.
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="embeddings") as executor:
+            pending_batch = executor.submit(gen.generate, texts_of(batches[0]))
+            for batch_idx, batch in enumerate(batches):
+                texts = texts_of(batch)
+                embeddings = pending_batch.result()
+                if batch_idx + 1 < total_batches:
+                    pending_batch = executor.submit(gen.generate, texts_of(batches[batch_idx + 1]))
+
+                # Count tokens for this batch using tiktoken when available
+                if enc is not None:
+                    try:
+                        batch_tokens = sum(len(enc.encode(t)) for t in texts)
+                    except Exception:
+                        batch_tokens = sum(max(1, len(t) // 4) for t in texts)
+                else:
                     batch_tokens = sum(max(1, len(t) // 4) for t in texts)
-            else:
-                batch_tokens = sum(max(1, len(t) // 4) for t in texts)
-            total_tokens += batch_tokens
+                total_tokens += batch_tokens
 
-            # Generate embeddings outside of autoflush to avoid flushing pending objects
-            with self.session.no_autoflush:
-                embeddings = gen.generate(texts)
-                if not embeddings or len(embeddings) != len(product_ids):
+                if len(embeddings) != len(batch):
                     raise RuntimeError("Embedding generation size mismatch with product batch")
 
-                # Insert embeddings and link back to products
-                embedding_objs = []
-                for vec in embeddings:
-                    embedding_objs.append(
-                        ProductEmbedding(vector=vec, model=model, dimension=dimension)
-                    )
-                self.session.add_all(embedding_objs)
-
-            # Assign IDs and update products (flush allowed here)
-            self.session.flush()
-
-            for pid, emb_obj in zip(product_ids, embedding_objs):
-                prod = self.session.get(Product, pid)
-                if prod is not None:
-                    prod.embedding_id = emb_obj.id
-                    self.session.add(prod)
-
-            self.session.commit()
-            processed += len(batch)
-
-            # Update pretty progress bar (showing processed products and current batch size)
-            current_batch_idx = i//batch_size + 1
-            total_batches = total//batch_size + 1
-            pretty.progress(f"Embedding batches - ({current_batch_idx}/{total_batches})", processed, total, progress_id="embeddings")
+                # generate() es posicional: None sólo si el texto no se envió
+                embedded = [(entry, vec) for entry, vec in zip(batch, embeddings) if vec is not None]
+                embedding_ids = self._insert_embeddings(
+                    [vec for _, vec in embedded], [entry[0] for entry, _ in embedded], model, dimension
+                )
+                self._link_embeddings(
+                    [(pid, eid) for ((_, _, product_ids), _), eid in zip(embedded, embedding_ids) for pid in product_ids]
+                )
+                processed += sum(len(product_ids) for _, _, product_ids in batch)
+
+                # Update pretty progress bar (showing processed products and current batch size)
+                pretty.progress(
+                    f"Embedding batches - ({batch_idx + 1}/{total_batches})",
+                    processed,
+                    total,
+                    progress_id="embeddings",
+                )
 
         pretty.progress("Embedding batches", processed, total, progress_id="embeddings")
         pretty.success("🧠 Product embeddings population completed", processed=processed)
@@ -1,7 +1,10 @@
 from odoo_engine.utils.odoo_client import OdooClient
 from odoo_engine.utils.psql_client import get_pg_dsn
+from odoo_engine.utils.bom_explosion import BomExplosion, BomCycleError
 
 __all__ = [
     "OdooClient",
-    "get_pg_dsn"
-]
\ No newline at end of file
+    "get_pg_dsn",
+    "BomExplosion",
+    "BomCycleError",
+]
@@ -0,0 +1,152 @@
+"""Explosión de BOMs multinivel sobre el espejo local (`bom` / `bom_line`).
+
+Permite a planificación calcular materias primas por producto terminado sin
+consultar Odoo. La estructura completa de BOMs se carga con dos consultas y se
+explota en memoria: cada subensamble se expande una sola vez (memoización)
+aunque lo usen miles de productos, y los ciclos se detectan y reportan.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from odoo_engine.sync_manager.models import Bom, BomLine, Product
+
+
+class BomCycleError(ValueError):
+    """Las BOMs forman un ciclo (un producto termina consumiéndose a sí mismo)."""
+
+    def __init__(self, cycle: list):
+        self.cycle = list(cycle)
+        super().__init__("BOM cycle: " + " -> ".join(str(node) for node in self.cycle))
+
+
+class BomExplosion:
+    """Explota BOMs del espejo hasta sus componentes hoja.
+
+    Selección de BOM por producto, igual que `mrp.bom._bom_find` en Odoo: una
+    BOM propia de la variante tiene prioridad sobre una BOM de la plantilla, y
+    entre varias candidatas gana la de menor `odoo_id`. Las cantidades de
+    línea se normalizan por la cantidad que produce la BOM (`product_qty`),
+    así que los resultados son por unidad del producto. No se convierten
+    unidades de medida.
+
+    Uso:
+        explosion = BomExplosion(session)
+        explosion.explode_skus(["5958", "5959"])
+        # {"5958": {"MP100": 0.25, "MP014": 1.0}, ...}
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._structure: dict[int, list[tuple[int, float]]] | None = None
+        self._sku_by_id: dict[int, str | None] = {}
+        self._id_by_sku: dict[str, int] = {}
+        self._memo: dict[int, dict[int, float]] = {}
+
+    def load(self) -> None:
+        """Carga productos y BOMs activas del espejo y arma el grafo producto -> líneas."""
+        products = self.session.execute(
+            select(Product.id, Product.default_code, Product.product_tmpl_id)
+        ).all()
+        self._sku_by_id = {pid: sku for pid, sku, _ in products}
+        self._id_by_sku = {}
+        for pid, sku, _ in sorted(products, key=lambda row: row[0]):
+            if sku:
+                self._id_by_sku.setdefault(sku, pid)
+
+        rows = self.session.execute(
+            select(
+                Bom.id,
+                Bom.product_id,
+                Bom.product_tmpl_id,
+                Bom.product_qty,
+                BomLine.component_product_id,
+                BomLine.product_qty,
+            )
+            .join(BomLine, BomLine.bom_id == Bom.id)
+            .where(Bom.active.is_not(False))
+            .order_by(Bom.odoo_id, BomLine.sequence, BomLine.odoo_id)
+        ).all()
+
+        lines_by_bom: dict[int, list[tuple[int, float]]] = {}
+        variant_bom: dict[int, int] = {}
+        template_bom: dict[int, int] = {}
+        for bom_id, product_id, tmpl_id, bom_qty, component_id, line_qty in rows:
+            if component_id is None:
+                continue
+            per_unit = float(line_qty or 0) / float(bom_qty or 1)
+            lines_by_bom.setdefault(bom_id, []).append((component_id, per_unit))
+            # Filas ordenadas por odoo_id: la primera BOM vista es la de menor odoo_id
+            if product_id is not None:
+                variant_bom.setdefault(product_id, bom_id)
+            elif tmpl_id is not None:
+                template_bom.setdefault(tmpl_id, bom_id)
+
+        structure = {}
+        for pid, _, tmpl_id in products:
+            bom_id = variant_bom.get(pid)
+            if bom_id is None and tmpl_id is not None:
+                bom_id = template_bom.get(tmpl_id)
+            if bom_id is not None:
+                structure[pid] = lines_by_bom[bom_id]
+        self._structure = structure
+        self._memo = {}
+
+    def explode_ids(self, product_ids: list[int]) -> dict[int, dict[int, float]]:
+        """Explota por ID local de producto: {producto: {hoja: cantidad por unidad}}."""
+        if self._structure is None:
+            self.load()
+        return {pid: self._explode(pid) for pid in product_ids}
+
+    def explode_skus(self, skus: list[str]) -> dict[str, dict[str, float]]:
+        """Explota por SKU. Un SKU desconocido devuelve {}; uno sin BOM es su propia hoja.
+
+        Las hojas sin `default_code` se identifican por su ID local.
+        """
+        if self._structure is None:
+            self.load()
+        result = {}
+        for sku in skus:
+            pid = self._id_by_sku.get(sku)
+            if pid is None:
+                result[sku] = {}
+                continue
+            result[sku] = {
+                self._sku_by_id.get(leaf) or leaf: qty
+                for leaf, qty in self._explode(pid).items()
+            }
+        return result
+
+    def _explode(self, root: int) -> dict[int, float]:
+        # DFS iterativo: BOMs muy profundas no chocan con el límite de recursión.
+        if root in self._memo:
+            return self._memo[root]
+        stack = [(root, iter(self._structure.get(root, ())))]
+        path = [root]
+        on_path = {root}
+        while stack:
+            node, pending = stack[-1]
+            advanced = False
+            for component, _ in pending:
+                if component in self._memo or component not in self._structure:
+                    continue
+                if component in on_path:
+                    raise BomCycleError(path[path.index(component):] + [component])
+                stack.append((component, iter(self._structure[component])))
+                path.append(component)
+                on_path.add(component)
+                advanced = True
+                break
+            if advanced:
+                continue
+            # Todos los hijos de `node` ya están resueltos.
+            vector: dict[int, float] = {}
+            for component, qty in self._structure.get(node, ()):
+                child = self._memo.get(component, {component: 1.0})
+                for leaf, leaf_qty in child.items():
+                    vector[leaf] = vector.get(leaf, 0.0) + qty * leaf_qty
+            self._memo[node] = vector if node in self._structure else {node: 1.0}
+            stack.pop()
+            path.pop()
+            on_path.discard(node)
+        return self._memo[root]
@@ -10,6 +10,45 @@ from odoo_engine.config import secrets
 logger = logging.getLogger(__name__)
 
 
+def iter_keyset_pages(search_read, model, domain=None, fields=None, page_size=5000, after_id=0):
+    """Recorre `search_read` por páginas usando el id como cursor (keyset).
+
+    En vez de `offset` (que Odoo traduce a `OFFSET n` y obliga a recorrer las
+    n filas anteriores), cada página pide `id > último id visto ORDER BY id`.
+    Así todas las páginas cuestan lo mismo y las escrituras concurrentes no
+    hacen saltar ni duplicar registros entre páginas.
+
+    Args:
+        search_read: Callable con la firma de `OdooClient.search_read`.
+        model: Modelo de Odoo.
+        domain: Dominio adicional (se combina con AND).
+        fields: Campos a leer; `id` se agrega si falta.
+        page_size: Registros por página.
+        after_id: Empezar después de este id.
+
+    Yields:
+        Listas de registros, en orden creciente de id.
+    """
+    domain = list(domain or [])
+    if fields and "id" not in fields:
+        fields = ["id", *fields]
+    last_id = after_id
+    while True:
+        page = search_read(
+            model,
+            domain=[("id", ">", last_id)] + domain,
+            fields=fields,
+            limit=page_size,
+            order="id",
+        )
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"]
+
+
 class OdooClient:
     """Wrapper de odoorpc con parseo robusto de URL, timeout y reintentos."""
 
@@ -71,6 +110,10 @@ class OdooClient:
             domain, fields=fields, offset=offset, limit=limit, order=order
         )
 
+    def iter_search_read(self, model, domain=None, fields=None, page_size=5000):
+        """Itera páginas de `search_read` con paginación keyset (ver `iter_keyset_pages`)."""
+        return iter_keyset_pages(self.search_read, model, domain, fields, page_size)
+
     def read(self, model, ids, fields=None):
         """Read records by ID."""
         return self.odoo.env[model].read(ids, fields=fields or [])
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from odoo_engine.sync_manager.models import Base, Bom, BomLine, Product
+from odoo_engine.utils.bom_explosion import BomCycleError, BomExplosion
+
+
+@pytest.fixture
+def in_memory_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    return Session()
+
+
+def _product(session, pid, sku, tmpl_id=None):
+    session.add(Product(id=pid, odoo_id=1000 + pid, default_code=sku, name=sku, product_tmpl_id=tmpl_id or pid))
+
+
+def _bom(session, bom_id, lines, product_id=None, tmpl_id=None, qty=1.0):
+    session.add(Bom(id=bom_id, odoo_id=bom_id, product_id=product_id, product_tmpl_id=tmpl_id, product_qty=qty))
+    for seq, (component, line_qty) in enumerate(lines):
+        session.add(BomLine(odoo_id=bom_id * 100 + seq, bom_id=bom_id, component_product_id=component,
+                            product_qty=line_qty, sequence=seq))
+
+
+@pytest.fixture
+def catalog(in_memory_session):
+    s = in_memory_session
+    for pid, sku in enumerate(["FG1", "FG2", "SUB", "RAW1", "RAW2"], start=1):
+        _product(s, pid, sku)
+    # FG1 = 2 SUB + 1 RAW1 (BOM de variante)
+    _bom(s, 1, [(3, 2), (4, 1)], product_id=1, tmpl_id=1)
+    # SUB produce 2 unidades = 4 RAW2 + 1 RAW1 (BOM de plantilla)
+    _bom(s, 2, [(5, 4), (4, 1)], tmpl_id=3, qty=2)
+    # FG2 = 3 SUB (plantilla)
+    _bom(s, 3, [(3, 3)], tmpl_id=2)
+    s.commit()
+    return s
+
+
+def test_explodes_to_leaves_with_multiplied_quantities(catalog):
+    result = BomExplosion(catalog).explode_skus(["FG1", "FG2", "RAW1", "NOPE"])
+    assert result == {
+        "FG1": {"RAW2": 4.0, "RAW1": 2.0},
+        "FG2": {"RAW2": 6.0, "RAW1": 1.5},
+        "RAW1": {"RAW1": 1.0},
+        "NOPE": {},
+    }
+
+
+def test_variant_bom_wins_over_template_bom(catalog):
+    # BOM de plantilla para FG1 con menor odoo_id: la de variante (odoo_id=1) debe ganar igual
+    _bom(catalog, 0, [(5, 1)], tmpl_id=1)
+    catalog.commit()
+    assert BomExplosion(catalog).explode_skus(["FG1"])["FG1"] == {"RAW2": 4.0, "RAW1": 2.0}
+
+
+def test_detects_cycles(catalog):
+    _bom(catalog, 4, [(1, 1)], product_id=5, tmpl_id=5)  # RAW2 consume FG1
+    catalog.commit()
+    with pytest.raises(BomCycleError) as excinfo:
+        BomExplosion(catalog).explode_ids([1])
+    assert excinfo.value.cycle == [1, 3, 5, 1]
+
+
+def test_shared_subassembly_is_exploded_once(in_memory_session):
+    s = in_memory_session
+    _product(s, 1, "SUB")
+    _product(s, 2, "RAW")
+    _bom(s, 1, [(2, 3)], product_id=1)
+    n = 2000
+    for i in range(n):
+        pid = 10 + i
+        _product(s, pid, f"FG{i}")
+        _bom(s, 10 + i, [(1, 2)], product_id=pid)
+    s.commit()
+
+    explosion = BomExplosion(s)
+    result = explosion.explode_skus([f"FG{i}" for i in range(n)])
+    assert len(result) == n
+    assert all(vector == {"RAW": 6.0} for vector in result.values())
+    assert explosion._memo[1] == {2: 3.0}
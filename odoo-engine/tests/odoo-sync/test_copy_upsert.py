@@ -0,0 +1,76 @@
+import datetime
+import decimal
+import os
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from odoo_engine.sync_manager.models import Base, Partner, SaleOrderLine
+from odoo_engine.sync_manager.sync_manager import SyncManager, _copy_field
+
+
+def test_copy_field_distinguishes_null_from_empty_text():
+    fields = [None, "", 'a,"b\nc', True, datetime.datetime(2025, 1, 1), decimal.Decimal("1.5"), {"a": 1}]
+    assert ",".join(_copy_field(v) for v in fields) == (
+        ',"","a,""b\nc",True,2025-01-01 00:00:00,1.5,"{""a"": 1}"'
+    )
+
+
+def test_copy_flag_falls_back_to_chunks_outside_postgres():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    sync = SyncManager(session, MagicMock())
+
+    sync._upsert(SaleOrderLine, [{"odoo_id": 1, "quantity": 2}, {"odoo_id": 2, "quantity": 3}], copy=True)
+
+    assert session.query(SaleOrderLine).count() == 2
+
+
+def test_odoo_false_is_stored_as_null_outside_boolean_columns():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    sync = SyncManager(session, MagicMock())
+
+    sync._upsert(Partner, [{"odoo_id": 1, "name": "A", "email": False, "is_company": False}])
+
+    partner = session.query(Partner).one()
+    assert partner.email is None
+    assert partner.is_company is False
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not os.getenv("ODOO_ENGINE_TEST_DSN"), reason="requiere ODOO_ENGINE_TEST_DSN (Postgres desechable)")
+def test_copy_upsert_merges_into_postgres():
+    engine = create_engine(os.environ["ODOO_ENGINE_TEST_DSN"])
+    # product_embedding usa el tipo vector: pgvector debe existir antes de create_all
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    with Session() as session:
+        session.execute(text("TRUNCATE sale_order_line, partner CASCADE"))
+        session.commit()
+        sync = SyncManager(session, MagicMock())
+        id_map = sync._id_map(SaleOrderLine)
+
+        sync._upsert(SaleOrderLine, [{"odoo_id": 1, "quantity": 1}, {"odoo_id": 2, "quantity": 5}], copy=True)
+        # Clave repetida: gana la última fila; fila sin clave: se omite
+        sync._upsert(
+            SaleOrderLine,
+            [{"odoo_id": 1, "quantity": 7}, {"odoo_id": 1, "quantity": 9}, {"odoo_id": None, "quantity": 0}],
+            copy=True,
+        )
+
+        rows = dict(session.execute(text("SELECT odoo_id, quantity FROM sale_order_line")).all())
+        assert rows == {1: 9, 2: 5}
+        assert id_map.get(1) is not None and id_map.get(2) is not None
+
+        # Un False de Odoo en una columna de texto queda NULL por ambos caminos
+        sync._upsert(Partner, [{"odoo_id": 1, "email": False, "is_company": False}], copy=True)
+        sync._upsert(Partner, [{"odoo_id": 2, "email": False, "is_company": True}], copy=False)
+        rows = session.execute(text("SELECT odoo_id, email, is_company FROM partner ORDER BY odoo_id")).all()
+        assert [tuple(row) for row in rows] == [(1, None, False), (2, None, True)]
@@ -0,0 +1,76 @@
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from odoo_engine.sync_manager.embedding_generator import EmbeddingGenerator
+
+
+def _response(texts, shuffle=False):
+    data = [SimpleNamespace(index=i, embedding=[float(len(t)), float(i)]) for i, t in enumerate(texts)]
+    if shuffle:
+        random.shuffle(data)
+    return SimpleNamespace(data=data)
+
+
+class SlowFirstEmbeddings:
+    """El primer lote tarda más: con as_completed llegaría último."""
+
+    def __init__(self):
+        self.calls = []
+
+    def create(self, model, input):
+        self.calls.append(list(input))
+        if input[0] == "a":
+            time.sleep(0.05)
+        return _response(input, shuffle=True)
+
+
+class AsyncEmbeddings:
+    def __init__(self, delays):
+        self.delays = delays
+
+    async def create(self, model, input):
+        await asyncio.sleep(self.delays.get(input[0], 0))
+        return _response(input)
+
+
+def make_generator(batch_size=2):
+    gen = EmbeddingGenerator(api_key="test-key")
+    gen.max_batch_size = batch_size
+    return gen
+
+
+def test_generate_is_aligned_with_inputs_and_marks_skipped():
+    gen = make_generator()
+    gen.client = SimpleNamespace(embeddings=SlowFirstEmbeddings())
+    texts = ["a", "", "ccc", None, "ee", "  ", "gggg"]
+
+    vectors = gen.generate(texts)
+
+    assert len(vectors) == len(texts)
+    assert [v if v is None else v[0] for v in vectors] == [1.0, None, 3.0, None, 2.0, None, 4.0]
+    assert gen.client.embeddings.calls[0] == ["a", "ccc"]
+
+
+def test_generate_without_valid_texts_returns_nones():
+    gen = make_generator()
+    assert gen.generate([]) == []
+    assert gen.generate(["", None]) == [None, None]
+
+
+def test_generate_stream_yields_every_index_in_completion_order():
+    gen = make_generator()
+    gen._async_client = SimpleNamespace(embeddings=AsyncEmbeddings({"a": 0.05}))
+    texts = ["a", "bb", "", "dddd", "eeeee"]
+
+    async def collect():
+        return [pair async for pair in gen.generate_stream(texts)]
+
+    pairs = asyncio.run(collect())
+
+    assert sorted(i for i, _ in pairs) == list(range(len(texts)))
+    assert pairs[0] == (2, None)
+    # El lote lento ("a", "bb") llega después de los otros
+    assert [i for i, _ in pairs[1:]] == [3, 4, 0, 1]
+    assert {i: v[0] for i, v in pairs if v is not None} == {0: 1.0, 1: 2.0, 3: 4.0, 4: 5.0}
@@ -0,0 +1,36 @@
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex
+
+from odoo_engine.db_client import ProductEmbeddingSearch
+from odoo_engine.sync_manager.models import Base, Product, ProductEmbedding
+
+
+def test_vector_column_round_trips_as_floats():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    embedding = ProductEmbedding(vector=[0.25, -1, 3e-05], model="m", dimension=3)
+    session.add(embedding)
+    session.commit()
+    session.expire_all()
+
+    assert session.get(ProductEmbedding, embedding.id).vector == [0.25, -1.0, 3e-05]
+
+
+def test_nearest_query_orders_by_cosine_distance_with_limit():
+    search = ProductEmbeddingSearch(session=None, ef_search=80)
+    stmt = search._query([0.1, 0.2], limit=5, active_only=True, exclude_product_id=7)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "product_embedding.vector <=> %(vector_1)s AS distance" in sql
+    assert "ORDER BY distance" in sql and "LIMIT" in sql
+    assert "product.active IS NOT false" in sql
+    assert "product.id != " in sql
+
+
+def test_hnsw_index_is_declared():
+    index = next(i for i in ProductEmbedding.__table__.indexes if i.name == "idx_product_embedding_vector_hnsw")
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    assert "USING hnsw (vector vector_cosine_ops)" in ddl
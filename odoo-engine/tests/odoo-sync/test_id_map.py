@@ -0,0 +1,68 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from odoo_engine.sync_manager.id_map import IdMap
+from odoo_engine.sync_manager.models import Base, Bom, Product
+from odoo_engine.sync_manager.sync_manager import SyncManager
+
+
+@pytest.fixture
+def in_memory_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    return Session()
+
+
+def test_id_map_resolve_update_and_discard():
+    id_map = IdMap([30, 10, 20], [3, 1, 2])
+    assert id_map.resolve([10, None, 99, 30]) == [1, None, None, 3]
+
+    id_map.update([(20, 22), (5, 50), (40, 4)])
+    assert len(id_map) == 5
+    assert id_map.resolve([5, 10, 20, 30, 40]) == [50, 1, 22, 3, 4]
+
+    id_map.discard([10, 40])
+    assert 10 not in id_map
+    assert id_map.get(40, "missing") == "missing"
+    assert id_map.resolve([5, 20, 30]) == [50, 22, 3]
+
+
+def test_empty_id_map():
+    id_map = IdMap()
+    assert id_map.resolve([1, 2]) == [None, None]
+    id_map.update([(7, 70)])
+    assert id_map.get(7) == 70
+
+
+def test_sync_reuses_cached_map_updated_by_upserts(in_memory_session, monkeypatch):
+    in_memory_session.add(Product(odoo_id=1, name="A"))
+    in_memory_session.commit()
+    records = {
+        "product.product": [{"id": 1, "name": "A"}, {"id": 2, "name": "B"}],
+        "mrp.bom": [{"id": 100, "product_id": [2, "B"]}],
+    }
+    client = MagicMock()
+    client.search_read = MagicMock(side_effect=lambda model, **kwargs: records.get(model, []))
+    client.get_product_variant_attributes = MagicMock(return_value={})
+
+    loads = []
+    original_load = IdMap.load.__func__
+
+    def counting_load(cls, session, model):
+        loads.append(model)
+        return original_load(cls, session, model)
+
+    monkeypatch.setattr(IdMap, "load", classmethod(counting_load))
+
+    sync = SyncManager(in_memory_session, client)
+    sync._id_map(Product)  # cargado antes del UPSERT: debe mantenerse al día
+    sync.sync_products()
+    sync.sync_boms()
+
+    product_b = in_memory_session.query(Product).filter_by(odoo_id=2).one()
+    assert in_memory_session.query(Bom).one().product_id == product_b.id
+    assert loads.count(Product) == 1
@@ -2,7 +2,7 @@ import pytest
 from unittest.mock import MagicMock
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from odoo_engine.sync_manager.models import Base, Product, SyncState
+from odoo_engine.sync_manager.models import Base, Partner, Product, SaleOrder, SaleOrderLine, SyncState
 from odoo_engine.sync_manager.sync_manager import SyncManager
 import datetime
 
@@ -51,3 +51,113 @@ def test_incremental_sync_subsequent_load(in_memory_session):
     client.search_read.assert_called()
     prods = in_memory_session.query(Product).filter_by(odoo_id=12).all()
     assert len(prods) == 1
+
+
+def make_domain_client(records_by_model):
+    """Cliente falso que evalúa los dominios simples que arma SyncManager."""
+    ops = {
+        ">": lambda a, b: a is not None and a > b,
+        "in": lambda a, b: a in b,
+        "not in": lambda a, b: a not in b,
+        "!=": lambda a, b: a != b,
+    }
+
+    def search_read(model, domain=None, fields=None, limit=None, offset=0, order=None):
+        rows = [
+            rec for rec in records_by_model.get(model, [])
+            if all(ops[op](rec.get(field), value) for field, op, value in (domain or []))
+        ]
+        rows.sort(key=lambda rec: rec["id"])
+        return [{f: rec.get(f) for f in fields} for rec in rows[offset:offset + (limit or len(rows))]]
+
+    client = MagicMock()
+    client.search_read = MagicMock(side_effect=search_read)
+    return client
+
+
+def _domains(client, model):
+    return [call.kwargs.get("domain") or call.args[1] for call in client.search_read.call_args_list
+            if (call.kwargs.get("model") or call.args[0]) == model]
+
+
+def test_sale_orders_incremental_uses_watermark(in_memory_session):
+    in_memory_session.add(SyncState(model_name="sale.order", last_synced=datetime.datetime(2025, 1, 2)))
+    in_memory_session.commit()
+    client = make_domain_client({"sale.order": [
+        {"id": 1, "state": "sale", "amount_total": 10, "write_date": "2025-01-01 00:00:00"},
+        {"id": 2, "state": "sale", "amount_total": 20, "write_date": "2025-01-03 00:00:00"},
+    ]})
+
+    SyncManager(in_memory_session, client).sync_sale_orders()
+
+    assert [o.odoo_id for o in in_memory_session.query(SaleOrder).all()] == [2]
+    assert ("write_date", ">", "2025-01-02 00:00:00") in _domains(client, "sale.order")[0]
+    state = in_memory_session.get(SyncState, "sale.order")
+    assert state.last_synced > datetime.datetime(2025, 1, 2)
+
+
+def test_reconcile_removes_cancelled_orders_with_their_lines(in_memory_session):
+    old = datetime.datetime.utcnow() - datetime.timedelta(days=2)
+    in_memory_session.add_all([
+        SyncState(model_name="sale.order", last_synced=old),
+        SyncState(model_name="sale.order:reconcile", last_synced=old),
+        SaleOrder(id=1, odoo_id=1, state="sale"),
+        SaleOrder(id=2, odoo_id=2, state="sale"),
+        SaleOrderLine(odoo_id=20, order_id=2),
+    ])
+    in_memory_session.commit()
+    # La orden 2 se canceló: ya no cumple el dominio
+    client = make_domain_client({"sale.order": [
+        {"id": 1, "state": "sale", "write_date": "2020-01-01 00:00:00"},
+        {"id": 2, "state": "cancel", "write_date": "2020-01-01 00:00:00"},
+    ]})
+
+    SyncManager(in_memory_session, client).sync_sale_orders()
+
+    assert [o.odoo_id for o in in_memory_session.query(SaleOrder).all()] == [1]
+    assert in_memory_session.query(SaleOrderLine).count() == 0
+    marker = in_memory_session.get(SyncState, "sale.order:reconcile")
+    assert marker.last_synced > old
+
+
+def test_partners_incremental_reads_only_changed_canonicals(in_memory_session):
+    in_memory_session.add_all([
+        SyncState(model_name="res.partner", last_synced=datetime.datetime(2025, 1, 2)),
+        Partner(odoo_id=1, name="Old A"),
+        Partner(odoo_id=3, name="C"),
+    ])
+    in_memory_session.commit()
+    client = make_domain_client({"res.partner": [
+        # 1 y 2 comparten VAT; 2 es más reciente y pasa a ser el canónico
+        {"id": 1, "name": "A", "vat": "11-1", "write_date": "2025-01-01 00:00:00"},
+        {"id": 2, "name": "B", "vat": "11-1", "write_date": "2025-01-05 00:00:00"},
+        {"id": 3, "name": "C", "vat": False, "write_date": "2025-01-01 00:00:00"},
+    ]})
+    sync = SyncManager(in_memory_session, client)
+
+    sync.sync_partners()
+
+    assert sync.partner_remote_to_canonical == {1: 2, 2: 2, 3: 3}
+    full_reads = [d for d in _domains(client, "res.partner") if any(term[0] == "id" and term[1] == "in" for term in d)]
+    assert [term[2] for d in full_reads for term in d if term[1] == "in"] == [[2]]
+    partner = in_memory_session.query(Partner).filter_by(odoo_id=2).one()
+    assert partner.rut == "11-1"
+
+
+def test_full_sync_keeps_legacy_orders_with_negative_odoo_id(in_memory_session):
+    in_memory_session.add_all([
+        SaleOrder(id=1, odoo_id=-123456, state="sale"),
+        SaleOrderLine(odoo_id=-654321, order_id=1),
+    ])
+    in_memory_session.commit()
+    client = make_domain_client({
+        "sale.order": [{"id": 1, "state": "sale", "write_date": "2025-01-01 00:00:00"}],
+        "sale.order.line": [],
+    })
+    sync = SyncManager(in_memory_session, client)
+
+    sync.sync_sale_orders()
+    sync.sync_sale_order_lines()
+
+    assert sorted(o.odoo_id for o in in_memory_session.query(SaleOrder).all()) == [-123456, 1]
+    assert [l.odoo_id for l in in_memory_session.query(SaleOrderLine).all()] == [-654321]
@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+
+from odoo_engine.sync_manager.sync_manager import SyncManager
+from odoo_engine.utils.odoo_client import iter_keyset_pages
+
+
+class FakeOdoo:
+    """search_read mínimo que entiende `id >` y cuenta filas recorridas (como OFFSET en SQL)."""
+
+    def __init__(self, ids):
+        self.rows = [{"id": i, "name": f"r{i}"} for i in ids]
+        self.scanned = 0
+        self.on_page = None
+
+    def search_read(self, model, domain=None, fields=None, limit=None, offset=0, order=None):
+        rows = sorted(self.rows, key=lambda r: r["id"])
+        for field, op, value in domain or []:
+            assert (field, op) == ("id", ">")
+            rows = [r for r in rows if r["id"] > value]
+        self.scanned += offset + min(limit, max(len(rows) - offset, 0))
+        page = rows[offset:offset + limit]
+        if self.on_page:
+            self.on_page()
+        return page
+
+
+def test_keyset_pages_do_not_skip_rows_on_concurrent_delete():
+    odoo = FakeOdoo(range(1, 26))
+    # Tras la primera página alguien borra un registro ya leído.
+    odoo.on_page = lambda: odoo.rows.remove(odoo.rows[2]) if len(odoo.rows) == 25 else None
+    sync = SyncManager(MagicMock(), MagicMock(search_read=odoo.search_read))
+
+    ids = [r["id"] for r in sync._fetch_in_batches("res.partner", ["id"], limit=10)]
+    assert ids == list(range(1, 26))
+
+
+def test_offset_mode_skips_rows_on_concurrent_delete():
+    odoo = FakeOdoo(range(1, 26))
+    # Mismo escenario con offset: la segunda página empieza una fila más adelante.
+    odoo.on_page = lambda: odoo.rows.remove(odoo.rows[2]) if len(odoo.rows) == 25 else None
+    sync = SyncManager(MagicMock(), MagicMock(search_read=odoo.search_read))
+
+    ids = [r["id"] for r in sync._fetch_in_batches("res.partner", ["id"], limit=10, keyset=False)]
+    assert 11 not in ids  # el problema que resuelve keyset
+
+
+def test_keyset_cost_is_linear():
+    n, page = 20000, 100
+    keyset, offset = FakeOdoo(range(1, n + 1)), FakeOdoo(range(1, n + 1))
+
+    assert sum(len(p) for p in iter_keyset_pages(keyset.search_read, "sale.order.line", page_size=page)) == n
+    sync = SyncManager(MagicMock(), MagicMock(search_read=offset.search_read))
+    assert len(sync._fetch_in_batches("sale.order.line", ["id"], limit=page, keyset=False)) == n
+
+    assert keyset.scanned == n
+    assert offset.scanned > 50 * n
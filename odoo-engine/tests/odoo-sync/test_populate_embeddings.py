@@ -0,0 +1,141 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from odoo_engine.sync_manager import sync_manager as sync_module
+from odoo_engine.sync_manager.embedding_generator import embedding_content_hash
+from odoo_engine.sync_manager.models import Base, Product, ProductEmbedding
+from odoo_engine.sync_manager.sync_manager import SyncManager, backfill_embedding_content_hashes
+
+
+@pytest.fixture
+def in_memory_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    return Session()
+
+
+class FakeGenerator:
+    calls = []
+
+    def __init__(self, model):
+        self.model = model
+
+    def get_embedding_dimension(self):
+        return 2
+
+    def generate(self, texts):
+        FakeGenerator.calls.append((threading.current_thread().name, list(texts)))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_populate_links_every_product_to_its_vector(in_memory_session, monkeypatch):
+    monkeypatch.setattr(sync_module, "EmbeddingGenerator", FakeGenerator)
+    FakeGenerator.calls = []
+    names = ["a", "bb", "ccc", "dddd", "eeeee"]
+    in_memory_session.add_all([Product(odoo_id=i, name=name) for i, name in enumerate(names, start=1)])
+    existing = ProductEmbedding(
+        id=1000, vector=[0.0, 0.0], model="text-embedding-3-small", dimension=2,
+        content_hash=embedding_content_hash("already"),
+    )
+    in_memory_session.add(existing)
+    in_memory_session.add(Product(odoo_id=99, name="already", embedding_id=1000))
+    in_memory_session.commit()
+    done = in_memory_session.query(Product).filter_by(odoo_id=99).one()
+
+    SyncManager(in_memory_session, MagicMock()).populate_product_embeddings(batch_size=2)
+
+    # 3 lotes, todos pedidos desde el hilo de prefetch
+    assert [texts for _, texts in FakeGenerator.calls] == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+    assert all(name.startswith("embeddings") for name, _ in FakeGenerator.calls)
+    for product in in_memory_session.query(Product).filter(Product.odoo_id != 99):
+        embedding = in_memory_session.get(ProductEmbedding, product.embedding_id)
+        assert embedding.vector == [float(len(product.name)), 1.0]
+        assert embedding.dimension == 2
+    assert done.embedding_id == 1000
+
+
+def test_unchanged_names_make_no_embedding_requests(in_memory_session, monkeypatch):
+    monkeypatch.setattr(sync_module, "EmbeddingGenerator", FakeGenerator)
+    FakeGenerator.calls = []
+    in_memory_session.add_all(
+        [Product(odoo_id=1, name="Jabón  de\tlavanda"), Product(odoo_id=2, name="Crema"), Product(odoo_id=3, name="Crema")]
+    )
+    in_memory_session.commit()
+    manager = SyncManager(in_memory_session, MagicMock())
+    manager.populate_product_embeddings()
+
+    # Textos normalizados y el nombre repetido pedido una sola vez
+    assert [texts for _, texts in FakeGenerator.calls] == [["Jabón de lavanda", "Crema"]]
+    products = {p.odoo_id: p for p in in_memory_session.query(Product)}
+    assert products[2].embedding_id == products[3].embedding_id
+
+    # Cambio sólo de precio: ningún pedido
+    products[1].standard_price = 990
+    in_memory_session.commit()
+    FakeGenerator.calls = []
+    manager.populate_product_embeddings()
+    assert FakeGenerator.calls == []
+
+    # Renombrar a un texto ya embebido reutiliza su vector
+    products[1].name = " Crema "
+    in_memory_session.commit()
+    manager.populate_product_embeddings()
+    assert FakeGenerator.calls == []
+    assert in_memory_session.get(Product, products[1].id).embedding_id == products[2].embedding_id
+
+    # Un nombre nuevo sí se pide, y volver al anterior no
+    products[1].name = "Jabón de rosa"
+    in_memory_session.commit()
+    manager.populate_product_embeddings()
+    assert [texts for _, texts in FakeGenerator.calls] == [["Jabón de rosa"]]
+    FakeGenerator.calls = []
+    products[1].name = "Jabón de lavanda"
+    in_memory_session.commit()
+    manager.populate_product_embeddings()
+    assert FakeGenerator.calls == []
+    assert in_memory_session.query(ProductEmbedding).count() == 3
+
+
+def test_embeddings_without_hash_are_backfilled_then_renames_reembed(in_memory_session, monkeypatch):
+    monkeypatch.setattr(sync_module, "EmbeddingGenerator", FakeGenerator)
+    FakeGenerator.calls = []
+    # Embedding creado antes de content_hash
+    legacy = ProductEmbedding(vector=[1.0, 1.0], model="text-embedding-3-small", dimension=2)
+    in_memory_session.add(legacy)
+    in_memory_session.flush()
+    product = Product(odoo_id=1, name="Crema", embedding_id=legacy.id)
+    in_memory_session.add(product)
+    in_memory_session.commit()
+
+    assert backfill_embedding_content_hashes(in_memory_session) == 1
+    assert backfill_embedding_content_hashes(in_memory_session) == 0
+    manager = SyncManager(in_memory_session, MagicMock())
+    manager.populate_product_embeddings()
+    assert FakeGenerator.calls == []
+
+    product.name = "Crema de manos"
+    in_memory_session.commit()
+    manager.populate_product_embeddings()
+    assert [texts for _, texts in FakeGenerator.calls] == [["Crema de manos"]]
+    assert in_memory_session.get(Product, product.id).embedding_id != legacy.id
+
+
+def test_embedding_cache_is_per_model(in_memory_session, monkeypatch):
+    monkeypatch.setattr(sync_module, "EmbeddingGenerator", FakeGenerator)
+    FakeGenerator.calls = []
+    in_memory_session.add(Product(odoo_id=1, name="Crema"))
+    in_memory_session.commit()
+    manager = SyncManager(in_memory_session, MagicMock())
+    manager.populate_product_embeddings(model="text-embedding-3-small")
+    manager.populate_product_embeddings(model="text-embedding-3-large")
+
+    assert [texts for _, texts in FakeGenerator.calls] == [["Crema"], ["Crema"]]
+    assert {e.model for e in in_memory_session.query(ProductEmbedding)} == {
+        "text-embedding-3-small",
+        "text-embedding-3-large",
+    }
@@ -0,0 +1,90 @@
+import threading
+import time
+from contextlib import nullcontext
+
+import pytest
+
+from odoo_engine.sync_manager.scheduler import DEFAULT_STEPS, SyncScheduler, SyncStep, SyncStepError
+
+
+class FakeManager:
+    """Reemplaza a SyncManager: cada método duerme y registra cuándo corrió."""
+
+    events = []
+    lock = threading.Lock()
+    fail = set()
+
+    def __init__(self, session, client, partner_remote_to_canonical=None, **kwargs):
+        self.client = client
+        self.partners = partner_remote_to_canonical
+
+    def __getattr__(self, method):
+        def run():
+            with FakeManager.lock:
+                FakeManager.events.append(("start", method, time.perf_counter()))
+            time.sleep(0.05)
+            if method == "sync_partners":
+                self.partners[1] = 2
+            if method in FakeManager.fail:
+                raise RuntimeError(f"{method} broke")
+            with FakeManager.lock:
+                FakeManager.events.append(("end", method, time.perf_counter()))
+        return run
+
+
+@pytest.fixture(autouse=True)
+def reset_fake():
+    FakeManager.events = []
+    FakeManager.fail = set()
+
+
+def _scheduler(**kwargs):
+    clients = []
+
+    def client_factory():
+        clients.append(object())
+        return clients[-1]
+
+    scheduler = SyncScheduler(lambda: nullcontext(), client_factory, manager_cls=FakeManager, **kwargs)
+    return scheduler, clients
+
+
+def _times(kind):
+    return {method: t for k, method, t in FakeManager.events if k == kind}
+
+
+def test_respects_dependencies_and_runs_in_parallel():
+    scheduler, clients = _scheduler(max_workers=4)
+    started = time.perf_counter()
+    timings = scheduler.run()
+    wall = time.perf_counter() - started
+
+    assert set(timings) == {step.name for step in DEFAULT_STEPS}
+    starts, ends = _times("start"), _times("end")
+    by_name = {step.name: step for step in DEFAULT_STEPS}
+    for step in DEFAULT_STEPS:
+        for dep in step.depends_on:
+            assert ends[by_name[dep].method] <= starts[step.method]
+    # Camino crítico: UoMs -> Products -> BOMs -> BOM Lines (4 pasos); 12 en serie serían ~0.6s
+    assert wall < 0.45
+    assert len(clients) <= 4
+    # El mapa de partners es el mismo objeto para todos los pasos
+    assert scheduler.partner_remote_to_canonical == {1: 2}
+
+
+def test_failure_skips_dependents_but_finishes_independent_steps():
+    FakeManager.fail = {"sync_partners"}
+    scheduler, _ = _scheduler(max_workers=2)
+    with pytest.raises(SyncStepError) as excinfo:
+        scheduler.run()
+
+    assert set(excinfo.value.failed) == {"Partners"}
+    assert excinfo.value.skipped == ["Purchase Order Lines", "Purchase Orders", "Sale Order Lines", "Sale Orders"]
+    assert "sync_bom_lines" in _times("end")
+
+
+def test_rejects_cycles_and_unknown_dependencies():
+    with pytest.raises(ValueError):
+        SyncScheduler(None, None, steps=[SyncStep("A", "a", ("B",)), SyncStep("B", "b", ("A",))])
+    with pytest.raises(ValueError):
+        SyncScheduler(None, None, steps=[SyncStep("A", "a", ("Z",))])
@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from odoo_engine.sync_manager.models import Base, DailyStockHistory, Product
+from odoo_engine.sync_manager.sync_manager import SyncManager
+
+
+@pytest.fixture
+def in_memory_session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    return Session()
+
+
+def test_bulk_upsert_inserts_and_updates_100k_rows(in_memory_session):
+    sync = SyncManager(in_memory_session, MagicMock())
+    n = 100_000
+    sync._upsert(Product, [{"odoo_id": i, "name": f"P{i}", "default_code": f"SKU{i}"} for i in range(1, n + 1)])
+    # Segunda pasada: sólo cambia el nombre de la mitad; default_code no viene y se conserva
+    sync._upsert(Product, [{"odoo_id": i, "name": f"P{i} v2"} for i in range(1, n + 1, 2)] + [{"odoo_id": None, "name": "x"}])
+
+    assert in_memory_session.scalar(select(func.count()).select_from(Product)) == n
+    first = in_memory_session.execute(select(Product.name, Product.default_code).where(Product.odoo_id == 1)).one()
+    second = in_memory_session.execute(select(Product.name, Product.default_code).where(Product.odoo_id == 2)).one()
+    assert tuple(first) == ("P1 v2", "SKU1")
+    assert tuple(second) == ("P2", "SKU2")
+
+
+def test_upsert_refreshes_loaded_objects_and_composite_keys(in_memory_session):
+    product = Product(odoo_id=1, name="Old")
+    in_memory_session.add(product)
+    in_memory_session.commit()
+    sync = SyncManager(in_memory_session, MagicMock())
+
+    sync._upsert(Product, [{"odoo_id": 1, "name": "New"}])
+    assert product.name == "New"
+
+    key = {"product_id": product.id, "location_id": 8, "snapshot_date": product.created_at.date()}
+    sync._upsert(DailyStockHistory, [{**key, "quantity": 1}], unique_field=list(key))
+    sync._upsert(DailyStockHistory, [{**key, "quantity": 4}], unique_field=list(key))
+    assert in_memory_session.query(DailyStockHistory).one().quantity == 4
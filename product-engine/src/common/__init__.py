@@ -6,6 +6,9 @@ Módulo con configuración, utilidades y componentes compartidos entre db_manage
 
 from common.config import ProductEngineConfig, config
 from common.embedding_generator import EmbeddingGenerator
+from common.embedding_cache import EmbeddingCache
+from common.query_embedding_cache import QueryEmbeddingCache
+from common.embedding_storage import EmbeddingStorage
 from common.models import ProductData, SearchResult
 from common.database import DatabaseConnection, database
 
@@ -13,6 +16,9 @@ __all__ = [
     "ProductEngineConfig",
     "config",
     "EmbeddingGenerator", 
+    "EmbeddingCache",
+    "QueryEmbeddingCache",
+    "EmbeddingStorage",
     "ProductData",
     "SearchResult",
     "DatabaseConnection",
@@ -0,0 +1,99 @@
+"""
+Content-addressed embedding cache.
+
+Embeddings are stored in the ``embedding_cache`` table keyed on
+(model name, sha256 of the normalized text). Before calling OpenAI the sync
+looks texts up here, so a product whose ``text_for_embedding`` did not change
+(or changed back, or matches another product) never costs a new request.
+"""
+import hashlib
+import unicodedata
+from typing import Iterable, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+import structlog
+
+from common.database import database
+
+logger = structlog.get_logger(__name__)
+
+
+def normalize_embedding_text(text: Optional[str]) -> str:
+    """Canonical form of a text before embedding: NFC, collapsed whitespace, stripped."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def embedding_content_hash(text: Optional[str]) -> str:
+    """sha256 hex digest of the normalized text."""
+    return hashlib.sha256(normalize_embedding_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Postgres-backed store of embeddings by (model, content hash).
+
+    Vectors are only written here; reading them back into ``products`` is done
+    in SQL by ``ProductUpdater.fill_embeddings_from_cache`` so they never
+    round-trip through Python.
+    """
+
+    TABLE_SQL = """
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            model VARCHAR(100) NOT NULL,
+            content_hash CHAR(64) NOT NULL,
+            embedding VECTOR(1536) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (model, content_hash)
+        );
+    """
+
+    def __init__(self):
+        """Initialize the embedding cache."""
+        self.logger = logger.bind(component="embedding_cache")
+
+    def create_table(self, cursor=None):
+        """
+        Create the cache table if it doesn't exist.
+
+        Args:
+            cursor: Optional open cursor, to run inside the caller's transaction.
+        """
+        if cursor is not None:
+            cursor.execute(self.TABLE_SQL)
+            return
+        with database.get_cursor() as own_cursor:
+            own_cursor.execute(self.TABLE_SQL)
+
+    def store(self, model: str, hashed_embeddings: Iterable[Tuple[str, List[float]]]) -> int:
+        """
+        Store freshly generated embeddings.
+
+        Args:
+            model: Embedding model name.
+            hashed_embeddings: Iterable of (content_hash, embedding_vector).
+
+        Returns:
+            Number of new cache entries.
+        """
+        rows = [(model, content_hash, str(embedding)) for content_hash, embedding in hashed_embeddings]
+        if not rows:
+            return 0
+        with database.get_cursor() as cursor:
+            # fetch=True gathers RETURNING rows from every page (rowcount only
+            # reflects the last one)
+            inserted = execute_values(
+                cursor,
+                """
+                INSERT INTO embedding_cache (model, content_hash, embedding)
+                VALUES %s
+                ON CONFLICT (model, content_hash) DO NOTHING
+                RETURNING content_hash
+                """,
+                rows,
+                template="(%s, %s, %s::vector)",
+                page_size=500,
+                fetch=True,
+            )
+            stored = len(inserted)
+        self.logger.info("Stored embeddings in cache", model=model, stored=stored)
+        return stored
@@ -5,49 +5,90 @@ This module provides the OpenAIEmbeddingGenerator class for generating
 vector embeddings from product text data using OpenAI's embedding models.
 """
 from typing import List, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
 import time
 import structlog
-from openai import OpenAI
+import tiktoken
+from openai import OpenAI, RateLimitError
 from openai.types import CreateEmbeddingResponse
 
 from .config import config
+from .rate_limiter import RateLimiter
 
 logger = structlog.get_logger(__name__)
 
+# OpenAI rejects embedding inputs longer than this many tokens
+MAX_INPUT_TOKENS = 8191
+
 
 class OpenAIEmbeddingGenerator:
     """
     OpenAI embedding generator for product text vectorization.
     
     This class handles batch generation of embeddings using OpenAI's API
-    with proper error handling, rate limiting, and retry logic.
+    with proper error handling, rate limiting, and retry logic. Batches are
+    sized with tiktoken and sent from a small worker pool that shares a
+    requests/tokens-per-minute budget.
     """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "text-embedding-3-small"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "text-embedding-3-small",
+        max_workers: int = 4,
+        requests_per_minute: int = 3000,
+        tokens_per_minute: int = 1_000_000,
+    ):
         """
         Initialize the OpenAI embedding generator.
         
         Args:
             api_key: OpenAI API key. If None, uses config.
             model: OpenAI embedding model to use.
+            max_workers: Concurrent embedding requests.
+            requests_per_minute: RPM limit of the account for this model.
+            tokens_per_minute: TPM limit of the account for this model.
         """
         self.api_key = api_key or config.get_openai_api_key()
         self.model = model
-        self.client = OpenAI(api_key=self.api_key)
+        # Retries are handled here (with the shared rate limiter), not by the SDK
+        self.client = OpenAI(api_key=self.api_key, max_retries=0)
         self.logger = logger.bind(component="embedding_generator")
         
         # Rate limiting and retry configuration
-        self.max_retries = 3
+        self.max_retries = 5
         self.base_delay = 1.0
         self.max_batch_size = 100  # OpenAI's recommended batch size
         self.max_tokens_per_request = 8000  # Conservative limit
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.encoding = self._load_encoding()
         
         self.logger.info(
             "OpenAI embedding generator initialized",
             model=self.model,
-            max_batch_size=self.max_batch_size
+            max_batch_size=self.max_batch_size,
+            max_workers=self.max_workers
         )
     
+    def _load_encoding(self):
+        """Tokenizer of the model, or None if tiktoken can't load it (e.g. offline)."""
+        try:
+            return tiktoken.encoding_for_model(self.model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            self.logger.warning("tiktoken unavailable, estimating tokens", error=str(e))
+            return None
+    
+    def count_tokens(self, text: str) -> int:
+        """Number of input tokens `text` costs for the current model."""
+        if self.encoding is None:
+            # Rough estimate (4 characters per token)
+            return max(1, len(text) // 4)
+        return len(self.encoding.encode(text))
+    
     def generate(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for a list of texts.
@@ -56,7 +97,8 @@ class OpenAIEmbeddingGenerator:
             texts: List of text strings to generate embeddings for.
             
         Returns:
-            List of embedding vectors (each vector is a list of floats).
+            List of embedding vectors (each vector is a list of floats), in the
+            same order as the non-empty input texts.
             
         Raises:
             RuntimeError: If embedding generation fails after all retries.
@@ -86,22 +128,25 @@ class OpenAIEmbeddingGenerator:
                 self.logger.error("No valid texts to process")
                 return []
             
-            # Process texts in batches
-            all_embeddings = []
+            # Process batches concurrently; the rate limiter paces the requests
             batches = self._create_batches(valid_texts)
             
-            for i, batch in enumerate(batches):
-                self.logger.info(
-                    f"Processing batch {i + 1}/{len(batches)}",
-                    batch_size=len(batch)
-                )
-                
-                batch_embeddings = self._generate_batch_embeddings(batch)
-                all_embeddings.extend(batch_embeddings)
-                
-                # Rate limiting: small delay between batches
-                if i < len(batches) - 1:  # Don't delay after the last batch
-                    time.sleep(0.5)
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(batches)),
+                thread_name_prefix="embeddings"
+            ) as executor:
+                futures = [
+                    executor.submit(self._generate_batch_embeddings, batch, tokens)
+                    for batch, tokens in batches
+                ]
+                # Collected in submission order, so results follow the input
+                all_embeddings = []
+                for i, future in enumerate(futures):
+                    all_embeddings.extend(future.result())
+                    self.logger.info(
+                        f"Processed batch {i + 1}/{len(batches)}",
+                        batch_size=len(batches[i][0])
+                    )
             
             self.logger.info(
                 "Embedding generation completed",
@@ -118,7 +163,7 @@ class OpenAIEmbeddingGenerator:
             )
             raise RuntimeError(f"Embedding generation failed: {str(e)}") from e
     
-    def _create_batches(self, texts: List[str]) -> List[List[str]]:
+    def _create_batches(self, texts: List[str]) -> List[tuple]:
         """
         Create batches of texts for API calls.
         
@@ -126,59 +171,90 @@ class OpenAIEmbeddingGenerator:
             texts: List of texts to batch.
             
         Returns:
-            List of text batches.
+            List of (text batch, token count) tuples.
         """
         batches = []
         current_batch = []
         current_tokens = 0
         
         for text in texts:
-            # Rough token estimate (4 characters per token)
-            estimated_tokens = len(text) // 4
+            tokens = self.count_tokens(text)
+            if tokens > MAX_INPUT_TOKENS and self.encoding is not None:
+                self.logger.warning("Text truncated to the model input limit", tokens=tokens)
+                text = self.encoding.decode(self.encoding.encode(text)[:MAX_INPUT_TOKENS])
+                tokens = MAX_INPUT_TOKENS
             
             # Check if adding this text would exceed limits
             if (len(current_batch) >= self.max_batch_size or 
-                current_tokens + estimated_tokens > self.max_tokens_per_request):
+                current_tokens + tokens > self.max_tokens_per_request):
                 
                 if current_batch:  # Don't add empty batches
-                    batches.append(current_batch)
+                    batches.append((current_batch, current_tokens))
                     current_batch = []
                     current_tokens = 0
             
             current_batch.append(text)
-            current_tokens += estimated_tokens
+            current_tokens += tokens
         
         # Add the last batch if it's not empty
         if current_batch:
-            batches.append(current_batch)
+            batches.append((current_batch, current_tokens))
         
         self.logger.debug(
             "Created batches",
             total_batches=len(batches),
-            avg_batch_size=sum(len(batch) for batch in batches) / len(batches) if batches else 0
+            avg_batch_size=sum(len(batch) for batch, _ in batches) / len(batches) if batches else 0
         )
         
         return batches
     
-    def _generate_batch_embeddings(self, texts: List[str]) -> List[List[float]]:
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Seconds requested by the `Retry-After` headers of a 429, if any."""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000.0
+            except ValueError:
+                pass
+        retry_after = headers.get("retry-after")
+        if not retry_after:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    def _generate_batch_embeddings(self, texts: List[str], tokens: Optional[int] = None) -> List[List[float]]:
         """
         Generate embeddings for a single batch of texts with retry logic.
         
         Args:
             texts: Batch of texts to process.
+            tokens: Input tokens of the batch (counted if None).
             
         Returns:
             List of embedding vectors for the batch.
         """
+        if tokens is None:
+            tokens = sum(self.count_tokens(text) for text in texts)
+        
         for attempt in range(self.max_retries):
+            self.rate_limiter.acquire(tokens)
             try:
                 response: CreateEmbeddingResponse = self.client.embeddings.create(
                     input=texts,
                     model=self.model
                 )
                 
-                # Extract embeddings from response
-                embeddings = [embedding.embedding for embedding in response.data]
+                # Extract embeddings from response (sorted by index, as sent)
+                embeddings = [embedding.embedding for embedding in sorted(response.data, key=lambda d: d.index)]
                 
                 self.logger.debug(
                     "Batch embeddings generated successfully",
@@ -196,8 +272,14 @@ class OpenAIEmbeddingGenerator:
                 )
                 
                 if attempt < self.max_retries - 1:
-                    # Exponential backoff
+                    # Exponential backoff, or what the 429 asks for
                     delay = self.base_delay * (2 ** attempt)
+                    if isinstance(e, RateLimitError):
+                        retry_after = self._retry_after(e)
+                        if retry_after is not None:
+                            delay = retry_after
+                        # Hold every worker, not only this one
+                        self.rate_limiter.pause(delay)
                     self.logger.info(f"Retrying in {delay} seconds...")
                     time.sleep(delay)
                 else:
@@ -0,0 +1,114 @@
+"""
+Compact embedding index configuration.
+
+``products.embedding`` always keeps the full-precision ``VECTOR(1536)``. The
+HNSW index, which is what has to stay in memory for fast searches, can be
+built instead over a compact expression of that column:
+
+- ``halfvec``: 16-bit floats, half the index size.
+- shortened dimensions: the first N components (text-embedding-3 models are
+  trained so that a prefix of the vector is itself a usable embedding;
+  cosine distance makes re-normalising unnecessary).
+
+Both can be combined (e.g. ``halfvec(512)``: 1/6 of the full index). Searches
+take ``rerank_factor * limit`` candidates from the compact index and re-rank
+them with the full-precision vectors, so only those rows pay for a full
+distance. Requires pgvector >= 0.7 (halfvec, subvector).
+
+Configured with environment variables:
+
+- ``PRODUCT_EMBEDDING_INDEX_PRECISION``: ``full`` (default) or ``half``
+- ``PRODUCT_EMBEDDING_INDEX_DIMENSIONS``: 1..1536 (default 1536)
+- ``PRODUCT_EMBEDDING_RERANK_FACTOR``: candidates per result (default 4)
+"""
+import os
+from dataclasses import dataclass
+
+FULL_DIMENSIONS = 1536
+PRECISIONS = ("full", "half")
+
+
+@dataclass(frozen=True)
+class EmbeddingStorage:
+    """How the embedding index stores vectors and how searches use it."""
+
+    precision: str = "full"
+    dimensions: int = FULL_DIMENSIONS
+    rerank_factor: int = 4
+
+    def __post_init__(self):
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {self.precision!r}")
+        if not 1 <= int(self.dimensions) <= FULL_DIMENSIONS:
+            raise ValueError(f"dimensions must be between 1 and {FULL_DIMENSIONS}")
+        if int(self.rerank_factor) < 1:
+            raise ValueError("rerank_factor must be >= 1")
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingStorage":
+        """Storage settings from the environment (full precision if unset)."""
+        return cls(
+            precision=os.getenv("PRODUCT_EMBEDDING_INDEX_PRECISION", "full").strip().lower(),
+            dimensions=int(os.getenv("PRODUCT_EMBEDDING_INDEX_DIMENSIONS", FULL_DIMENSIONS)),
+            rerank_factor=int(os.getenv("PRODUCT_EMBEDDING_RERANK_FACTOR", 4)),
+        )
+
+    @property
+    def compact(self) -> bool:
+        """True if the index is not over the plain full-precision column."""
+        return self.precision != "full" or self.dimensions != FULL_DIMENSIONS
+
+    @property
+    def vector_type(self) -> str:
+        return "halfvec" if self.precision == "half" else "vector"
+
+    @property
+    def index_name(self) -> str:
+        if not self.compact:
+            return "idx_products_embedding_active"
+        return f"idx_products_embedding_{self.vector_type}_{self.dimensions}"
+
+    @property
+    def operator_class(self) -> str:
+        return f"{self.vector_type}_cosine_ops"
+
+    def expression(self, vector_sql: str) -> str:
+        """SQL of the indexed form of ``vector_sql`` (a ``vector`` expression)."""
+        if not self.compact:
+            return vector_sql
+        if self.dimensions != FULL_DIMENSIONS:
+            vector_sql = f"subvector({vector_sql}, 1, {int(self.dimensions)})"
+        return f"({vector_sql})::{self.vector_type}({int(self.dimensions)})"
+
+    def candidates(self, limit: int) -> int:
+        """Rows to take from the compact index to return ``limit`` re-ranked rows."""
+        return limit * int(self.rerank_factor) if self.compact else limit
+
+    def nearest_sql(self, vector_sql: str, columns: str, limit_sql: str, candidates_sql: str) -> str:
+        """
+        Subquery with the nearest active products to ``vector_sql``.
+
+        Returns ``columns`` plus ``distance`` (full-precision cosine
+        distance), ordered by distance. In compact mode the candidates come
+        from the compact index and are re-ranked at full precision.
+        """
+        if not self.compact:
+            return f"""
+                SELECT {columns}, (embedding <=> {vector_sql}) AS distance
+                FROM products
+                WHERE embedding IS NOT NULL AND is_active = true
+                ORDER BY embedding <=> {vector_sql}
+                LIMIT {limit_sql}
+            """
+        return f"""
+            SELECT {columns}, (embedding <=> {vector_sql}) AS distance
+            FROM (
+                SELECT *
+                FROM products
+                WHERE embedding IS NOT NULL AND is_active = true
+                ORDER BY {self.expression('embedding')} <=> {self.expression(vector_sql)}
+                LIMIT {candidates_sql}
+            ) candidates
+            ORDER BY distance
+            LIMIT {limit_sql}
+        """
@@ -0,0 +1,129 @@
+"""
+Column-wise preparation of the products DataFrame for the database upsert.
+
+Replaces the per-row / per-cell processing (``iterrows`` + ``isna`` checks on
+every value) with pandas operations over whole columns, and writes the result
+as CSV for ``COPY ... FROM STDIN``.
+"""
+import io
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+# Columns of temp_products, in COPY order
+UPSERT_COLUMNS = [
+    'sku', 'name', 'description', 'category_id', 'category_name',
+    'is_active', 'list_price', 'standard_price', 'product_type',
+    'barcode', 'weight', 'volume', 'sale_ok', 'purchase_ok',
+    'uom_id', 'uom_name', 'company_id', 'text_for_embedding', 'last_update'
+]
+
+# Maximum length of the VARCHAR columns
+VARCHAR_LIMITS = {
+    'sku': 100,
+    'product_type': 100,
+    'barcode': 100,
+    'uom_name': 100,
+    'name': 255,
+    'category_name': 255,
+    'description': 500,
+}
+
+# Odoo Many2one values arrive as [id, name] (or already as the id)
+MANY2ONE_FIELDS = ('category_id', 'uom_id', 'company_id')
+
+INVALID_SKUS = ('', 'None', 'False')
+
+# NULL marker in the COPY CSV (an unquoted empty field stays an empty string)
+COPY_NULL = r'\N'
+
+
+def many2one_ids(values: pd.Series) -> pd.Series:
+    """
+    Extract Many2one ids: ``[id, name]`` -> id, numbers kept, anything else NULL.
+
+    Returns:
+        Nullable ``Int64`` series
+    """
+    if values.dtype == object:
+        # Not .str[0]: it raises on columns without strings/lists (e.g. all False/None)
+        values = values.map(lambda v: v[0] if isinstance(v, (list, tuple)) and v else v)
+    return pd.to_numeric(values, errors='coerce').astype('Int64')
+
+
+def truncate_strings(values: pd.Series, limit: int) -> Tuple[pd.Series, int]:
+    """
+    Cut strings longer than ``limit``; other values are left untouched.
+
+    Returns:
+        (series, number of truncated values)
+    """
+    if values.dtype != object:
+        return values, 0
+    # Only actual strings; .str would raise on columns holding no strings
+    too_long = values.map(lambda v: isinstance(v, str) and len(v) > limit).astype(bool)
+    truncated = int(too_long.sum())
+    if truncated:
+        values = values.copy()
+        values[too_long] = values[too_long].str.slice(0, limit)
+    return values, truncated
+
+
+def prepare_products_frame(products_df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Validate and normalise products for the upsert, column by column.
+
+    - Duplicate SKUs (after the first) and invalid SKUs ('', 'None', 'False',
+      missing) are filtered out.
+    - Many2one columns become integer ids.
+    - VARCHAR columns are truncated to their database length.
+
+    Args:
+        products_df: DataFrame with (at least) the ``UPSERT_COLUMNS``
+
+    Returns:
+        (prepared frame with ``UPSERT_COLUMNS``, filtered products as
+        dicts with reason/sku/name/row_index, truncated values per column)
+    """
+    frame = products_df.reindex(columns=UPSERT_COLUMNS)
+    sku = frame['sku']
+    names = frame['name'].astype(str)
+
+    duplicate = sku.duplicated(keep='first')
+    invalid = ~duplicate & (sku.isna() | sku.astype(str).isin(INVALID_SKUS))
+
+    filtered = []
+    for reason, mask in (('duplicate_sku', duplicate), ('invalid_sku_format', invalid)):
+        for row_index, row_sku, row_name in zip(frame.index[mask], sku[mask], names[mask]):
+            filtered.append({
+                'reason': reason,
+                'sku': str(row_sku),
+                'name': row_name,
+                'row_index': row_index
+            })
+
+    frame = frame[~(duplicate | invalid)].copy()
+
+    for col in MANY2ONE_FIELDS:
+        frame[col] = many2one_ids(frame[col])
+
+    truncated = {}
+    for col, limit in VARCHAR_LIMITS.items():
+        frame[col], count = truncate_strings(frame[col], limit)
+        if count:
+            truncated[col] = count
+
+    return frame, filtered, truncated
+
+
+def to_copy_csv(frame: pd.DataFrame) -> io.StringIO:
+    """
+    CSV buffer of ``frame`` for ``COPY ... WITH (FORMAT csv, NULL '\\N')``.
+
+    Missing values (None/NaN/NA) are written as the NULL marker; strings are
+    quoted only when needed (commas, quotes, newlines).
+    """
+    buffer = io.StringIO()
+    frame.to_csv(buffer, columns=UPSERT_COLUMNS, header=False, index=False, na_rep=COPY_NULL)
+    buffer.seek(0)
+    return buffer
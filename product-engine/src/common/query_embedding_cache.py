@@ -0,0 +1,228 @@
+"""
+Two-tier cache of search-query embeddings.
+
+Agents repeat the same queries all the time ("aceite de coco", "esencia
+vainilla"), and each one costs a 200-400 ms OpenAI round trip before the
+database is even touched. ``QueryEmbeddingCache`` keeps recent query vectors
+in an in-process LRU and, optionally, in a Postgres table shared by every
+process using the same database.
+
+Keys are (model, hash of the normalized, case-folded query), so
+"Aceite de  coco" and "aceite de coco" share an entry. That same normalized
+text is what gets embedded, so the cached vector doesn't depend on which
+spelling of the query happened to come first.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from common.database import database
+from common.embedding_cache import embedding_content_hash, normalize_embedding_text
+
+logger = structlog.get_logger(__name__)
+
+
+class QueryEmbeddingCache:
+    """
+    LRU + TTL cache for query embeddings with an optional Postgres tier.
+
+    Args:
+        max_size: Entries kept in memory; the least recently used is evicted.
+        ttl_seconds: Lifetime of an entry in both tiers.
+        use_database: Also read/write the shared ``query_embedding_cache`` table.
+        max_database_rows: Rows kept in the shared table when it is pruned.
+        clock: Time source (seconds), injectable for tests.
+    """
+
+    TABLE_SQL = """
+        CREATE TABLE IF NOT EXISTS query_embedding_cache (
+            model VARCHAR(100) NOT NULL,
+            query_hash CHAR(64) NOT NULL,
+            query_text TEXT NOT NULL,
+            embedding VECTOR(1536) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (model, query_hash)
+        );
+        CREATE INDEX IF NOT EXISTS idx_query_embedding_cache_created_at
+        ON query_embedding_cache (created_at);
+    """
+
+    # Prune the shared table once every this many writes
+    PRUNE_EVERY = 200
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 7 * 24 * 3600,
+        use_database: bool = False,
+        max_database_rows: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.use_database = use_database
+        self.max_database_rows = max_database_rows
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List[float], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self._writes = 0
+        self.hits = 0
+        self.database_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.logger = logger.bind(component="query_embedding_cache")
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Query text as it is keyed: normalized and case-folded."""
+        return normalize_embedding_text(query).casefold()
+
+    def _key(self, model: str, query: str) -> Tuple[str, str]:
+        return model, embedding_content_hash(self.normalize_query(query))
+
+    def get(self, model: str, query: str) -> Optional[List[float]]:
+        """Cached vector for ``query`` or None. Counts a hit or a miss."""
+        key = self._key(model, query)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+
+        row = self._database_get(key) if self.use_database else None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            vector, remaining = row
+            self.database_hits += 1
+            # Keep the shared row's expiry instead of starting a fresh TTL
+            self._remember(key, vector, now, ttl_seconds=remaining)
+        return vector
+
+    def put(self, model: str, query: str, vector: List[float]):
+        """Store the vector of ``query`` in both tiers."""
+        key = self._key(model, query)
+        with self._lock:
+            self._remember(key, vector, self._clock())
+        if self.use_database:
+            self._database_put(key, self.normalize_query(query), vector)
+
+    def get_or_create(self, model: str, query: str, create: Callable[[str], Optional[List[float]]]):
+        """
+        Cached vector for ``query``, computing and storing it on a miss.
+
+        ``create`` receives the normalized query (``normalize_query``), the
+        text the cache entry stands for.
+        """
+        vector = self.get(model, query)
+        if vector is None:
+            vector = create(self.normalize_query(query))
+            if vector is not None:
+                self.put(model, query, vector)
+        return vector
+
+    def clear(self):
+        """Drop the in-memory tier (the shared table is left alone)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.database_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "database_hits": self.database_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.database_hits) / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key, vector, now, ttl_seconds=None):
+        # Caller holds self._lock
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (vector, now + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _ensure_table(self, cursor):
+        if not self._table_ready:
+            cursor.execute(self.TABLE_SQL)
+            self._table_ready = True
+
+    def _database_get(self, key) -> Optional[Tuple[List[float], float]]:
+        """(vector, seconds until the row expires) from the shared table, or None."""
+        model, query_hash = key
+        try:
+            with database.get_cursor() as cursor:
+                self._ensure_table(cursor)
+                cursor.execute(
+                    """
+                    SELECT embedding::text AS embedding,
+                           EXTRACT(EPOCH FROM created_at + %s * INTERVAL '1 second' - CURRENT_TIMESTAMP)
+                               AS remaining_seconds
+                    FROM query_embedding_cache
+                    WHERE model = %s AND query_hash = %s
+                      AND created_at > CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+                    """,
+                    (self.ttl_seconds, model, query_hash, self.ttl_seconds),
+                )
+                row = cursor.fetchone()
+        except Exception as e:
+            # The shared tier is an optimisation: never fail a search over it
+            self.logger.warning("Query cache lookup failed", error=str(e))
+            return None
+        if not row:
+            return None
+        # pgvector's text form '[0.1,0.2,...]' is valid JSON
+        return json.loads(row["embedding"]), float(row["remaining_seconds"])
+
+    def _database_put(self, key, query_text: str, vector: List[float]):
+        model, query_hash = key
+        try:
+            with database.get_cursor() as cursor:
+                self._ensure_table(cursor)
+                cursor.execute(
+                    """
+                    INSERT INTO query_embedding_cache (model, query_hash, query_text, embedding)
+                    VALUES (%s, %s, %s, %s::vector)
+                    ON CONFLICT (model, query_hash) DO UPDATE SET
+                        embedding = EXCLUDED.embedding,
+                        created_at = CURRENT_TIMESTAMP
+                    """,
+                    (model, query_hash, query_text, str(vector)),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    self._prune(cursor)
+        except Exception as e:
+            self.logger.warning("Query cache store failed", error=str(e))
+
+    def _prune(self, cursor):
+        """Delete expired rows and keep at most ``max_database_rows`` newest."""
+        cursor.execute(
+            """
+            DELETE FROM query_embedding_cache
+            WHERE created_at <= CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+               OR (model, query_hash) IN (
+                    SELECT model, query_hash FROM query_embedding_cache
+                    ORDER BY created_at DESC
+                    OFFSET %s
+               )
+            """,
+            (self.ttl_seconds, self.max_database_rows),
+        )
@@ -0,0 +1,98 @@
+"""
+Token-bucket rate limiting for OpenAI requests.
+
+OpenAI enforces two budgets per model: requests per minute (RPM) and tokens
+per minute (TPM). ``RateLimiter`` keeps one bucket for each, and every worker
+waits on both before sending a request, so a concurrent pool stays under the
+limits instead of bouncing off 429s. A 429 that still gets through pauses
+every worker until its ``Retry-After`` has passed.
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``rate_per_minute``.
+
+    The bucket starts full, so a burst up to ``capacity`` goes out at once.
+    Requests bigger than the capacity are allowed once the bucket is full,
+    otherwise they would never be served.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """
+        Take ``amount`` tokens if available.
+
+        Returns:
+            0.0 if the tokens were taken, otherwise the seconds to wait before
+            they will be.
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1.0):
+        """Block until ``amount`` tokens are taken."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits shared by a worker pool.
+
+    Args:
+        requests_per_minute: Request budget (RPM).
+        tokens_per_minute: Input token budget (TPM).
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int):
+        """Block until one request carrying ``tokens`` input tokens may be sent."""
+        while True:
+            with self._lock:
+                pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+                continue
+            self.requests.acquire(1)
+            self.tokens.acquire(tokens)
+            return
+
+    def pause(self, seconds: float):
+        """Hold every worker for ``seconds`` (e.g. a 429's ``Retry-After``)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
@@ -10,11 +10,36 @@ import structlog
 
 from common.database import database
 from common.embedding_generator import EmbeddingGenerator
+from common.embedding_storage import EmbeddingStorage
 from common.models import SearchResult
+from common.query_embedding_cache import QueryEmbeddingCache
 from math import inf
 
 logger = structlog.get_logger(__name__)
 
+# Product columns returned by the search queries
+PRODUCT_COLUMNS = """
+    sku, name, description, category_id, category_name, is_active,
+    list_price, standard_price, product_type, barcode, weight, volume,
+    sale_ok, purchase_ok, uom_id, uom_name, company_id,
+    text_for_embedding, last_update, created_at, updated_at
+"""
+
+# Candidates taken from each index (full-text, trigram, vector) before fusion
+DEFAULT_CANDIDATE_DEPTH = 100
+# Reciprocal-rank fusion constant: score = sum(1 / (k + rank)) over the indexes
+DEFAULT_RRF_K = 60
+# HNSW candidates explored per query (pgvector default 40); raised to the
+# number of rows a query needs, and doubled up to the max when widening
+DEFAULT_EF_SEARCH = 40
+MAX_EF_SEARCH = 1000
+# hnsw.iterative_scan mode ('relaxed_order' or 'strict_order') to keep
+# scanning the index when filters discard candidates. Off by default: the
+# setting only exists in pgvector >= 0.8, and older versions reject it
+DEFAULT_ITERATIVE_SCAN = None
+# First pgvector version with hnsw.iterative_scan
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+
 
 class ProductSearchClient:
     """
@@ -23,13 +48,55 @@ class ProductSearchClient:
     This class handles all read operations for product search, including:
     - Exact SKU matching
     - Semantic similarity search using embeddings
-    - Hybrid search combining both approaches
+    - Hybrid search fusing full-text, trigram and vector candidates (RRF)
     """
     
-    def __init__(self):
-        """Initialize the product search client."""
+    def __init__(self, query_cache: Optional[QueryEmbeddingCache] = None,
+                 hybrid: bool = False,
+                 candidate_depth: int = DEFAULT_CANDIDATE_DEPTH,
+                 rrf_k: int = DEFAULT_RRF_K,
+                 ef_search: int = DEFAULT_EF_SEARCH,
+                 max_ef_search: int = MAX_EF_SEARCH,
+                 iterative_scan: Optional[str] = DEFAULT_ITERATIVE_SCAN,
+                 embedding_storage: Optional[EmbeddingStorage] = None):
+        """
+        Initialize the product search client.
+        
+        Args:
+            query_cache: Cache for query embeddings. Defaults to an in-process
+                LRU; pass ``QueryEmbeddingCache(use_database=True)`` to share
+                it between processes through Postgres.
+            hybrid: Fuse full-text, trigram and vector candidates (True) or
+                use the vector index alone after the exact SKU lookup (False,
+                the default). Hybrid results have ``search_type='hybrid'``,
+                a ``relevance_score`` that is the RRF score scaled to 0-1 (not
+                the vector similarity), and lexical hits that are not bound by
+                ``similarity_threshold`` (it only filters vector candidates).
+            candidate_depth: Candidates taken from each index before fusion.
+            rrf_k: Reciprocal-rank fusion constant.
+            ef_search: HNSW ``ef_search`` per query (at least the number of
+                rows the query needs).
+            max_ef_search: Upper bound when widening a starved vector search.
+            iterative_scan: ``hnsw.iterative_scan`` mode for vector queries
+                (None to leave it unset). Ignored, with a warning, if the
+                installed pgvector is older than 0.8.
+            embedding_storage: Embedding index layout (must match the index
+                built by ``ProductUpdater``); defaults to the environment
+                configuration. In compact mode candidates are re-ranked with
+                the full-precision vectors.
+        """
         self.logger = logger.bind(component="product_search_client")
         self.embedding_generator = EmbeddingGenerator()
+        self.query_cache = query_cache if query_cache is not None else QueryEmbeddingCache()
+        self.hybrid = hybrid
+        self.candidate_depth = max(1, int(candidate_depth))
+        self.rrf_k = max(1, int(rrf_k))
+        self.ef_search = max(1, int(ef_search))
+        self.max_ef_search = max(self.ef_search, int(max_ef_search))
+        self.iterative_scan = iterative_scan
+        # Whether the installed pgvector supports iterative_scan (checked once)
+        self._iterative_scan_supported: Optional[bool] = None
+        self.embedding_storage = embedding_storage or EmbeddingStorage.from_env()
         
         self.logger.info("ProductSearchClient initialized")
     
@@ -62,6 +129,199 @@ class ProductSearchClient:
             self.logger.error("Failed to search products", error=str(e), query=query)
             return []
     
+    def search_products_many(self, queries: List[str], limit: int = 20,
+                             similarity_threshold: float = 0.8,
+                             hybrid: Optional[bool] = None) -> List[List[SearchResult]]:
+        """
+        Batch version of ``search_products`` for many queries at once.
+        
+        Instead of one cursor, one embedding request and one vector query per
+        query, this resolves exact SKUs with a single ``sku = ANY(...)``
+        lookup, embeds every remaining query in one OpenAI request (skipping
+        those already in the query cache) and runs all ANN searches in one
+        round trip with a ``LATERAL`` join over the unnested query vectors.
+        
+        In hybrid mode each remaining query runs the same fused search as
+        ``search_products`` (one statement per query, reusing the batch
+        embeddings), so both APIs return the same results for a query. A
+        query the batch could not embed keeps only its lexical legs, and a
+        failing query returns ``[]`` without affecting the others.
+        
+        Args:
+            queries: Search queries (SKUs or product names/descriptions)
+            limit: Maximum number of results per query
+            similarity_threshold: Minimum similarity score for semantic search (0.0-1.0)
+            hybrid: Fuse lexical and vector candidates; defaults to the
+                client's ``hybrid`` setting
+            
+        Returns:
+            One list of SearchResult per query, in the same order as ``queries``
+        """
+        limit = 99999 if limit is None else limit
+        hybrid = self.hybrid if hybrid is None else hybrid
+        cleaned = [(query or "").strip() for query in queries]
+        results: List[List[SearchResult]] = [[] for _ in cleaned]
+        
+        self.logger.info(
+            "Searching products for many queries",
+            queries=len(cleaned),
+            limit=limit,
+            similarity_threshold=similarity_threshold
+        )
+        
+        try:
+            with database.get_cursor(commit=False) as cursor:
+                # STEP 1: Exact SKU matches for every query in one lookup
+                exact = self._search_exact_skus(cursor, {query.upper() for query in cleaned if query})
+                semantic_positions = []
+                for position, query in enumerate(cleaned):
+                    row = exact.get(query.upper()) if query else None
+                    if row is not None:
+                        results[position] = [SearchResult.from_db_row(
+                            row, search_type='exact_sku', relevance_score=1.0
+                        )]
+                    elif query:
+                        semantic_positions.append(position)
+                
+                # STEP 2: Embeddings for the rest, one API request for the misses
+                embeddings = self._generate_query_embeddings([cleaned[p] for p in semantic_positions])
+                vector_positions = [
+                    (position, embedding)
+                    for position, embedding in zip(semantic_positions, embeddings)
+                    if embedding
+                ]
+                
+                # STEP 3 (hybrid): Fused search per query, same as search_products
+                if hybrid and limit > 0:
+                    for position, embedding in zip(semantic_positions, embeddings):
+                        results[position] = [
+                            self._hybrid_result(row)
+                            for row in self._search_fused(
+                                cursor, cleaned[position], limit, similarity_threshold,
+                                query_embedding=embedding, embed=False
+                            )
+                        ]
+                
+                # STEP 3: All ANN searches in one round trip
+                elif vector_positions and limit > 0:
+                    rows_by_query = self._search_by_embeddings(
+                        cursor, [embedding for _, embedding in vector_positions],
+                        limit, similarity_threshold
+                    )
+                    for index, (position, _) in enumerate(vector_positions):
+                        results[position] = [
+                            SearchResult.from_db_row(
+                                row,
+                                search_type='semantic',
+                                relevance_score=row.get('similarity_score', 0.5),
+                                similarity_score=row.get('similarity_score')
+                            )
+                            for row in rows_by_query.get(index, [])
+                        ]
+            
+            self.logger.info(
+                "Batch search completed",
+                queries=len(cleaned),
+                exact_sku_matches=len(cleaned) - len(semantic_positions),
+                semantic_queries=len(semantic_positions)
+            )
+            return results
+        
+        except Exception as e:
+            self.logger.error("Failed to search products in batch", error=str(e), queries=len(cleaned))
+            return [[] for _ in cleaned]
+    
+    def _search_exact_skus(self, cursor, skus) -> Dict[str, Dict[str, Any]]:
+        """
+        Active products for a set of (uppercase) SKUs in one query.
+        
+        Returns:
+            Dictionary sku -> product row
+        """
+        if not skus:
+            return {}
+        cursor.execute(f"""
+            SELECT {PRODUCT_COLUMNS}
+            FROM products
+            WHERE sku = ANY(%s) AND is_active = true
+        """, (list(skus),))
+        return {row['sku']: dict(row) for row in cursor.fetchall()}
+    
+    def _generate_query_embeddings(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embeddings for many queries, aligned with ``queries``.
+        
+        Cached queries are served from ``self.query_cache``; the distinct
+        remaining ones go to the API in a single ``generate`` call.
+        """
+        model = self.embedding_generator.model
+        embeddings: List[Optional[List[float]]] = [self.query_cache.get(model, query) for query in queries]
+        
+        missing: Dict[str, List[int]] = {}
+        for index, (query, embedding) in enumerate(zip(queries, embeddings)):
+            if embedding is None:
+                missing.setdefault(self.query_cache.normalize_query(query), []).append(index)
+        if not missing:
+            return embeddings
+        
+        # Embed the normalized text each cache entry stands for
+        texts = list(missing)
+        try:
+            generated = self.embedding_generator.generate(texts)
+        except Exception as e:
+            self.logger.error("Failed to generate query embeddings", error=str(e), queries=len(texts))
+            return embeddings
+        if len(generated) != len(texts):
+            self.logger.error(
+                "Mismatch between number of queries and embeddings",
+                queries_count=len(texts),
+                embeddings_count=len(generated)
+            )
+            return embeddings
+        
+        for text, indexes, embedding in zip(texts, missing.values(), generated):
+            self.query_cache.put(model, text, embedding)
+            for index in indexes:
+                embeddings[index] = embedding
+        return embeddings
+    
+    def _search_by_embeddings(self, cursor, query_embeddings: List[List[float]], limit: int,
+                              similarity_threshold: float) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Nearest products for several query vectors in one query.
+        
+        Each vector gets its own ``ORDER BY distance LIMIT`` through a
+        ``LATERAL`` subquery, so the HNSW index is used per query vector.
+        
+        Returns:
+            Dictionary query index (0-based) -> rows ordered by similarity
+        """
+        candidates = self.embedding_storage.candidates(limit)
+        self._set_vector_search_params(cursor, candidates)
+        nearest = self.embedding_storage.nearest_sql(
+            "q.query_embedding", PRODUCT_COLUMNS, "%(limit)s", "%(candidates)s"
+        )
+        cursor.execute(f"""
+            SELECT q.ord - 1 AS query_index, p.*, 1 - p.distance AS similarity_score
+            FROM unnest(%(embeddings)s::vector[]) WITH ORDINALITY AS q(query_embedding, ord)
+            CROSS JOIN LATERAL ({nearest}) p
+            WHERE 1 - p.distance > %(threshold)s
+            ORDER BY q.ord, p.distance
+        """, {
+            "embeddings": [str(embedding) for embedding in query_embeddings],
+            "limit": limit,
+            "candidates": candidates,
+            "threshold": similarity_threshold,
+        })
+        
+        rows_by_query: Dict[int, List[Dict[str, Any]]] = {}
+        for row in cursor.fetchall():
+            result = dict(row)
+            query_index = result.pop('query_index')
+            result['similarity_score'] = max(0.0, min(1.0, result['similarity_score']))
+            rows_by_query.setdefault(query_index, []).append(result)
+        return rows_by_query
+    
     def _hybrid_search(self, cursor, query: str, limit: int, 
                       similarity_threshold: float) -> List[SearchResult]:
         """
@@ -93,9 +353,14 @@ class ProductSearchClient:
             self.logger.info("Found exact SKU match", sku=exact_sku_result['sku'])
             return results
         
-        # STEP 2: Semantic embedding search
+        # STEP 2: Lexical + semantic candidates fused by reciprocal rank
         remaining_limit = limit - len(results)
-        if remaining_limit > 0:
+        if remaining_limit > 0 and self.hybrid:
+            for row in self._search_fused(cursor, query, remaining_limit, similarity_threshold):
+                results.append(self._hybrid_result(row))
+        
+        # STEP 2 (vector only): Semantic embedding search
+        elif remaining_limit > 0:
             semantic_results = self._search_by_embedding(
                 cursor, query, remaining_limit, similarity_threshold
             )
@@ -120,11 +385,220 @@ class ProductSearchClient:
             "Hybrid search completed",
             total_results=len(results),
             exact_sku_matches=sum(1 for r in results if r.search_type == 'exact_sku'),
-            semantic_matches=sum(1 for r in results if r.search_type == 'semantic')
+            semantic_matches=sum(1 for r in results if r.search_type == 'semantic'),
+            hybrid_matches=sum(1 for r in results if r.search_type == 'hybrid')
         )
         
         return results[:limit]
     
+    def _set_vector_search_params(self, cursor, rows_needed: int) -> int:
+        """
+        Set HNSW search parameters for the current transaction.
+        
+        ``ef_search`` bounds how many rows an HNSW scan can return, so it is
+        raised to ``rows_needed`` when a query asks for more than that.
+        
+        Returns:
+            The ef_search applied
+        """
+        ef_search = min(self.max_ef_search, max(self.ef_search, rows_needed))
+        # set_config(..., true) == SET LOCAL, and it takes bind parameters
+        cursor.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),))
+        if self._uses_iterative_scan(cursor):
+            cursor.execute("SELECT set_config('hnsw.iterative_scan', %s, true)", (self.iterative_scan,))
+        return ef_search
+    
+    def _uses_iterative_scan(self, cursor) -> bool:
+        """
+        True if ``iterative_scan`` is configured and pgvector supports it.
+        
+        Setting an unknown ``hnsw.*`` parameter is an error once pgvector is
+        loaded, so the extension version is checked (once per client) before
+        the parameter is ever set.
+        """
+        if not self.iterative_scan:
+            return False
+        if self._iterative_scan_supported is None:
+            cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            row = cursor.fetchone()
+            version = tuple(int(part) for part in row['extversion'].split('.')[:2]) if row else (0, 0)
+            self._iterative_scan_supported = version >= ITERATIVE_SCAN_MIN_VERSION
+            if not self._iterative_scan_supported:
+                self.logger.warning(
+                    "hnsw.iterative_scan requires pgvector >= 0.8, ignoring it",
+                    pgvector_version=row['extversion'] if row else None
+                )
+        return self._iterative_scan_supported
+    
+    def _count_embedded_products(self, cursor, up_to: int) -> int:
+        """Active products with an embedding, counting at most ``up_to``."""
+        cursor.execute("""
+            SELECT count(*) AS total FROM (
+                SELECT 1 FROM products
+                WHERE embedding IS NOT NULL AND is_active = true
+                LIMIT %s
+            ) embedded
+        """, (up_to,))
+        return cursor.fetchone()['total']
+    
+    @staticmethod
+    def _hybrid_result(row: Dict[str, Any]) -> SearchResult:
+        """SearchResult of a ``_search_fused`` row."""
+        return SearchResult.from_db_row(
+            row,
+            search_type='hybrid',
+            relevance_score=row['relevance_score'],
+            similarity_score=row.get('similarity_score')
+        )
+    
+    def _search_fused(self, cursor, query: str, limit: int,
+                      similarity_threshold: float,
+                      query_embedding: Optional[List[float]] = None,
+                      embed: bool = True) -> List[Dict[str, Any]]:
+        """
+        Hybrid search: full-text, trigram and vector candidates fused with RRF.
+        
+        Each index contributes its top ``candidate_depth`` products:
+        
+        - full-text (``search_tsv`` GIN index) for keyword-heavy queries,
+        - trigram (``pg_trgm`` GIN indexes) for partial SKUs, barcodes and
+          misspelled names,
+        - vector (HNSW index), keeping only similarities above
+          ``similarity_threshold``.
+        
+        A product's score is ``sum(1 / (rrf_k + rank))`` over the lists it
+        appears in, so products found by several indexes rise to the top. The
+        whole search is one statement and every leg is index-driven. It runs
+        in a savepoint, so a failure leaves the caller's transaction usable.
+        
+        Args:
+            cursor: Database cursor
+            query: Clean search query
+            limit: Maximum number of results
+            similarity_threshold: Minimum similarity for vector candidates
+            query_embedding: Precomputed query vector
+            embed: Embed the query when ``query_embedding`` is None; False
+                skips the vector leg instead (e.g. the batch embedding failed)
+            
+        Returns:
+            Product dictionaries with ``relevance_score`` (RRF score scaled to
+            0-1) and ``similarity_score`` (vector similarity, None if the
+            product was only found lexically)
+        """
+        cursor.execute("SAVEPOINT fused_search")
+        try:
+            # The vector leg is skipped (not the whole search) if the query
+            # can't be embedded
+            if query_embedding is None and embed:
+                query_embedding = self._generate_query_embedding(query)
+            like_query = (
+                query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            if query_embedding:
+                candidates = self.embedding_storage.candidates(self.candidate_depth)
+                self._set_vector_search_params(cursor, candidates)
+                nearest = self.embedding_storage.nearest_sql(
+                    "%(embedding)s::vector", "sku", "%(depth)s", "%(candidates)s"
+                )
+                vector_hits = f"""
+                    SELECT sku, 1 - distance AS similarity,
+                           ROW_NUMBER() OVER (ORDER BY distance) AS rank
+                    FROM ({nearest}) nearest
+                    WHERE 1 - distance > %(threshold)s
+                """
+            else:
+                candidates = 0
+                vector_hits = "SELECT NULL::varchar AS sku, NULL::float8 AS similarity, NULL::bigint AS rank WHERE false"
+            
+            cursor.execute(f"""
+                WITH fulltext_hits AS (
+                    SELECT sku, ROW_NUMBER() OVER (ORDER BY score DESC) AS rank
+                    FROM (
+                        SELECT sku, ts_rank_cd(search_tsv, tsq) AS score
+                        FROM products,
+                             (SELECT websearch_to_tsquery('spanish', %(query)s)
+                                     || websearch_to_tsquery('simple', %(query)s) AS tsq) q
+                        WHERE is_active = true AND search_tsv @@ tsq
+                        ORDER BY score DESC
+                        LIMIT %(depth)s
+                    ) ranked
+                ),
+                trigram_hits AS (
+                    SELECT sku, ROW_NUMBER() OVER (ORDER BY score DESC) AS rank
+                    FROM (
+                        SELECT sku, GREATEST(
+                                   word_similarity(%(query)s, name),
+                                   similarity(sku, %(query)s),
+                                   CASE WHEN sku ILIKE %(prefix)s OR barcode ILIKE %(prefix)s
+                                        THEN 1 ELSE 0 END
+                               ) AS score
+                        FROM products
+                        WHERE is_active = true
+                          AND (%(query)s <%% name
+                               OR sku ILIKE %(contains)s
+                               OR barcode ILIKE %(contains)s)
+                        ORDER BY score DESC
+                        LIMIT %(depth)s
+                    ) ranked
+                ),
+                vector_hits AS ({vector_hits}),
+                fused AS (
+                    SELECT sku,
+                           SUM(1.0 / (%(rrf_k)s + rank)) AS rrf_score,
+                           MAX(similarity) AS vector_similarity
+                    FROM (
+                        SELECT sku, rank, NULL::float8 AS similarity FROM fulltext_hits
+                        UNION ALL
+                        SELECT sku, rank, NULL::float8 FROM trigram_hits
+                        UNION ALL
+                        SELECT sku, rank, similarity FROM vector_hits
+                    ) hits
+                    GROUP BY sku
+                )
+                SELECT {PRODUCT_COLUMNS}, fused.rrf_score, fused.vector_similarity
+                FROM fused
+                JOIN products USING (sku)
+                ORDER BY fused.rrf_score DESC, fused.vector_similarity DESC NULLS LAST
+                LIMIT %(limit)s
+            """, {
+                "query": query,
+                "prefix": f"{like_query}%",
+                "contains": f"%{like_query}%",
+                "embedding": str(query_embedding) if query_embedding else None,
+                "threshold": similarity_threshold,
+                "depth": self.candidate_depth,
+                "candidates": candidates,
+                "rrf_k": self.rrf_k,
+                "limit": limit,
+            })
+            
+            cursor.execute("RELEASE SAVEPOINT fused_search")
+            
+            # Best possible score: rank 1 in all three lists
+            max_score = 3.0 / (self.rrf_k + 1)
+            results = []
+            for row in cursor.fetchall():
+                result = dict(row)
+                rrf_score = float(result.pop('rrf_score'))
+                vector_similarity = result.pop('vector_similarity')
+                result['relevance_score'] = min(1.0, rrf_score / max_score)
+                result['similarity_score'] = (
+                    max(0.0, min(1.0, float(vector_similarity))) if vector_similarity is not None else None
+                )
+                results.append(result)
+            
+            self.logger.info(
+                f"Hybrid search found {len(results)} products",
+                query=query,
+                vector_leg=bool(query_embedding)
+            )
+            return results
+            
+        except Exception as e:
+            self.logger.error("Failed hybrid search", error=str(e), query=query)
+            cursor.execute("ROLLBACK TO SAVEPOINT fused_search")
+            return []
+    
     def _search_exact_sku(self, cursor, sku: str) -> Optional[Dict[str, Any]]:
         """
         Search for product by exact SKU match.
@@ -137,11 +611,8 @@ class ProductSearchClient:
             Product dictionary if found, None otherwise
         """
         try:
-            cursor.execute("""
-                SELECT sku, name, description, category_id, category_name, is_active, 
-                       list_price, standard_price, product_type, barcode, weight, volume,
-                       sale_ok, purchase_ok, uom_id, uom_name, company_id,
-                       text_for_embedding, last_update, created_at, updated_at
+            cursor.execute(f"""
+                SELECT {PRODUCT_COLUMNS}
                 FROM products 
                 WHERE sku = %s AND is_active = true
             """, (sku,))
@@ -174,26 +645,44 @@ class ProductSearchClient:
                 self.logger.warning("Could not generate embedding for query", query=query)
                 return []
             
-            # Search using vector similarity with threshold filter
-            cursor.execute("""
-                SELECT sku, name, description, category_id, category_name, is_active,
-                       list_price, standard_price, product_type, barcode, weight, volume,
-                       sale_ok, purchase_ok, uom_id, uom_name, company_id,
-                       text_for_embedding, last_update, created_at, updated_at,
-                       (embedding <=> %s::vector) as distance,
-                       (1 - (embedding <=> %s::vector)) as similarity_score
-                FROM products 
-                WHERE embedding IS NOT NULL 
-                  AND is_active = true
-                  AND (1 - (embedding <=> %s::vector)) > %s
-                ORDER BY embedding <=> %s::vector
-                LIMIT %s
-            """, (query_embedding, query_embedding, query_embedding, 
-                 similarity_threshold, query_embedding, limit))
+            # The threshold is applied to the k nearest rows, outside the index
+            # scan: filtering inside it could starve the scan and return fewer
+            # than `limit` rows. Without iterative scan a short result whose
+            # rows all pass the threshold is retried with a wider ef_search,
+            # unless there simply aren't `limit` embedded active products.
+            can_widen = not self._uses_iterative_scan(cursor)
+            ef_search = self.ef_search
+            embedded = None
+            candidates = self.embedding_storage.candidates(limit)
+            nearest = self.embedding_storage.nearest_sql(
+                "%(embedding)s::vector", PRODUCT_COLUMNS, "%(limit)s", "%(candidates)s"
+            )
+            while True:
+                ef_search = self._set_vector_search_params(cursor, max(ef_search, candidates))
+                cursor.execute(f"""
+                    SELECT nearest.*, 1 - distance AS similarity_score
+                    FROM ({nearest}) nearest
+                    ORDER BY distance
+                """, {"embedding": str(query_embedding), "limit": limit, "candidates": candidates})
+                rows = [dict(row) for row in cursor.fetchall()]
+                
+                starved = (
+                    len(rows) < limit
+                    and (not rows or rows[-1]['similarity_score'] > similarity_threshold)
+                )
+                if not starved or not can_widen or ef_search >= self.max_ef_search:
+                    break
+                if embedded is None:
+                    embedded = self._count_embedded_products(cursor, limit)
+                if embedded <= len(rows):
+                    break  # the scan already returned every embedded product
+                self.logger.debug("Widening vector search", ef_search=ef_search * 2, rows=len(rows))
+                ef_search *= 2
             
             results = []
-            for row in cursor.fetchall():
-                result = dict(row)
+            for result in rows:
+                if result['similarity_score'] <= similarity_threshold:
+                    break  # rows are ordered by distance
                 # Convert distance to a more intuitive similarity score (0-1)
                 result['similarity_score'] = max(0.0, min(1.0, result['similarity_score']))
                 results.append(result)
@@ -212,6 +701,9 @@ class ProductSearchClient:
         """
         Generate embedding for search query using OpenAI API.
         
+        Repeated queries are served from ``self.query_cache`` without calling
+        the API.
+        
         Args:
             query: Search query text
             
@@ -219,17 +711,27 @@ class ProductSearchClient:
             Embedding vector as list of floats, or None if failed
         """
         try:
-            embeddings = self.embedding_generator.generate([query])
-            
-            if embeddings and len(embeddings) > 0:
-                return embeddings[0]
-            
-            return None
+            return self.query_cache.get_or_create(
+                self.embedding_generator.model, query, self._embed_query
+            )
             
         except Exception as e:
             self.logger.error("Failed to generate query embedding", error=str(e), query=query)
             return None
     
+    def _embed_query(self, query: str) -> Optional[List[float]]:
+        """Call the embedding API for a single query."""
+        embeddings = self.embedding_generator.generate([query])
+        
+        if embeddings and len(embeddings) > 0:
+            return embeddings[0]
+        
+        return None
+    
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the query embedding cache."""
+        return self.query_cache.stats()
+    
     def search_by_sku(self, sku: str) -> Optional[SearchResult]:
         """
         Search for a single product by exact SKU.
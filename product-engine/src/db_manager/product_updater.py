@@ -11,10 +11,18 @@ from psycopg2.extras import execute_values
 import structlog
 
 from common.database import database
+from common.embedding_cache import EmbeddingCache
+from common.embedding_storage import EmbeddingStorage
+from common.product_frame import COPY_NULL, UPSERT_COLUMNS, VARCHAR_LIMITS, prepare_products_frame, to_copy_csv
 from common.models import ProductData
 
 logger = structlog.get_logger(__name__)
 
+# HNSW build parameters for the embedding index (pgvector defaults). Higher m
+# and ef_construction give better recall at the cost of build time and size.
+DEFAULT_HNSW_M = 16
+DEFAULT_HNSW_EF_CONSTRUCTION = 64
+
 
 class ProductUpdater:
     """
@@ -24,14 +32,28 @@ class ProductUpdater:
     deactivation, and embedding updates with pgvector support.
     """
     
-    def __init__(self):
-        """Initialize the product updater."""
+    def __init__(self, embedding_storage: Optional[EmbeddingStorage] = None):
+        """
+        Initialize the product updater.
+        
+        Args:
+            embedding_storage: Embedding index layout; defaults to the
+                environment configuration (full precision if unset).
+        """
         self.logger = logger.bind(component="product_updater")
+        self.embedding_storage = embedding_storage or EmbeddingStorage.from_env()
         self.logger.info("ProductUpdater initialized")
     
-    def create_products_table(self):
+    def create_products_table(self, hnsw_m: int = DEFAULT_HNSW_M,
+                              hnsw_ef_construction: int = DEFAULT_HNSW_EF_CONSTRUCTION):
         """
         Create the products table with pgvector support if it doesn't exist.
+        
+        Args:
+            hnsw_m: HNSW ``m`` (links per node) for a new embedding index.
+            hnsw_ef_construction: HNSW ``ef_construction`` for a new embedding index.
+                An existing index keeps its parameters; use
+                ``rebuild_embedding_index`` to change them.
         """
         self.logger.info("Creating products table...")
         
@@ -80,9 +102,31 @@ class ProductUpdater:
         -- Index for product type
         CREATE INDEX IF NOT EXISTS idx_products_type ON products (product_type);
         
-        -- Vector similarity index (using HNSW algorithm)
-        CREATE INDEX IF NOT EXISTS idx_products_embedding ON products 
-        USING hnsw (embedding vector_cosine_ops);
+        -- Vector similarity index (using HNSW algorithm), partial over active
+        -- products: every vector search filters on is_active, and the index
+        -- then never spends candidates on inactive rows
+        DROP INDEX IF EXISTS idx_products_embedding;
+        """ + self._embedding_index_sql(hnsw_m, hnsw_ef_construction)
+        
+        # Lexical side of the hybrid search: full-text over SKU/name/text and
+        # trigram indexes for partial SKUs, barcodes and misspelled names.
+        # Only hybrid search (opt-in) reads it, so it must not break the sync
+        # on servers without pg_trgm
+        create_search_sql = """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        
+        ALTER TABLE products ADD COLUMN IF NOT EXISTS search_tsv TSVECTOR
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+            setweight(to_tsvector('spanish', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(barcode, '')), 'A') ||
+            setweight(to_tsvector('spanish', coalesce(text_for_embedding, '')), 'B')
+        ) STORED;
+        
+        CREATE INDEX IF NOT EXISTS idx_products_search_tsv ON products USING gin (search_tsv);
+        CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING gin (name gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_products_sku_trgm ON products USING gin (sku gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS idx_products_barcode_trgm ON products USING gin (barcode gin_trgm_ops);
         """
         
         create_trigger_sql = """
@@ -116,9 +160,16 @@ class ProductUpdater:
                 cursor.execute(create_indexes_sql)
                 self.logger.info("Database indexes created/verified")
                 
+                # Create full-text column and lexical search indexes
+                self._create_search_schema(cursor, create_search_sql)
+                
                 # Create trigger
                 cursor.execute(create_trigger_sql)
                 self.logger.info("Database triggers created/verified")
+                
+                # Create embedding cache
+                EmbeddingCache().create_table(cursor)
+                self.logger.info("Embedding cache table created/verified")
             
             self.logger.info("Database schema setup completed successfully")
             
@@ -126,6 +177,110 @@ class ProductUpdater:
             self.logger.error("Failed to create products table", error=str(e))
             raise RuntimeError("Failed to create database schema") from e
     
+    def _create_search_schema(self, cursor, create_search_sql: str) -> bool:
+        """
+        Create the lexical search schema inside a savepoint.
+        
+        On failure (e.g. pg_trgm not available) only this part is rolled
+        back and skipped; hybrid search will not work until it exists.
+        
+        Returns:
+            True if the schema was created/verified
+        """
+        cursor.execute("SAVEPOINT search_schema")
+        try:
+            cursor.execute(create_search_sql)
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT search_schema")
+            self.logger.warning(
+                "Skipping lexical search schema; hybrid search unavailable",
+                error=str(e)
+            )
+            return False
+        cursor.execute("RELEASE SAVEPOINT search_schema")
+        self.logger.info("Search indexes created/verified")
+        return True
+    
+    def _embedding_index_sql(self, m: int, ef_construction: int) -> str:
+        """CREATE INDEX statement of the partial HNSW embedding index."""
+        storage = self.embedding_storage
+        return f"""
+        CREATE INDEX IF NOT EXISTS {storage.index_name} ON products
+        USING hnsw (({storage.expression('embedding')}) {storage.operator_class})
+        WITH (m = {int(m)}, ef_construction = {int(ef_construction)})
+        WHERE is_active = true;
+        """
+    
+    def rebuild_embedding_index(self, hnsw_m: int = DEFAULT_HNSW_M,
+                                hnsw_ef_construction: int = DEFAULT_HNSW_EF_CONSTRUCTION):
+        """
+        Rebuild the HNSW embedding index with new build parameters.
+        
+        Vector searches fall back to a sequential scan while the index is
+        being rebuilt.
+        
+        Args:
+            hnsw_m: HNSW ``m`` (links per node).
+            hnsw_ef_construction: HNSW ``ef_construction``.
+        """
+        self.logger.info(
+            "Rebuilding embedding index",
+            m=hnsw_m,
+            ef_construction=hnsw_ef_construction
+        )
+        try:
+            with database.get_cursor() as cursor:
+                cursor.execute(f"DROP INDEX IF EXISTS {self.embedding_storage.index_name};")
+                cursor.execute(self._embedding_index_sql(hnsw_m, hnsw_ef_construction))
+            self.logger.info("Embedding index rebuilt")
+        
+        except Exception as e:
+            self.logger.error("Failed to rebuild embedding index", error=str(e))
+            raise RuntimeError("Embedding index rebuild failed") from e
+    
+    def migrate_embedding_storage(self, hnsw_m: int = DEFAULT_HNSW_M,
+                                  hnsw_ef_construction: int = DEFAULT_HNSW_EF_CONSTRUCTION) -> List[str]:
+        """
+        Switch the embedding index to the configured storage layout.
+        
+        The compact index is an expression over the existing ``embedding``
+        column, so no data is rewritten: the new index is built first (the old
+        one keeps serving searches meanwhile) and then every other embedding
+        index on ``products`` is dropped. Running it again is a no-op, and
+        switching back to full precision works the same way.
+        
+        Returns:
+            Names of the dropped indexes
+        """
+        target = self.embedding_storage.index_name
+        self.logger.info(
+            "Migrating embedding storage",
+            index=target,
+            precision=self.embedding_storage.precision,
+            dimensions=self.embedding_storage.dimensions
+        )
+        try:
+            with database.get_cursor() as cursor:
+                cursor.execute(self._embedding_index_sql(hnsw_m, hnsw_ef_construction))
+            
+            with database.get_cursor() as cursor:
+                cursor.execute("""
+                    SELECT indexname FROM pg_indexes
+                    WHERE tablename = 'products'
+                      AND indexname LIKE 'idx\\_products\\_embedding%%'
+                      AND indexname <> %s
+                """, (target,))
+                dropped = [row['indexname'] for row in cursor.fetchall()]
+                for index_name in dropped:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+            
+            self.logger.info("Embedding storage migrated", index=target, dropped=dropped)
+            return dropped
+        
+        except Exception as e:
+            self.logger.error("Failed to migrate embedding storage", error=str(e))
+            raise RuntimeError("Embedding storage migration failed") from e
+    
     def upsert_products(self, products_df: pd.DataFrame) -> List[str]:
         """
         Upsert products into the database using bulk operations.
@@ -165,89 +320,32 @@ class ProductUpdater:
                 
                 cursor.execute(temp_table_sql)
                 
-                # Prepare data for bulk insert
-                columns = [
-                    'sku', 'name', 'description', 'category_id', 'category_name',
-                    'is_active', 'list_price', 'standard_price', 'product_type',
-                    'barcode', 'weight', 'volume', 'sale_ok', 'purchase_ok',
-                    'uom_id', 'uom_name', 'company_id', 'text_for_embedding', 'last_update'
-                ]
-                
-                # Field length limits for validation
-                varchar_100_fields = {'sku', 'product_type', 'barcode', 'uom_name'}
-                varchar_255_fields = {'name', 'category_name'}
-                varchar_500_fields = {'description'}
-                many2one_fields = {'category_id', 'uom_id', 'company_id'}
-                
-                data_tuples = []
-                seen_skus = set()
-                duplicate_skus = set()
-                filtered_products = []
-                
                 self.logger.info(f"Processing {len(products_df)} products for upsert...")
                 
-                for idx, row in products_df.iterrows():
-                    # Validate field lengths and log warnings
-                    for field in ['name', 'description', 'category_name']:
-                        if field in row and row[field]:
-                            value = str(row[field])
-                            if len(value) > 100:
-                                self.logger.warning(
-                                    f"Value too long for {field} (max 100 chars): {value[:50]}... (length: {len(value)})"
-                                )
-                    
-                    # Check for duplicate SKUs
-                    sku = row.get('sku', '')
-                    if sku in seen_skus:
-                        duplicate_skus.add(sku)
-                        filtered_products.append({
-                            'reason': 'duplicate_sku',
-                            'sku': sku,
-                            'name': str(row.get('name', 'NULL')),
-                            'row_index': idx
-                        })
-                        continue  # Skip duplicate SKUs
-                    seen_skus.add(sku)
-                    
-                    # Validate SKU format
-                    if not sku or sku == 'None' or sku == 'False':
-                        filtered_products.append({
-                            'reason': 'invalid_sku_format',
-                            'sku': str(sku),
-                            'name': str(row.get('name', 'NULL')),
-                            'row_index': idx
-                        })
-                        continue
-                    
-                    # Process row data
-                    tuple_data = self._process_row_data(row, columns, many2one_fields, varchar_100_fields, varchar_255_fields, varchar_500_fields)
-                    if tuple_data is None:
-                        filtered_products.append({
-                            'reason': 'processing_error',
-                            'sku': sku,
-                            'name': str(row.get('name', 'NULL')),
-                            'row_index': idx
-                        })
-                        continue
-                    
-                    data_tuples.append(tuple_data)
+                # Validate, extract Many2one ids and truncate column by column
+                prepared_df, filtered_products, truncated = prepare_products_frame(products_df)
+                
+                for field, count in truncated.items():
+                    self.logger.warning(
+                        f"Truncated {count} values too long for {field} (max {VARCHAR_LIMITS[field]} chars)"
+                    )
                 
                 # Log detailed information about filtered products
                 self._log_filtered_products(filtered_products)
                 
-                # Bulk insert into temporary table
-                execute_values(
-                    cursor,
-                    f"INSERT INTO temp_products ({', '.join(columns)}) VALUES %s",
-                    data_tuples,
-                    page_size=1000
+                # Stream the prepared rows into the temporary table
+                cursor.copy_expert(
+                    f"COPY temp_products ({', '.join(UPSERT_COLUMNS)}) "
+                    f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                    to_copy_csv(prepared_df)
                 )
                 
                 # Log duplicate SKUs found
+                duplicate_skus = sorted({p['sku'] for p in filtered_products if p['reason'] == 'duplicate_sku'})
                 if duplicate_skus:
-                    self.logger.warning(f"Found {len(duplicate_skus)} duplicate SKUs: {list(duplicate_skus)[:10]}{'...' if len(duplicate_skus) > 10 else ''}")
+                    self.logger.warning(f"Found {len(duplicate_skus)} duplicate SKUs: {duplicate_skus[:10]}{'...' if len(duplicate_skus) > 10 else ''}")
                 
-                self.logger.info(f"Inserted {len(data_tuples)} records into temporary table (after filtering)")
+                self.logger.info(f"Inserted {len(prepared_df)} records into temporary table (after filtering)")
                 
                 # Perform upsert from temporary table
                 affected_skus = self._perform_upsert(cursor)
@@ -258,102 +356,6 @@ class ProductUpdater:
                 self.logger.info(f"Upsert completed, {len(affected_skus)} products affected")
                 return affected_skus
     
-    def _process_row_data(self, row, columns, many2one_fields, varchar_100_fields, varchar_255_fields, varchar_500_fields):
-        """Process a single row and return tuple data for database insertion."""
-        try:
-            tuple_data = []
-            for col in columns:
-                value = row[col]
-                processed_value = self._process_field_value(value, col, many2one_fields, varchar_100_fields, varchar_255_fields, varchar_500_fields)
-                tuple_data.append(processed_value)
-            return tuple(tuple_data)
-        except Exception as e:
-            self.logger.error(f"Error processing row data: {str(e)}")
-            return None
-    
-    def _process_field_value(self, value, col, many2one_fields, varchar_100_fields, varchar_255_fields, varchar_500_fields):
-        """Process a single field value with proper type handling."""
-        # Handle Many2one fields (extract ID from tuple/list)
-        if col in many2one_fields:
-            return self._process_many2one_value(value)
-        
-        # Handle pandas Series/DataFrame values
-        if hasattr(value, 'isna'):
-            return self._process_pandas_value(value, col, varchar_100_fields, varchar_255_fields, varchar_500_fields)
-        
-        # Handle list/tuple values
-        if isinstance(value, (list, tuple)):
-            return self._process_list_value(value)
-        
-        # Handle regular values
-        return self._process_regular_value(value, col, varchar_100_fields, varchar_255_fields, varchar_500_fields)
-    
-    def _process_many2one_value(self, value):
-        """Process Many2one field value (extract ID from tuple/list)."""
-        if isinstance(value, (list, tuple)) and len(value) > 0:
-            id_val = value[0]
-            return int(id_val) if isinstance(id_val, (int, float)) else None
-        elif isinstance(value, (int, float)):
-            return int(value)
-        return None
-    
-    def _process_pandas_value(self, value, col, varchar_100_fields, varchar_255_fields, varchar_500_fields):
-        """Process pandas Series/DataFrame value."""
-        if hasattr(value, 'any'):
-            # DataFrame column
-            if value.isna().any():
-                return None
-            
-            try:
-                processed_value = value.item()
-            except ValueError:
-                if len(value) > 0:
-                    first_val = value.iloc[0]
-                    if hasattr(first_val, 'item'):
-                        try:
-                            processed_value = first_val.item()
-                        except ValueError:
-                            processed_value = str(first_val)
-                    else:
-                        processed_value = first_val
-                else:
-                    processed_value = None
-        else:
-            # Series value
-            if value.isna():
-                return None
-            
-            try:
-                processed_value = value.item()
-            except ValueError:
-                processed_value = str(value)
-        
-        return self._truncate_string_value(processed_value, col, varchar_100_fields, varchar_255_fields, varchar_500_fields)
-    
-    def _process_list_value(self, value):
-        """Process list/tuple value."""
-        if not value or all(hasattr(item, 'isna') and item.isna() for item in value):
-            return None
-        return value
-    
-    def _process_regular_value(self, value, col, varchar_100_fields, varchar_255_fields, varchar_500_fields):
-        """Process regular value."""
-        return self._truncate_string_value(value, col, varchar_100_fields, varchar_255_fields, varchar_500_fields)
-    
-    def _truncate_string_value(self, value, col, varchar_100_fields, varchar_255_fields, varchar_500_fields):
-        """Truncate string values according to database limits."""
-        if not isinstance(value, str):
-            return value
-        
-        if col in varchar_100_fields and len(value) > 100:
-            return value[:100]
-        elif col in varchar_255_fields and len(value) > 255:
-            return value[:255]
-        elif col in varchar_500_fields and len(value) > 500:
-            return value[:500]
-        
-        return value
-    
     def _log_filtered_products(self, filtered_products):
         """Log detailed information about filtered products."""
         if not filtered_products:
@@ -421,6 +423,12 @@ class ProductUpdater:
                 uom_name = EXCLUDED.uom_name,
                 company_id = EXCLUDED.company_id,
                 text_for_embedding = EXCLUDED.text_for_embedding,
+                -- Keep the embedding unless the text it was computed from changed
+                embedding = CASE
+                    WHEN products.text_for_embedding IS DISTINCT FROM EXCLUDED.text_for_embedding
+                    THEN NULL
+                    ELSE products.embedding
+                END,
                 last_update = EXCLUDED.last_update
             RETURNING sku;
         """
@@ -428,43 +436,69 @@ class ProductUpdater:
         cursor.execute(upsert_sql)
         return [row['sku'] for row in cursor.fetchall()]
     
-    def deactivate_missing_products(self, active_skus: Set[str]) -> int:
+    def deactivate_missing_products(self, active_skus: Set[str]) -> List[str]:
         """
         Deactivate products that are no longer active in Odoo.
         
+        The active SKUs are streamed with COPY into an indexed temporary table
+        and products are deactivated with an anti-join, so the statement stays
+        the same size whatever the catalog size (no giant ``NOT IN`` list).
+        
         Args:
             active_skus: Set of currently active SKUs from Odoo
             
         Returns:
-            Number of products deactivated
+            SKUs that were deactivated by this call
         """
         self.logger.info(f"Deactivating products not in {len(active_skus)} active SKUs")
         
         try:
-            if active_skus:
-                # Convert set to list for SQL IN clause
-                active_skus_list = list(active_skus)
-                
-                deactivate_sql = """
-                    UPDATE products 
-                    SET is_active = false 
-                    WHERE is_active = true AND sku NOT IN %s
-                """
-                
-                deactivated_count = database.execute_update(
-                    deactivate_sql, 
-                    (tuple(active_skus_list),)
+            with database.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    if active_skus:
+                        cursor.execute("""
+                            CREATE TEMP TABLE temp_active_skus (
+                                sku TEXT PRIMARY KEY
+                            ) ON COMMIT DROP;
+                        """)
+                        
+                        buffer = io.StringIO()
+                        pd.Series(sorted(active_skus)).to_csv(buffer, header=False, index=False)
+                        buffer.seek(0)
+                        cursor.copy_expert("COPY temp_active_skus (sku) FROM STDIN WITH (FORMAT csv)", buffer)
+                        
+                        # Row estimates for the planner (temp tables are never auto-analyzed)
+                        cursor.execute("ANALYZE temp_active_skus")
+                        
+                        cursor.execute("""
+                            UPDATE products p
+                            SET is_active = false
+                            WHERE p.is_active = true
+                              AND NOT EXISTS (
+                                  SELECT 1 FROM temp_active_skus a WHERE a.sku = p.sku
+                              )
+                            RETURNING p.sku;
+                        """)
+                    else:
+                        # If no active SKUs, deactivate all products
+                        cursor.execute("""
+                            UPDATE products 
+                            SET is_active = false 
+                            WHERE is_active = true
+                            RETURNING sku;
+                        """)
+                    
+                    deactivated_skus = [row['sku'] for row in cursor.fetchall()]
+                    conn.commit()
+            
+            if deactivated_skus:
+                self.logger.info(
+                    f"Deactivated {len(deactivated_skus)} products",
+                    skus=deactivated_skus[:20]
                 )
             else:
-                # If no active SKUs, deactivate all products
-                deactivated_count = database.execute_update("""
-                    UPDATE products 
-                    SET is_active = false 
-                    WHERE is_active = true
-                """)
-            
-            self.logger.info(f"Deactivated {deactivated_count} products")
-            return deactivated_count
+                self.logger.info("Deactivated 0 products")
+            return deactivated_skus
         
         except Exception as e:
             self.logger.error("Failed to deactivate products", error=str(e))
@@ -508,6 +542,45 @@ class ProductUpdater:
             self.logger.error("Failed to update embeddings", error=str(e))
             raise RuntimeError("Embedding update failed") from e
     
+    def fill_embeddings_from_cache(self, model: str, sku_hashes: List[Tuple[str, str]]) -> List[str]:
+        """
+        Copy cached embeddings into products whose text was already embedded.
+        
+        Args:
+            model: Embedding model name.
+            sku_hashes: List of tuples (sku, content_hash)
+            
+        Returns:
+            SKUs whose embedding was filled from the cache
+        """
+        if not sku_hashes:
+            return []
+        
+        try:
+            with database.get_cursor() as cursor:
+                rows = execute_values(
+                    cursor,
+                    """
+                    UPDATE products p
+                    SET embedding = c.embedding
+                    FROM (VALUES %s) AS v(sku, model, content_hash)
+                    JOIN embedding_cache c
+                      ON c.model = v.model AND c.content_hash = v.content_hash
+                    WHERE p.sku = v.sku
+                    RETURNING p.sku
+                    """,
+                    [(sku, model, content_hash) for sku, content_hash in sku_hashes],
+                    page_size=1000,
+                    fetch=True,
+                )
+            filled = [row['sku'] for row in rows]
+            self.logger.info(f"Filled {len(filled)} embeddings from cache")
+            return filled
+        
+        except Exception as e:
+            self.logger.error("Failed to fill embeddings from cache", error=str(e))
+            raise RuntimeError("Embedding cache lookup failed") from e
+    
     def get_last_sync_date(self) -> Optional[str]:
         """
         Get the last synchronization date from the database.
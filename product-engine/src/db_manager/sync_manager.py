@@ -7,9 +7,11 @@ syncing products from Odoo to PostgreSQL with OpenAI embeddings generation.
 import os
 from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
+import pandas as pd
 import structlog
 
 from common.config import config
+from common.embedding_cache import EmbeddingCache, embedding_content_hash, normalize_embedding_text
 from common.embedding_generator import EmbeddingGenerator
 from db_manager.product_updater import ProductUpdater
 
@@ -18,6 +20,9 @@ from odoo_api.product import OdooProduct as BaseOdooProduct
 
 logger = structlog.get_logger(__name__)
 
+# Longitud máxima del nombre combinado (nombre base + atributos de variante)
+MAX_NAME_LENGTH = 500
+
 
 class OdooProduct(BaseOdooProduct):
     """
@@ -70,6 +75,7 @@ class SyncManager:
         self.odoo_product: Optional[OdooProduct] = None
         self.product_updater: Optional[ProductUpdater] = None
         self.embedding_generator: Optional[EmbeddingGenerator] = None
+        self.embedding_cache: Optional[EmbeddingCache] = None
         
         self.logger.info("SyncManager initialized")
     
@@ -89,6 +95,7 @@ class SyncManager:
             # Initialize Embedding Generator
             self.logger.info("Initializing Embedding Generator...")
             self.embedding_generator = EmbeddingGenerator()
+            self.embedding_cache = EmbeddingCache()
             
             self.logger.info("All modules initialized successfully")
             
@@ -141,26 +148,7 @@ class SyncManager:
             if not products_df.empty and 'default_code' in products_df.columns:
                 skus = products_df['default_code'].tolist()
                 atributos_dict = self.odoo_product.get_variant_attributes_by_sku(skus)
-                nombres_combinados = []
-                MAX_NAME_LENGTH = 500
-                for idx, row in products_df.iterrows():
-                    name = row['name']
-                    sku = row['default_code']
-                    atributos = atributos_dict.get(sku, [])
-                    if atributos:
-                        if isinstance(atributos, list):
-                            atributos_str = ", ".join(atributos)
-                        else:
-                            atributos_str = str(atributos)
-                        nombre_completo = f"{name} ({atributos_str})"
-                    else:
-                        nombre_completo = name
-                    # Truncar si excede el límite y loguear
-                    if len(nombre_completo) > MAX_NAME_LENGTH:
-                        self.logger.warning(f"Nombre combinado truncado a {MAX_NAME_LENGTH} caracteres", sku=sku, nombre_original=nombre_completo)
-                        nombre_completo = nombre_completo[:MAX_NAME_LENGTH]
-                    nombres_combinados.append(nombre_completo)
-                products_df['name'] = nombres_combinados
+                products_df['name'] = self._combine_variant_names(products_df, atributos_dict)
             
             if products_df.empty:
                 self.logger.info("No products to sync")
@@ -169,6 +157,7 @@ class SyncManager:
                     "products_processed": 0,
                     "products_upserted": 0,
                     "products_deactivated": 0,
+                    "deactivated_skus": [],
                     "embeddings_generated": 0,
                     "duration_seconds": (datetime.now(timezone.utc) - sync_start_time).total_seconds(),
                     "last_sync_date": last_sync_date
@@ -188,7 +177,7 @@ class SyncManager:
             active_skus = self.odoo_product.get_active_skus()
             
             self.logger.info("Deactivating products no longer active in Odoo...")
-            deactivated_count = self.product_updater.deactivate_missing_products(active_skus)
+            deactivated_skus = self.product_updater.deactivate_missing_products(active_skus)
             
             # Step 9: Generate embeddings for affected products
             embeddings_generated = 0
@@ -204,15 +193,17 @@ class SyncManager:
                 "success": True,
                 "products_processed": len(products_df),
                 "products_upserted": len(affected_skus),
-                "products_deactivated": deactivated_count,
+                "products_deactivated": len(deactivated_skus),
+                "deactivated_skus": deactivated_skus,
                 "embeddings_generated": embeddings_generated,
                 "duration_seconds": duration,
                 "last_sync_date": sync_end_time.isoformat()
             }
             
+            # The SKU list can cover the whole catalog: log only the counts
             self.logger.info(
                 "Products synchronization completed successfully",
-                **results
+                **{key: value for key, value in results.items() if key != "deactivated_skus"}
             )
             
             return results
@@ -283,16 +274,14 @@ class SyncManager:
         initial_count = len(df)
         self.logger.info(f"Processing {initial_count} products from Odoo")
         
-        # Track invalid products for detailed logging
-        invalid_products = []
-        
         # Filter products by different criteria
-        df, invalid_products = self._filter_invalid_skus(df, invalid_products)
-        df, invalid_products = self._filter_invalid_names(df, invalid_products)
-        df, invalid_products = self._filter_inactive_products(df, invalid_products)
+        rejected = self._invalid_product_masks(df)
         
         # Log detailed information about invalid products
-        self._log_invalid_products(invalid_products)
+        self._log_invalid_products(df, rejected)
+        
+        valid_mask = ~(rejected['invalid_sku'] | rejected['invalid_name'] | rejected['inactive_in_odoo'])
+        df = df[valid_mask]
         
         final_count = len(df)
         
@@ -309,81 +298,90 @@ class SyncManager:
         self.logger.info(f"Mapped {len(df)} products for database insertion")
         return df
     
-    def _filter_invalid_skus(self, df, invalid_products):
-        """Filter out products with invalid SKUs."""
-        invalid_sku_mask = df['sku'].isna() | (df['sku'] == '') | (df['sku'] == 'False') | (df['sku'] == 'None')
-        invalid_sku_products = df[invalid_sku_mask]
-        
-        for _, row in invalid_sku_products.iterrows():
-            invalid_products.append({
-                'reason': 'invalid_sku',
-                'sku': str(row.get('sku', 'NULL')),
-                'name': str(row.get('name', 'NULL')),
-                'id': str(row.get('id', 'NULL'))
-            })
-        
-        return df[~invalid_sku_mask], invalid_products
-    
-    def _filter_invalid_names(self, df, invalid_products):
-        """Filter out products with invalid names."""
-        invalid_name_mask = df['name'].isna() | (df['name'] == '') | (df['name'] == 'False') | (df['name'] == 'None')
-        invalid_name_products = df[invalid_name_mask]
-        
-        for _, row in invalid_name_products.iterrows():
-            invalid_products.append({
-                'reason': 'invalid_name',
-                'sku': str(row.get('sku', 'NULL')),
-                'name': str(row.get('name', 'NULL')),
-                'id': str(row.get('id', 'NULL'))
-            })
-        
-        return df[~invalid_name_mask], invalid_products
+    def _combine_variant_names(self, products_df, atributos_dict) -> pd.Series:
+        """
+        Append variant attributes to the product names: "Name (attr1, attr2)".
+        
+        Args:
+            products_df: Odoo products with 'name' and 'default_code'
+            atributos_dict: Variant attributes (list or string) by SKU
+            
+        Returns:
+            Combined names, truncated to MAX_NAME_LENGTH
+        """
+        # One label per SKU with attributes (a dict pass, not a DataFrame row pass)
+        etiquetas = {
+            sku: ", ".join(atributos) if isinstance(atributos, list) else str(atributos)
+            for sku, atributos in atributos_dict.items()
+            if atributos
+        }
+        sufijos = products_df['default_code'].map(etiquetas)
+        con_atributos = sufijos.notna()
+        
+        nombres = products_df['name'].copy()
+        nombres[con_atributos] = (
+            products_df.loc[con_atributos, 'name'].astype(str) + " (" + sufijos[con_atributos] + ")"
+        )
+        
+        # Truncar si excede el límite y loguear (un solo aviso por lote)
+        demasiado_largos = nombres.str.len() > MAX_NAME_LENGTH
+        if demasiado_largos.any():
+            self.logger.warning(
+                f"{int(demasiado_largos.sum())} nombres combinados truncados a {MAX_NAME_LENGTH} caracteres",
+                skus=products_df.loc[demasiado_largos, 'default_code'].head(10).tolist()
+            )
+            nombres[demasiado_largos] = nombres[demasiado_largos].str.slice(0, MAX_NAME_LENGTH)
+        
+        return nombres
     
-    def _filter_inactive_products(self, df, invalid_products):
-        """Filter out products that are not active in Odoo."""
-        inactive_products = df[~df['is_active']]
-        
-        for _, row in inactive_products.iterrows():
-            invalid_products.append({
-                'reason': 'inactive_in_odoo',
-                'sku': str(row.get('sku', 'NULL')),
-                'name': str(row.get('name', 'NULL')),
-                'id': str(row.get('id', 'NULL'))
-            })
-        
-        return df[df['is_active']], invalid_products
+    def _invalid_product_masks(self, df) -> Dict[str, pd.Series]:
+        """
+        Boolean masks of the products to exclude, by reason.
+        
+        Each product is counted under the first reason it fails, in order:
+        invalid SKU, invalid name, inactive in Odoo.
+        """
+        invalid_values = ['', 'False', 'None']
+        invalid_sku = df['sku'].isna() | df['sku'].isin(invalid_values)
+        invalid_name = ~invalid_sku & (df['name'].isna() | df['name'].isin(invalid_values))
+        inactive = ~invalid_sku & ~invalid_name & ~df['is_active'].eq(True)
+        return {
+            'invalid_sku': invalid_sku,
+            'invalid_name': invalid_name,
+            'inactive_in_odoo': inactive
+        }
     
-    def _log_invalid_products(self, invalid_products):
-        """Log detailed information about invalid products."""
-        if not invalid_products:
+    def _log_invalid_products(self, df, rejected: Dict[str, pd.Series]):
+        """Log the number of invalid products per reason with a few examples."""
+        counts = {reason: int(mask.sum()) for reason, mask in rejected.items()}
+        total = sum(counts.values())
+        if not total:
             return
         
-        self.logger.warning(f"Found {len(invalid_products)} invalid products that will be excluded:")
+        self.logger.warning(f"Found {total} invalid products that will be excluded:")
         
-        # Group by reason
-        reasons = {}
-        for product in invalid_products:
-            reason = product['reason']
-            if reason not in reasons:
-                reasons[reason] = []
-            reasons[reason].append(product)
+        reason_descriptions = {
+            'invalid_sku': 'products without valid SKU',
+            'invalid_name': 'products without valid name',
+            'inactive_in_odoo': 'products marked as inactive in Odoo'
+        }
         
         # Log each reason with examples
-        for reason, products in reasons.items():
-            reason_descriptions = {
-                'invalid_sku': 'products without valid SKU',
-                'invalid_name': 'products without valid name',
-                'inactive_in_odoo': 'products marked as inactive in Odoo'
-            }
+        for reason, mask in rejected.items():
+            if not counts[reason]:
+                continue
             
-            self.logger.warning(f"  - {len(products)} {reason_descriptions.get(reason, reason)}")
+            self.logger.warning(f"  - {counts[reason]} {reason_descriptions.get(reason, reason)}")
             
             # Log first 3 examples for each reason
-            for product in products[:3]:
-                self.logger.warning(f"    Example: ID={product['id']}, SKU='{product['sku']}', Name='{product['name']}'")
+            examples = df.loc[mask].head(3)
+            for _, row in examples.iterrows():
+                self.logger.warning(
+                    f"    Example: ID={row.get('id', 'NULL')}, SKU='{row.get('sku', 'NULL')}', Name='{row.get('name', 'NULL')}'"
+                )
             
-            if len(products) > 3:
-                self.logger.warning(f"    ... and {len(products) - 3} more")
+            if counts[reason] > 3:
+                self.logger.warning(f"    ... and {counts[reason] - 3} more")
     
     def _generate_embeddings_for_skus(self, skus: List[str]) -> int:
         """
@@ -412,11 +410,39 @@ class SyncManager:
                 self.logger.info("No products need embeddings generation")
                 return 0
             
-            self.logger.info(f"Generating embeddings for {len(relevant_products)} products")
+            # Texts already embedded (by any product, now or before) come from the cache
+            model = self.embedding_generator.model
+            hashed_products = [
+                (sku, normalize_embedding_text(text), embedding_content_hash(text))
+                for sku, text in relevant_products
+            ]
+            filled = set(self.product_updater.fill_embeddings_from_cache(
+                model, [(sku, content_hash) for sku, _, content_hash in hashed_products]
+            ))
+            
+            # Only texts never seen before go to OpenAI, each one once
+            skus_by_hash: Dict[str, List[str]] = {}
+            texts_by_hash: Dict[str, str] = {}
+            for sku, text, content_hash in hashed_products:
+                if sku in filled or not text:
+                    continue
+                skus_by_hash.setdefault(content_hash, []).append(sku)
+                texts_by_hash.setdefault(content_hash, text)
+            
+            self.logger.info(
+                "Embedding cache lookup",
+                products=len(relevant_products),
+                cache_hits=len(filled),
+                texts_to_embed=len(texts_by_hash)
+            )
+            if not texts_by_hash:
+                return len(filled)
+            
+            self.logger.info(f"Generating embeddings for {len(texts_by_hash)} texts")
             
             # Extract texts for embedding generation
-            texts = [text for _, text in relevant_products]
-            skus_list = [sku for sku, _ in relevant_products]
+            hashes = list(texts_by_hash)
+            texts = [texts_by_hash[content_hash] for content_hash in hashes]
             
             # Generate embeddings
             embeddings = self.embedding_generator.generate(texts)
@@ -427,16 +453,22 @@ class SyncManager:
                     texts_count=len(texts),
                     embeddings_count=len(embeddings)
                 )
-                return 0
+                return len(filled)
+            
+            self.embedding_cache.store(model, zip(hashes, embeddings))
             
             # Prepare SKU-embedding pairs
-            sku_embeddings = list(zip(skus_list, embeddings))
+            sku_embeddings = [
+                (sku, embedding)
+                for content_hash, embedding in zip(hashes, embeddings)
+                for sku in skus_by_hash[content_hash]
+            ]
             
             # Update embeddings in database
             updated_count = self.product_updater.update_embeddings(sku_embeddings)
             
             self.logger.info(f"Successfully generated and stored {updated_count} embeddings")
-            return updated_count
+            return updated_count + len(filled)
             
         except Exception as e:
             self.logger.error("Failed to generate embeddings", error=str(e))
@@ -91,6 +91,38 @@ def search_products(query: str, limit: int = 20,
         return []
 
 
+def search_products_many(queries: List[str], limit: int = 20,
+                         similarity_threshold: float = 0.8) -> List[List[Dict[str, Any]]]:
+    """
+    Search many queries at once (e.g. every product mentioned in a message).
+    
+    Uses one SKU lookup, one embedding request and one vector query for the
+    whole batch instead of one of each per query.
+    
+    Args:
+        queries: Search queries (SKUs or product names/descriptions)
+        limit: Maximum number of results per query
+        similarity_threshold: Minimum similarity score for semantic search (0.0-1.0)
+        
+    Returns:
+        One list of product dictionaries per query, in the order of ``queries``
+    """
+    try:
+        search_client = get_search_client()
+        batches = search_client.search_products_many(
+            queries=queries,
+            limit=limit,
+            similarity_threshold=similarity_threshold
+        )
+        return [[result.to_dict() for result in results] for results in batches]
+        
+    except Exception as e:
+        import structlog
+        logger = structlog.get_logger(__name__)
+        logger.error("Search products many failed", error=str(e), queries=len(queries))
+        return [[] for _ in queries]
+
+
 def get_product_by_sku(sku: str) -> Optional[Dict[str, Any]]:
     """
     Get a single product by SKU.
@@ -138,6 +170,7 @@ def get_products_count(active_only: bool = True) -> int:
 __all__ = [
     # Main search function (backward compatibility)
     "search_products",
+    "search_products_many",
     "get_product_by_sku", 
     "get_products_count",
     
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+HNSW recall@k vs. latency benchmark on a synthetic vector table.
+
+Creates ``bench_hnsw_vectors`` with N clustered random vectors (default 100k,
+~10% inactive), builds the same partial HNSW index the products table uses,
+computes exact nearest neighbours with a sequential scan, and then measures
+recall@k and p50/p95 latency for a range of ef_search values, with the
+threshold applied inside the scan (old query) and outside it (current query).
+
+With --precision half and/or --dimensions N the index is built over the
+compact expression used by ``EmbeddingStorage`` and searches re-rank
+``--rerank-factor * k`` candidates at full precision, so recall and index
+size can be compared with the full-precision index.
+
+Only needs the product database (no OpenAI). The table is dropped at the end
+unless --keep is given.
+
+Usage:
+    python tests/library/bench_hnsw.py --rows 100000 --dim 1536 --m 16 --ef-construction 64
+    python tests/library/bench_hnsw.py --precision half --dimensions 512 --rerank-factor 4
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from common.database import database
+from common.embedding_storage import EmbeddingStorage
+
+TABLE = "bench_hnsw_vectors"
+
+
+def vector_literal(vector):
+    return "[" + ",".join(f"{x:.6f}" for x in vector) + "]"
+
+
+def make_vectors(rows, dim, clusters, rng):
+    # Clustered data behaves like real embeddings (uniform noise is the worst case for HNSW)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_table(vectors, inactive_ratio, rng, m, ef_construction, storage):
+    dim = vectors.shape[1]
+    active = rng.random(len(vectors)) >= inactive_ratio
+    with database.get_cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(f"""
+            CREATE TABLE {TABLE} (
+                id INTEGER PRIMARY KEY,
+                is_active BOOLEAN NOT NULL,
+                embedding VECTOR({dim}) NOT NULL
+            )
+        """)
+        buffer = io.StringIO()
+        for i, (vector, is_active) in enumerate(zip(vectors, active)):
+            buffer.write(f"{i}\t{'t' if is_active else 'f'}\t{vector_literal(vector)}\n")
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {TABLE} (id, is_active, embedding) FROM STDIN", buffer)
+
+    start = time.perf_counter()
+    with database.get_cursor() as cursor:
+        cursor.execute("SET maintenance_work_mem = '1GB'")
+        cursor.execute(f"""
+            CREATE INDEX {TABLE}_hnsw ON {TABLE}
+            USING hnsw (({storage.expression('embedding')}) {storage.operator_class})
+            WITH (m = {m}, ef_construction = {ef_construction})
+            WHERE is_active = true
+        """)
+        cursor.execute(f"ANALYZE {TABLE}")
+        cursor.execute(f"SELECT pg_relation_size('{TABLE}_hnsw') AS size")
+        index_size = cursor.fetchone()['size']
+    return time.perf_counter() - start, index_size
+
+
+def exact_neighbours(query, k):
+    with database.get_cursor(commit=False) as cursor:
+        cursor.execute("SET LOCAL enable_indexscan = off")
+        cursor.execute(f"""
+            SELECT id FROM {TABLE}
+            WHERE is_active = true
+            ORDER BY embedding <=> %s::vector
+            LIMIT %s
+        """, (vector_literal(query), k))
+        return {row['id'] for row in cursor.fetchall()}
+
+
+def timed_search(query, k, ef_search, threshold, threshold_inside, storage):
+    literal = vector_literal(query)
+    if storage.compact:
+        # Same shape as EmbeddingStorage.nearest_sql: compact candidates, full re-rank
+        sql = f"""
+            SELECT id FROM (
+                SELECT id, embedding <=> %(q)s::vector AS distance FROM (
+                    SELECT id, embedding FROM {TABLE}
+                    WHERE is_active = true
+                    ORDER BY {storage.expression('embedding')} <=> {storage.expression('%(q)s::vector')}
+                    LIMIT %(candidates)s
+                ) candidates
+                ORDER BY distance
+                LIMIT %(k)s
+            ) nearest
+            WHERE 1 - distance > %(t)s
+        """
+    elif threshold_inside:
+        sql = f"""
+            SELECT id FROM {TABLE}
+            WHERE is_active = true AND 1 - (embedding <=> %(q)s::vector) > %(t)s
+            ORDER BY embedding <=> %(q)s::vector
+            LIMIT %(k)s
+        """
+    else:
+        sql = f"""
+            SELECT id FROM (
+                SELECT id, embedding <=> %(q)s::vector AS distance FROM {TABLE}
+                WHERE is_active = true
+                ORDER BY embedding <=> %(q)s::vector
+                LIMIT %(k)s
+            ) nearest
+            WHERE 1 - distance > %(t)s
+        """
+    with database.get_cursor(commit=False) as cursor:
+        cursor.execute("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),))
+        start = time.perf_counter()
+        cursor.execute(sql, {"q": literal, "t": threshold, "k": k, "candidates": storage.candidates(k)})
+        ids = [row['id'] for row in cursor.fetchall()]
+        return ids, (time.perf_counter() - start) * 1000
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--inactive", type=float, default=0.1, help="share of inactive rows")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=0.0, help="similarity threshold")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160, 320])
+    parser.add_argument("--precision", choices=["full", "half"], default="full")
+    parser.add_argument("--dimensions", type=int, default=None, help="indexed dimensions (default: all)")
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark table")
+    args = parser.parse_args()
+
+    storage = EmbeddingStorage(
+        precision=args.precision,
+        dimensions=args.dimensions or args.dim,
+        rerank_factor=args.rerank_factor,
+    )
+    if args.dim != 1536 and storage.dimensions != args.dim:
+        parser.error("--dimensions is only supported with --dim 1536")
+    rng = np.random.default_rng(args.seed)
+    vectors = make_vectors(args.rows, args.dim, args.clusters, rng)
+    print(f"📦 Loading {args.rows} x {args.dim} vectors...")
+    build_seconds, index_size = load_table(vectors, args.inactive, rng, args.m, args.ef_construction, storage)
+    print(
+        f"🏗️  HNSW {storage.expression('embedding')} (m={args.m}, ef_construction={args.ef_construction}) "
+        f"built in {build_seconds:.1f}s, {index_size / 2**20:.1f} MiB"
+    )
+
+    # Queries: perturbed copies of stored vectors
+    picks = rng.choice(args.rows, size=args.queries, replace=False)
+    queries = vectors[picks] + 0.1 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    truth = [exact_neighbours(q, args.k) for q in queries]
+
+    try:
+        print(f"{'ef_search':>9} {'threshold':>10} {'recall@k':>9} {'rows/k':>7} {'p50 ms':>8} {'p95 ms':>8}")
+        for ef_search in args.ef_search:
+            # Compact mode always filters outside (after the full-precision re-rank)
+            for threshold_inside in ((False,) if storage.compact else (True, False)):
+                recalls, returned, latencies = [], [], []
+                for query, expected in zip(queries, truth):
+                    ids, elapsed = timed_search(
+                        query, args.k, max(ef_search, storage.candidates(args.k)), args.threshold,
+                        threshold_inside, storage
+                    )
+                    recalls.append(len(expected.intersection(ids)) / len(expected))
+                    returned.append(len(ids) / args.k)
+                    latencies.append(elapsed)
+                print(
+                    f"{ef_search:>9} {'inside' if threshold_inside else 'outside':>10} "
+                    f"{statistics.mean(recalls):>9.3f} {statistics.mean(returned):>7.2f} "
+                    f"{statistics.median(latencies):>8.2f} {percentile(latencies, 95):>8.2f}"
+                )
+    finally:
+        if not args.keep:
+            with database.get_cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+if __name__ == "__main__":
+    main()
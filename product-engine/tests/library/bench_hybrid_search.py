@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Recall/latency benchmark: hybrid (RRF) search vs. the vector-only path.
+
+Builds queries from products already in the database, so the expected SKU of
+each query is known:
+
+- name:      the full product name
+- keywords:  the two longest words of the name
+- typo:      the name with two adjacent characters swapped
+- sku_part:  the SKU without its last character (partial SKU)
+- barcode:   the barcode
+
+For each query type it reports recall@k (expected SKU among the first k
+results) and p50/p95 latency for both paths. Needs the product database and
+an OpenAI key; query embeddings are cached per run, so both paths pay the
+same embedding cost and the latency compares the database work.
+
+Usage:
+    python tests/library/bench_hybrid_search.py --sample 200 --k 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from common.database import database
+from common.query_embedding_cache import QueryEmbeddingCache
+from db_client.product_search import ProductSearchClient
+
+
+def build_queries(sample_size, seed):
+    rows = database.execute_query(
+        """
+        SELECT sku, name, barcode
+        FROM products
+        WHERE is_active = true AND embedding IS NOT NULL
+        ORDER BY random()
+        LIMIT %s
+        """,
+        (sample_size,)
+    )
+    rng = random.Random(seed)
+    queries = []
+    for row in rows:
+        sku, name, barcode = row['sku'], row['name'] or "", row['barcode']
+        queries.append(("name", name, sku))
+        words = sorted((w for w in name.split() if len(w) > 2), key=len, reverse=True)
+        if len(words) >= 2:
+            queries.append(("keywords", " ".join(words[:2]), sku))
+        if len(name) > 6:
+            i = rng.randrange(1, len(name) - 2)
+            queries.append(("typo", name[:i] + name[i + 1] + name[i] + name[i + 2:], sku))
+        if len(sku) > 4:
+            queries.append(("sku_part", sku[:-1], sku))
+        if barcode:
+            queries.append(("barcode", barcode, sku))
+    return queries
+
+
+def run(client, queries, k, threshold):
+    by_type = {}
+    for query_type, query, expected in queries:
+        start = time.perf_counter()
+        results = client.search_products(query, limit=k, similarity_threshold=threshold)
+        elapsed = (time.perf_counter() - start) * 1000
+        hits, latencies = by_type.setdefault(query_type, ([], []))
+        hits.append(any(r.sku == expected for r in results[:k]))
+        latencies.append(elapsed)
+    return by_type
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", type=int, default=200, help="products to sample")
+    parser.add_argument("--k", type=int, default=5, help="recall cut-off")
+    parser.add_argument("--threshold", type=float, default=0.5, help="vector similarity threshold")
+    parser.add_argument("--depth", type=int, default=100, help="hybrid candidate depth")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    queries = build_queries(args.sample, args.seed)
+    print(f"🔍 {len(queries)} queries from {args.sample} sampled products (k={args.k})")
+
+    # Shared cache: embed every query once, then both paths hit the cache
+    cache = QueryEmbeddingCache(max_size=len(queries) + 1)
+    vector_only = ProductSearchClient(query_cache=cache, hybrid=False)
+    hybrid = ProductSearchClient(query_cache=cache, hybrid=True, candidate_depth=args.depth)
+    run(vector_only, queries, args.k, args.threshold)  # warm-up
+
+    results = {
+        "vector": run(vector_only, queries, args.k, args.threshold),
+        "hybrid": run(hybrid, queries, args.k, args.threshold),
+    }
+
+    print(f"{'type':<10} {'path':<7} {'n':>5} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for query_type in sorted(results["vector"]):
+        for path, by_type in results.items():
+            hits, latencies = by_type[query_type]
+            print(
+                f"{query_type:<10} {path:<7} {len(hits):>5} {sum(hits) / len(hits):>9.2%} "
+                f"{statistics.median(latencies):>8.1f} {percentile(latencies, 95):>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Rows/sec benchmark of the upsert_products preparation step.
+
+Builds a synthetic products DataFrame shaped like the Odoo sync output
+(Many2one [id, name] pairs, long names/descriptions, a few duplicate and
+invalid SKUs) and times:
+
+- before: the previous per-row path (``iterrows`` + per-cell processing into
+  tuples for ``execute_values``), kept here as a reference copy;
+- after: ``prepare_products_frame`` + ``to_copy_csv`` (column-wise
+  preparation and the CSV stream fed to ``COPY``).
+
+With --database it also loads both into a temporary table (``execute_values``
+vs ``COPY``) so the end-to-end difference can be seen. Without it no database
+is touched.
+
+Usage:
+    python tests/library/bench_upsert_prep.py --rows 50000
+    python tests/library/bench_upsert_prep.py --rows 50000 --database
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from common.product_frame import (
+    COPY_NULL, MANY2ONE_FIELDS, UPSERT_COLUMNS, VARCHAR_LIMITS,
+    prepare_products_frame, to_copy_csv
+)
+
+
+def make_products(rows, rng):
+    """Synthetic sync output with ~1% duplicate and ~0.5% invalid SKUs."""
+    skus = np.array([f"SKU-{i:07d}" for i in range(rows)], dtype=object)
+    duplicates = rng.choice(rows, size=rows // 100, replace=False)
+    skus[duplicates] = skus[(duplicates + 1) % rows]
+    skus[rng.choice(rows, size=rows // 200, replace=False)] = 'False'
+
+    long_text = "Aceite esencial de lavanda " * 30
+    return pd.DataFrame({
+        'sku': skus,
+        'name': [long_text[:rng.integers(20, 300)] for _ in range(rows)],
+        'description': [long_text if i % 10 == 0 else None for i in range(rows)],
+        'category_id': [[int(c), f"Categoria {c}"] for c in rng.integers(1, 200, rows)],
+        'category_name': [f"Categoria {c}" for c in rng.integers(1, 200, rows)],
+        'is_active': True,
+        'list_price': rng.uniform(1, 10000, rows).round(2),
+        'standard_price': rng.uniform(1, 5000, rows).round(2),
+        'product_type': 'consu',
+        'barcode': [f"780{i:010d}" if i % 3 else '' for i in range(rows)],
+        'weight': rng.uniform(0, 50, rows).round(2),
+        'volume': 0.0,
+        'sale_ok': True,
+        'purchase_ok': True,
+        'uom_id': [[1, "Unidades"] if i % 4 else False for i in range(rows)],
+        'uom_name': 'Unidades',
+        'company_id': None,
+        'text_for_embedding': [f"Producto {i} {long_text[:80]}" for i in range(rows)],
+        'last_update': pd.Timestamp('2025-01-01 12:00:00'),
+    })
+
+
+def legacy_prepare(products_df):
+    """Reference copy of the previous per-row preparation."""
+    limits = VARCHAR_LIMITS
+    data_tuples = []
+    seen_skus = set()
+    for _, row in products_df.iterrows():
+        sku = row.get('sku', '')
+        if sku in seen_skus:
+            continue
+        seen_skus.add(sku)
+        if not sku or sku == 'None' or sku == 'False':
+            continue
+        values = []
+        for col in UPSERT_COLUMNS:
+            value = row[col]
+            if col in MANY2ONE_FIELDS:
+                if isinstance(value, (list, tuple)) and len(value) > 0:
+                    value = int(value[0]) if isinstance(value[0], (int, float)) else None
+                elif isinstance(value, (int, float)):
+                    value = int(value)
+                else:
+                    value = None
+            elif hasattr(value, 'isna'):
+                value = None if value.isna() else value.item()
+            elif isinstance(value, str) and col in limits and len(value) > limits[col]:
+                value = value[:limits[col]]
+            values.append(value)
+        data_tuples.append(tuple(values))
+    return data_tuples
+
+
+def timed(label, rows, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f} s {rows / elapsed:12,.0f} rows/s")
+    return result
+
+
+def load_into_database(products_df):
+    from psycopg2.extras import execute_values
+    from common.database import database
+
+    columns = ', '.join(UPSERT_COLUMNS)
+    create_sql = """
+        CREATE TEMP TABLE bench_temp_products (
+            sku VARCHAR(100), name VARCHAR(255), description TEXT,
+            category_id INTEGER, category_name VARCHAR(255), is_active BOOLEAN,
+            list_price DECIMAL(10,2), standard_price DECIMAL(10,2),
+            product_type VARCHAR(100), barcode VARCHAR(100),
+            weight DECIMAL(10,2), volume DECIMAL(10,2), sale_ok BOOLEAN,
+            purchase_ok BOOLEAN, uom_id INTEGER, uom_name VARCHAR(100),
+            company_id INTEGER, text_for_embedding TEXT, last_update TIMESTAMP
+        ) ON COMMIT DROP
+    """
+    rows = len(products_df)
+
+    with database.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(create_sql)
+            timed("before: iterrows + execute_values", rows, lambda: execute_values(
+                cursor, f"INSERT INTO bench_temp_products ({columns}) VALUES %s",
+                legacy_prepare(products_df), page_size=1000
+            ))
+        conn.rollback()
+
+        with conn.cursor() as cursor:
+            cursor.execute(create_sql)
+            timed("after: vectorized + COPY", rows, lambda: cursor.copy_expert(
+                f"COPY bench_temp_products ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                to_copy_csv(prepare_products_frame(products_df)[0])
+            ))
+        conn.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database", action="store_true", help="also time the load into a temp table")
+    args = parser.parse_args()
+
+    products_df = make_products(args.rows, np.random.default_rng(args.seed))
+    print(f"📦 {args.rows} synthetic products\n")
+
+    legacy = timed("before: iterrows per-cell", args.rows, lambda: legacy_prepare(products_df))
+    prepared, filtered, truncated = timed(
+        "after: column-wise", args.rows, lambda: prepare_products_frame(products_df)
+    )
+    timed("after: column-wise + COPY CSV", args.rows,
+          lambda: to_copy_csv(prepare_products_frame(products_df)[0]))
+
+    print(f"\n✅ rows kept: before={len(legacy)} after={len(prepared)} "
+          f"(filtered {len(filtered)}, truncated {truncated})")
+
+    if args.database:
+        print()
+        load_into_database(products_df)
+
+
+if __name__ == "__main__":
+    main()
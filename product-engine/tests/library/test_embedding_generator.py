@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Unit tests for OpenAIEmbeddingGenerator batching, ordering and Retry-After.
+
+The OpenAI client is replaced by a fake, so no API key or network is used.
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from common.embedding_generator import MAX_INPUT_TOKENS, OpenAIEmbeddingGenerator
+
+
+class SlowFirstEmbeddings:
+    """The first batch answers last; data comes back in reverse index order."""
+
+    def __init__(self):
+        self.calls = []
+
+    def create(self, input, model):
+        self.calls.append(list(input))
+        if input[0] == "a":
+            time.sleep(0.05)
+        data = [SimpleNamespace(index=i, embedding=[float(len(t))]) for i, t in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+class CharEncoding:
+    """One token per character."""
+
+    def encode(self, text):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def make_generator(batch_size=2):
+    generator = OpenAIEmbeddingGenerator(api_key="test-key", max_workers=4)
+    generator.max_batch_size = batch_size
+    generator.encoding = CharEncoding()
+    return generator
+
+
+def rate_limit_error(headers):
+    return SimpleNamespace(response=SimpleNamespace(headers=headers))
+
+
+def test_results_follow_input_order_when_a_later_batch_finishes_first():
+    generator = make_generator()
+    generator.client = SimpleNamespace(embeddings=SlowFirstEmbeddings())
+
+    vectors = generator.generate(["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert [vector[0] for vector in vectors] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert generator.client.embeddings.calls[0] == ["a", "bb"]
+
+
+def test_long_texts_are_truncated_and_batched_alone():
+    generator = make_generator(batch_size=100)
+    long_text = "x" * (MAX_INPUT_TOKENS + 500)
+
+    batches = generator._create_batches(["short", long_text, "tail"])
+
+    assert [len(batch) for batch, _ in batches] == [1, 1, 1]
+    assert batches[1][0][0] == "x" * MAX_INPUT_TOKENS
+    assert [tokens for _, tokens in batches] == [5, MAX_INPUT_TOKENS, 4]
+
+
+def test_batches_respect_the_token_budget():
+    generator = make_generator(batch_size=100)
+    generator.max_tokens_per_request = 10
+
+    batches = generator._create_batches(["aaaa", "bbbb", "cccc", "dd"])
+
+    assert [batch for batch, _ in batches] == [["aaaa", "bbbb"], ["cccc", "dd"]]
+
+
+def test_retry_after_milliseconds_header_wins():
+    error = rate_limit_error({"retry-after-ms": "1500", "retry-after": "9"})
+    assert OpenAIEmbeddingGenerator._retry_after(error) == pytest.approx(1.5)
+
+
+def test_retry_after_seconds():
+    assert OpenAIEmbeddingGenerator._retry_after(rate_limit_error({"retry-after": "3"})) == 3.0
+
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    error = rate_limit_error({"retry-after": format_datetime(when, usegmt=True)})
+    assert OpenAIEmbeddingGenerator._retry_after(error) == pytest.approx(30, abs=2)
+
+
+def test_retry_after_past_http_date_is_zero():
+    when = datetime.now(timezone.utc) - timedelta(minutes=5)
+    error = rate_limit_error({"retry-after": format_datetime(when, usegmt=True)})
+    assert OpenAIEmbeddingGenerator._retry_after(error) == 0.0
+
+
+@pytest.mark.parametrize("headers", [{}, {"retry-after": "soon"}, {"retry-after-ms": "x"}])
+def test_retry_after_missing_or_invalid(headers):
+    assert OpenAIEmbeddingGenerator._retry_after(rate_limit_error(headers)) is None
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the failure paths of the hybrid (lexical + vector) search.
+
+The database is replaced by a fake cursor that, like Postgres, rejects every
+statement after an error until the transaction rolls back to a savepoint.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+import db_client.product_search as product_search
+from db_client.product_search import ProductSearchClient
+from db_manager.product_updater import ProductUpdater
+
+
+class FakeCursor:
+    def __init__(self, fail_on=()):
+        self.fail_on = fail_on
+        self.aborted = False
+        self.statements = []
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql.strip())
+        if sql.startswith("ROLLBACK TO SAVEPOINT"):
+            self.aborted = False
+            return
+        if self.aborted:
+            raise RuntimeError("current transaction is aborted")
+        if any(marker in sql or marker in str(params) for marker in self.fail_on):
+            self.aborted = True
+            raise RuntimeError("statement failed")
+        if "fulltext_hits" in sql:
+            self.rows = [{
+                "sku": params["query"].upper(), "name": params["query"],
+                "rrf_score": 1.0 / 61, "vector_similarity": None,
+            }]
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_failed_query_does_not_abort_the_rest_of_the_batch(monkeypatch):
+    cursor = FakeCursor(fail_on=("roto",))
+
+    @contextmanager
+    def get_cursor(commit=True):
+        yield cursor
+
+    monkeypatch.setattr(product_search.database, "get_cursor", get_cursor)
+    client = ProductSearchClient(hybrid=True)
+    client._search_exact_skus = lambda cursor, skus: {}
+    # The batch could not embed any query: only the lexical legs run
+    client._generate_query_embeddings = lambda queries: [None] * len(queries)
+
+    def embed_one(query):
+        raise AssertionError("the batch must not embed queries one by one")
+
+    client._generate_query_embedding = embed_one
+
+    results = client.search_products_many(["aceite", "roto", "sal"])
+
+    assert [[r.sku for r in rows] for rows in results] == [["ACEITE"], [], ["SAL"]]
+    assert "ROLLBACK TO SAVEPOINT fused_search" in cursor.statements
+
+
+def test_missing_pg_trgm_skips_only_the_search_schema():
+    cursor = FakeCursor(fail_on=("pg_trgm",))
+    updater = ProductUpdater.__new__(ProductUpdater)
+    updater.logger = product_search.logger
+
+    assert updater._create_search_schema(cursor, "CREATE EXTENSION IF NOT EXISTS pg_trgm;") is False
+    # The transaction is usable again for the rest of the schema
+    cursor.execute("CREATE TRIGGER update_products_updated_at")
+    assert not cursor.aborted
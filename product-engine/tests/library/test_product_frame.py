@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the column-wise upsert preparation (common/product_frame.py).
+
+Pure pandas, no database needed.
+"""
+
+import csv
+import os
+import sys
+
+import pandas as pd
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from common.product_frame import (
+    COPY_NULL, UPSERT_COLUMNS, many2one_ids, prepare_products_frame,
+    to_copy_csv, truncate_strings
+)
+
+
+def make_products(rows):
+    return pd.DataFrame([{column: row.get(column) for column in UPSERT_COLUMNS} for row in rows])
+
+
+def test_duplicate_and_invalid_skus_are_filtered():
+    products = make_products([
+        {'sku': 'A', 'name': 'first'},
+        {'sku': 'A', 'name': 'duplicate'},
+        {'sku': None, 'name': 'missing'},
+        {'sku': 'False', 'name': 'odoo false'},
+        {'sku': '', 'name': 'empty'},
+        {'sku': 'B', 'name': 'second'},
+    ])
+
+    frame, filtered, _ = prepare_products_frame(products)
+
+    assert frame['sku'].tolist() == ['A', 'B']
+    assert frame['name'].tolist() == ['first', 'second']
+    assert [(f['reason'], f['sku'], f['row_index']) for f in filtered] == [
+        ('duplicate_sku', 'A', 1),
+        ('invalid_sku_format', 'None', 2),
+        ('invalid_sku_format', 'False', 3),
+        ('invalid_sku_format', '', 4),
+    ]
+
+
+def test_many2one_ids_from_pairs_numbers_and_empty_values():
+    values = pd.Series([[7, 'Cat'], (8, 'Tuple'), 9, 10.0, False, None, [], 'x'], dtype=object)
+    assert many2one_ids(values).tolist() == [7, 8, 9, 10, 0, pd.NA, pd.NA, pd.NA]
+
+
+def test_many2one_ids_on_columns_without_lists():
+    # e.g. company_id is False/None on every row
+    assert many2one_ids(pd.Series([False, None], dtype=object)).tolist() == [0, pd.NA]
+    assert many2one_ids(pd.Series([1.0, None])).tolist() == [1, pd.NA]
+    assert str(many2one_ids(pd.Series([None, None], dtype=object)).dtype) == 'Int64'
+
+
+def test_truncation_counts_only_long_strings():
+    values = pd.Series(['abcdef', 'abc', None, 5, False], dtype=object)
+
+    truncated, count = truncate_strings(values, 3)
+
+    assert count == 1
+    assert truncated.tolist() == ['abc', 'abc', None, 5, False]
+    assert values[0] == 'abcdef'  # the input is not modified
+
+
+def test_truncation_on_columns_without_strings():
+    assert truncate_strings(pd.Series([False, None], dtype=object), 3)[1] == 0
+    assert truncate_strings(pd.Series([1.0, None], dtype=object), 3)[1] == 0
+    assert truncate_strings(pd.Series([1.5, 2.5]), 3)[1] == 0
+
+
+def test_prepare_reports_truncations_per_column():
+    products = make_products([
+        {'sku': 'A', 'name': 'n' * 300, 'description': 'd' * 600, 'company_id': False},
+        {'sku': 'B', 'name': 'n' * 300, 'description': None, 'company_id': None},
+    ])
+
+    frame, _, truncated = prepare_products_frame(products)
+
+    assert truncated == {'name': 2, 'description': 1}
+    assert frame['name'].str.len().tolist() == [255, 255]
+    assert len(frame['description'].iloc[0]) == 500
+
+
+def test_copy_csv_nulls_and_quoting():
+    products = make_products([
+        {'sku': 'A', 'name': 'comma, "quote"\nnewline', 'description': '', 'category_id': [3, 'Cat'],
+         'is_active': True, 'list_price': 1.5},
+        {'sku': 'B', 'name': 'plain', 'description': None, 'category_id': False},
+    ])
+    frame, _, _ = prepare_products_frame(products)
+
+    rows = list(csv.reader(to_copy_csv(frame)))
+
+    assert len(rows) == 2
+    assert all(len(row) == len(UPSERT_COLUMNS) for row in rows)
+    first, second = (dict(zip(UPSERT_COLUMNS, row)) for row in rows)
+    assert first['name'] == 'comma, "quote"\nnewline'
+    assert first['category_id'] == '3'
+    assert first['is_active'] == 'True'
+    assert first['list_price'] == '1.5'
+    assert first['company_id'] == COPY_NULL
+    assert second['description'] == COPY_NULL
+    assert second['category_id'] == '0'
+
+
+def test_copy_csv_keeps_empty_strings_distinct_from_null():
+    frame, _, _ = prepare_products_frame(make_products([{'sku': 'A', 'name': 'x', 'barcode': ''}]))
+    line = to_copy_csv(frame).getvalue()
+    barcode_position = UPSERT_COLUMNS.index('barcode')
+    # An empty unquoted field is '' for COPY ... NULL '\N', not NULL
+    assert next(csv.reader([line]))[barcode_position] == ''
+    assert line.count(COPY_NULL) == len(UPSERT_COLUMNS) - 3
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the in-memory tier of QueryEmbeddingCache.
+
+The shared Postgres tier is replaced by fakes, so no database is used.
+"""
+
+import os
+import sys
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from common.query_embedding_cache import QueryEmbeddingCache
+
+MODEL = "text-embedding-3-small"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = QueryEmbeddingCache(max_size=2, clock=FakeClock())
+    cache.put(MODEL, "aceite", [1.0])
+    cache.put(MODEL, "sal", [2.0])
+    assert cache.get(MODEL, "aceite") == [1.0]  # "sal" is now the oldest
+
+    cache.put(MODEL, "azucar", [3.0])
+
+    assert cache.get(MODEL, "sal") is None
+    assert cache.get(MODEL, "aceite") == [1.0]
+    assert cache.get(MODEL, "azucar") == [3.0]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = QueryEmbeddingCache(ttl_seconds=10, clock=clock)
+    cache.put(MODEL, "aceite", [1.0])
+
+    clock.now = 9.9
+    assert cache.get(MODEL, "aceite") == [1.0]
+    clock.now = 10.0
+    assert cache.get(MODEL, "aceite") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_keys_are_normalized_and_scoped_by_model():
+    cache = QueryEmbeddingCache(clock=FakeClock())
+    cache.put(MODEL, "Aceite de  coco ", [1.0])
+
+    assert cache.get(MODEL, "aceite de coco") == [1.0]
+    assert cache.get("text-embedding-3-large", "aceite de coco") is None
+
+
+def test_counters_and_hit_rate():
+    cache = QueryEmbeddingCache(clock=FakeClock())
+    assert cache.stats()["hit_rate"] == 0.0
+
+    cache.get(MODEL, "aceite")
+    cache.put(MODEL, "aceite", [1.0])
+    cache.get(MODEL, "aceite")
+    cache.get(MODEL, "ACEITE")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["database_hits"], stats["misses"]) == (2, 0, 1)
+    assert stats["hit_rate"] == 2 / 3
+
+
+def test_get_or_create_embeds_the_normalized_query_once():
+    cache = QueryEmbeddingCache(clock=FakeClock())
+    created = []
+
+    def create(text):
+        created.append(text)
+        return [float(len(text))]
+
+    first = cache.get_or_create(MODEL, "Aceite  de Coco", create)
+    second = cache.get_or_create(MODEL, "aceite de coco", create)
+
+    assert created == ["aceite de coco"]
+    assert first == second == [14.0]
+
+
+def test_get_or_create_does_not_cache_failures():
+    cache = QueryEmbeddingCache(clock=FakeClock())
+    assert cache.get_or_create(MODEL, "aceite", lambda text: None) is None
+    assert cache.get_or_create(MODEL, "aceite", lambda text: [1.0]) == [1.0]
+
+
+def test_database_hit_keeps_the_row_expiry():
+    clock = FakeClock()
+    cache = QueryEmbeddingCache(ttl_seconds=100, use_database=True, clock=clock)
+    lookups = []
+
+    def database_get(key):
+        lookups.append(key)
+        return [1.0], 5.0  # the shared row expires in 5 seconds
+
+    cache._database_get = database_get
+
+    assert cache.get(MODEL, "aceite") == [1.0]
+    clock.now = 4.0
+    assert cache.get(MODEL, "aceite") == [1.0]
+    assert len(lookups) == 1
+
+    # Past the row's expiry the memory entry is gone too (not 100s later)
+    clock.now = 5.0
+    cache.get(MODEL, "aceite")
+    assert len(lookups) == 2
+    assert cache.stats()["database_hits"] == 2
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the OpenAI rate limiter (token buckets and shared 429 pause).
+
+No database or OpenAI access needed.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from common.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_starts_full_and_reports_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=clock)  # 1 token/s
+
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(1.0)
+    assert bucket.try_acquire(2) == pytest.approx(2.0)
+
+
+def test_bucket_refills_over_time_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=clock)
+    bucket.try_acquire(2)
+
+    clock.now = 0.5
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now = 1.0
+    assert bucket.try_acquire() == 0.0
+
+    # A long idle period never stores more than the capacity
+    clock.now = 1000.0
+    assert bucket.try_acquire(2) == 0.0
+    assert bucket.try_acquire() == pytest.approx(1.0)
+
+
+def test_request_larger_than_capacity_is_clamped():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=clock)
+
+    # Served once the bucket is full instead of waiting forever
+    assert bucket.try_acquire(10) == 0.0
+    assert bucket.try_acquire(10) == pytest.approx(2.0)
+    clock.now = 2.0
+    assert bucket.try_acquire(10) == 0.0
+
+
+def test_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate_per_minute=0)
+
+
+def test_pause_holds_other_workers():
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=1_000_000)
+    limiter.pause(0.2)
+    waited = []
+
+    def worker():
+        start = time.monotonic()
+        limiter.acquire(10)
+        waited.append(time.monotonic() - start)
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(waited) == 3
+    assert min(waited) >= 0.15
+
+
+def test_pause_never_shortens_an_existing_pause():
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=1_000_000)
+    limiter.pause(0.2)
+    limiter.pause(0.01)
+
+    start = time.monotonic()
+    limiter.acquire(1)
+    assert time.monotonic() - start >= 0.15